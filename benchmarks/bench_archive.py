@@ -0,0 +1,76 @@
+"""
+Compares pickling lists of observations with an ObservationArchive, on a day
+of half-hourly polls of the stations of a synthetic regional feed: size on
+disk, write time and read time of the whole day, a province and an hour.
+
+Usage: python benchmarks/bench_archive.py [number of stations] [polls per day]
+"""
+import os
+import pickle
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+from meteoclimatic import Observation, Weather
+from meteoclimatic.archive import ObservationArchive
+from meteoclimatic.parser import iter_feed_items
+
+try:
+    from .feeds import regional_feed
+except ImportError:  # run as a script
+    from feeds import regional_feed
+
+
+def polls(stations, count):
+    observations = []
+    for item in iter_feed_items(regional_feed(stations)):
+        try:
+            observations.append(Observation.from_feed_item(item))
+        except ValueError:
+            pass
+    for poll in range(count):
+        shift = timedelta(minutes=30 * poll)
+        for observation in observations:
+            reception_time = observation.reception_time.replace(hour=0) + shift
+            weather = Weather(reception_time, *[getattr(observation.weather, name) for name in Weather.__slots__[1:]])
+            yield Observation(reception_time, observation.station, weather)
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def size(path):
+    return sum(os.path.getsize(os.path.join(directory, name))
+               for directory, _, names in os.walk(path) for name in names)
+
+
+def main(stations, count):
+    observations = list(polls(stations, count))
+    print("%d observations of %d stations" % (len(observations), stations))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "observations.pickle")
+        with open(path, "wb") as f:
+            write, _ = timed(lambda: pickle.dump(observations, f, pickle.HIGHEST_PROTOCOL))
+        with open(path, "rb") as f:
+            read, _ = timed(lambda: pickle.load(f))
+        print("pickle:  %8.1f MB, write %6.2f s, read %6.2f s" % (os.path.getsize(path) / 1e6, write, read))
+
+        archive = ObservationArchive(os.path.join(directory, "archive"))
+        write, _ = timed(lambda: archive.append(observations))
+        read, _ = timed(lambda: list(archive.observations()))
+        print("archive: %8.1f MB, write %6.2f s, read %6.2f s" % (size(archive.path) / 1e6, write, read))
+
+        hour = observations[0].reception_time + timedelta(hours=12)
+        for label, kwargs in (("day", {}), ("province", {"prefix": "ESCAT43000000001"}),
+                              ("hour", {"start": hour, "end": hour + timedelta(hours=1)})):
+            elapsed, batch = timed(lambda: archive.read_batch(**kwargs))
+            scan, _ = timed(lambda: list(archive.observations(**kwargs)))
+            print("%-9s %7d rows, read_batch %6.3f s, observations %6.3f s" % (label, len(batch), elapsed, scan))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000, int(sys.argv[2]) if len(sys.argv) > 2 else 48)
@@ -0,0 +1,42 @@
+"""
+Compares datetime.strptime with parse_rfc822_date on the `<pubDate>` of the
+items of a synthetic regional feed, with a cold and a warm memo table.
+
+Usage: python benchmarks/bench_dates.py [number of items]
+"""
+import sys
+import timeit
+from datetime import datetime
+
+from meteoclimatic.feed import parse_rfc822_date
+from meteoclimatic.parser import iter_feed_items
+
+try:
+    from .feeds import regional_feed
+except ImportError:  # run as a script
+    from feeds import regional_feed
+
+
+def parse_cold(dates):
+    parse_rfc822_date.cache_clear()
+    return [parse_rfc822_date(date) for date in dates]
+
+
+def main(size):
+    dates = [item.pub_date for item in iter_feed_items(regional_feed(size), "raw")]
+    print("%d items, %d distinct dates" % (len(dates), len(set(dates))))
+
+    strptime = min(timeit.repeat(
+        lambda: [datetime.strptime(date, "%a, %d %b %Y %H:%M:%S %z") for date in dates], number=1, repeat=5))
+    cold = min(timeit.repeat(lambda: parse_cold(dates), number=1, repeat=5))
+    unique = min(timeit.repeat(lambda: parse_cold(set(dates)), number=1, repeat=5))
+    warm = min(timeit.repeat(lambda: [parse_rfc822_date(date) for date in dates], number=1, repeat=5))
+    print("strptime:                   %8.1f ms" % (strptime * 1000, ))
+    print("parse_rfc822_date, cold:    %8.1f ms (%.1fx)" % (cold * 1000, strptime / cold))
+    print("parse_rfc822_date, warm:    %8.1f ms (%.1fx)" % (warm * 1000, strptime / warm))
+    print("parse_rfc822_date, no hits: %8.2f us per date vs %.2f us with strptime" %
+          (unique / len(set(dates)) * 1e6, strptime / len(dates) * 1e6))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,38 @@
+"""
+Compares the per-item cost of decoding a data block field by field with
+FeedItemHelper.get_float against the single-pass FeedItemHelper.decode.
+
+Usage: python benchmarks/bench_decode.py [number of iterations]
+"""
+import os
+import sys
+import timeit
+
+from meteoclimatic.feed import FeedItemHelper
+from meteoclimatic.parser import iter_feed_items
+
+_feeds_dir = os.path.join(os.path.dirname(__file__), os.pardir, "tests", "feeds")
+
+_float_fields = ("temp_current", "temp_max", "temp_min",
+                 "humidity_current", "humidity_max", "humidity_min",
+                 "pressure_current", "pressure_max", "pressure_min",
+                 "wind_current", "wind_max", "wind_bearing", "rain")
+
+
+def decode_by_field(helper):
+    return ([helper.get_text("station_code"), helper.get_text("condition")] +
+            [helper.get_float(field) for field in _float_fields])
+
+
+def main(number):
+    with open(os.path.join(_feeds_dir, "full_station.xml"), "rb") as f:
+        helper = FeedItemHelper(next(iter_feed_items(f.read())))
+
+    by_field = min(timeit.repeat(lambda: decode_by_field(helper), number=number, repeat=5)) / number
+    single_pass = min(timeit.repeat(helper.decode, number=number, repeat=5)) / number
+    print("get_text/get_float: %6.2f us per item" % (by_field * 1e6, ))
+    print("decode:             %6.2f us per item (%.1fx)" % (single_pass * 1e6, by_field / single_pass))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
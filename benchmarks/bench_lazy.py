@@ -0,0 +1,67 @@
+"""
+Compares eager and lazy observations of the items of a synthetic regional
+feed, when reading only the station code and the current temperature of
+each observation, and when reading every field.
+
+Usage: python benchmarks/bench_lazy.py [number of items]
+"""
+import sys
+import timeit
+
+from meteoclimatic import Observation, Weather
+from meteoclimatic.parser import iter_feed_items
+
+try:
+    from .feeds import regional_feed
+except ImportError:  # run as a script
+    from feeds import regional_feed
+
+
+def observations(items, lazy):
+    result = []
+    for item in items:
+        try:
+            result.append(Observation.from_feed_item(item, lazy))
+        except ValueError:
+            pass
+    return result
+
+
+def read_temperatures(items, lazy):
+    return [(o.station.code, o.weather.temp_current) for o in observations(items, lazy)]
+
+
+def read_all(items, lazy):
+    # Lazy observations with out-of-range values raise on access
+    values = []
+    for o in observations(items, lazy):
+        try:
+            values.append((o.reception_time, o.station, [getattr(o.weather, name) for name in Weather.__slots__]))
+        except ValueError:
+            pass
+    return values
+
+
+def validate_all(items, lazy):
+    values = []
+    for o in observations(items, lazy):
+        try:
+            weather = o.weather.validate() if lazy else o.weather
+            values.append((o.reception_time, o.station, [getattr(weather, name) for name in Weather.__slots__]))
+        except ValueError:
+            pass
+    return values
+
+
+def main(size):
+    items = list(iter_feed_items(regional_feed(size), "raw"))
+    print("%d items" % (len(items), ))
+    for label, function in (("build", observations), ("code and temperature", read_temperatures),
+                            ("every field", read_all), ("validate, every field", validate_all)):
+        eager = min(timeit.repeat(lambda: function(items, False), number=1, repeat=5))
+        lazy = min(timeit.repeat(lambda: function(items, True), number=1, repeat=5))
+        print("%-23s eager %7.1f ms, lazy %7.1f ms (%.1fx)" % (label + ":", eager * 1000, lazy * 1000, eager / lazy))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,55 @@
+"""
+Measures the memory held by *Observation* instances, including their *Station*
+and *Weather*, by building a number of distinct observations under tracemalloc.
+
+Usage: python benchmarks/bench_memory.py [number of observations]
+"""
+import sys
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from meteoclimatic import Condition, Observation, Station, Weather
+
+
+def build_observations(size):
+    """Returns *size* observations of distinct stations and times."""
+    start = datetime(2020, 6, 4, 10, 48, 1, tzinfo=timezone.utc)
+    observations = []
+    for i in range(size):
+        reception_time = start + timedelta(seconds=i)
+        code = "ESCAT43%011dX" % (i, )
+        station = Station("Station %d" % (i, ), code, "http://www.meteoclimatic.net/perfil/" + code)
+        weather = Weather(reception_time, Condition.sun,
+                          i % 40 + 0.1, i % 40 + 0.2, i % 40 + 0.3,
+                          i % 100 + 0.1, i % 100 + 0.2, i % 100 + 0.3,
+                          1000.0 + i % 40, 1001.0 + i % 40, 999.0 + i % 40,
+                          i % 50 + 0.1, i % 50 + 0.2, float(i % 360),
+                          i % 30 + 0.1)
+        observations.append(Observation(reception_time, station, weather))
+    return observations
+
+
+def main(size):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    observations = build_observations(size)
+    total = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    print("%d observations, %.1f MB" % (len(observations), total / 1e6))
+    print("%.0f bytes per observation (station and weather included)" % (total / size, ))
+    print("%d bytes of Observation, Station and Weather instances" % (instance_size(observations[0]), ))
+
+
+def instance_size(observation):
+    """Returns the size of the three instances, excluding the attribute values."""
+    size = 0
+    for obj in (observation, observation.station, observation.weather):
+        size += sys.getsizeof(obj)
+        if hasattr(obj, "__dict__"):
+            size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
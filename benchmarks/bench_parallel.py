@@ -0,0 +1,60 @@
+"""
+Times parse_feeds on an archive of synthetic regional feeds with 1, 2 and 4
+workers, for both outputs, against parsing the archive sequentially.
+
+Usage: python benchmarks/bench_parallel.py [number of items per feed] [number of feeds]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from meteoclimatic import Observation
+from meteoclimatic.parallel import parse_feeds
+from meteoclimatic.parser import iter_feed_items
+
+try:
+    from .feeds import regional_feed
+except ImportError:  # run as a script
+    from feeds import regional_feed
+
+
+def sequential(paths):
+    observations = []
+    for path in paths:
+        with open(path, "rb") as f:
+            for item in iter_feed_items(f.read()):
+                try:
+                    observations.append(Observation.from_feed_item(item))
+                except ValueError:
+                    pass
+    return observations
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main(size, feeds):
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for seed in range(feeds):
+            paths.append(os.path.join(directory, "feed-%d.xml" % (seed, )))
+            with open(paths[-1], "wb") as f:
+                f.write(regional_feed(size, seed=seed))
+        print("%d feeds of %d items, %d CPUs" % (feeds, size, os.cpu_count()))
+
+        baseline = timed(lambda: sequential(paths))
+        print("sequential:                 %8.2f s" % (baseline, ))
+        for workers in (1, 2, 4):
+            elapsed = timed(lambda: list(parse_feeds(paths, workers=workers)))
+            print("observations, %d workers:    %8.2f s (%.1fx)" % (workers, elapsed, baseline / elapsed))
+        for workers in (1, 2, 4):
+            elapsed = timed(lambda: parse_feeds(paths, workers=workers, output="batch"))
+            print("batch, %d workers:           %8.2f s (%.1fx)" % (workers, elapsed, baseline / elapsed))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000, int(sys.argv[2]) if len(sys.argv) > 2 else 4)
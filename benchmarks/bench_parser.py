@@ -0,0 +1,29 @@
+"""
+Compares the feed parser engines on a synthetic regional feed.
+
+Usage: python benchmarks/bench_parser.py [number of items]
+"""
+import sys
+import timeit
+
+from meteoclimatic import Observation
+from meteoclimatic.parser import PARSER_ENGINES, iter_feed_items
+
+try:
+    from .feeds import regional_feed
+except ImportError:  # run as a script
+    from feeds import regional_feed
+
+
+def main(size):
+    document = regional_feed(size)
+    print("%d items, %d bytes" % (size, len(document)))
+    for engine in PARSER_ENGINES:
+        items = min(timeit.repeat(lambda: list(iter_feed_items(document, engine)), number=1, repeat=3))
+        observations = min(timeit.repeat(
+            lambda: [Observation.from_feed_item(i) for i in iter_feed_items(document, engine)], number=1, repeat=3))
+        print("%-5s items: %8.1f ms  observations: %8.1f ms" % (engine, items * 1000, observations * 1000))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,49 @@
+"""
+Compares StationIndex radius and nearest-neighbour queries against a linear
+haversine scan, on stations spread over the Iberian peninsula.
+
+Usage: python benchmarks/bench_spatial.py [number of stations]
+"""
+import random
+import sys
+import timeit
+
+from meteoclimatic import Station
+from meteoclimatic.spatial import StationIndex, haversine_km
+
+
+def iberian_stations(size, seed=43):
+    """Returns *size* stations with random coordinates in the Iberian peninsula."""
+    rng = random.Random(seed)
+    return [Station("Station %d" % (i, ), "ES%017d" % (i, ), None, rng.uniform(36.0, 43.8), rng.uniform(-9.3, 3.3))
+            for i in range(size)]
+
+
+def linear_scan(stations, latitude, longitude, radius_km):
+    """Returns the stations within *radius_km* of a point, measuring the distance to every station."""
+    return [s for s in stations if haversine_km(latitude, longitude, s.latitude, s.longitude) <= radius_km]
+
+
+def main(size):
+    stations = iberian_stations(size)
+    index = StationIndex()
+    start = timeit.default_timer()
+    index.update(stations)
+    print("%d stations, indexed in %.1f ms" % (size, (timeit.default_timer() - start) * 1e3))
+
+    queries = [(random.uniform(36.0, 43.8), random.uniform(-9.3, 3.3)) for _ in range(100)]
+    benchmarks = [
+        ("linear scan 25 km", lambda lat, lon: linear_scan(stations, lat, lon, 25.0)),
+        ("stations_near 25 km", lambda lat, lon: index.near(lat, lon, 25.0)),
+        ("stations_near 100 km", lambda lat, lon: index.near(lat, lon, 100.0)),
+        ("nearest_station k=1", lambda lat, lon: index.nearest(lat, lon, 1)),
+        ("nearest_station k=10", lambda lat, lon: index.nearest(lat, lon, 10)),
+    ]
+    for name, query in benchmarks:
+        number = 1 if name.startswith("linear") else 10
+        elapsed = timeit.timeit(lambda: [query(lat, lon) for lat, lon in queries], number=number)
+        print("%-22s %8.3f ms per query" % (name, elapsed / number / len(queries) * 1e3))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
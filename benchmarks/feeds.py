@@ -0,0 +1,190 @@
+"""
+Synthetic regional feeds, and a local HTTP stand-in of the Meteoclimatic
+service serving them, for the benchmarks.
+
+Usage: python benchmarks/feeds.py [number of items] > feed.xml
+"""
+import gzip
+import random
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from meteoclimatic import Condition
+
+_HEAD = """<rss version="2.0"
+  xmlns:content="http://purl.org/rss/1.0/modules/content/"
+  xmlns:wfw="http://wellformedweb.org/CommentAPI/"
+  xmlns:geo="http://www.w3.org/2003/01/geo/wgs84_pos#" xmlns:georss="http://www.georss.org/georss"
+>
+ <channel>
+  <title>Meteoclimatic - RSS</title>
+  <link>http://meteoclimatic.net/</link>
+  <description>Meteoclimatic - RSS</description>
+  <copyright>Creative Commons - Attribution-NonCommercial-NoDerivs 3.0 Unported</copyright>
+  <language>es</language>
+  <ttl>60</ttl>
+  <pubDate>%s</pubDate>
+  <docs>http://meteoclimatic.net/index/wp/rss_es.html</docs>"""
+
+_ITEM = """  <item>
+   <title>%(name)s (Tarragona)</title>
+   <link>http://www.meteoclimatic.net/perfil/%(code)s</link>
+   <pubDate>%(published)s</pubDate>
+   <guid>%(guid)032x</guid>
+   <description>
+    <![CDATA[
+     <ul>
+<li><img src="http://meteoclimatic.net/img/sem_tpv.png" style="width: 12px; height: 12px; border: 0px;" alt="***" /> \
+<a href="http://www.meteoclimatic.net/perfil/%(code)s">%(name)s</a></li>
+<ul>
+<li> Actualizado: %(updated)s UTC</li>
+<li>Temperatura: <b>%(temperature)s</b> &#186;C</li>
+<li>Humedad: <b>%(humidity)s</b> %%</li>
+<li>Bar&#243;metro: <b>%(pressure)s</b> hPa</li>
+<li>Viento: <b>%(wind)s</b> km/h</li>
+<li>Precip.: <b>%(rain)s</b> mm</li>
+</ul>
+     </ul>
+    ]]>
+<!--
+[[<BEGIN:%(code)s:DATA>]]
+[[<%(code)s;(%(temperature)s;%(temp_max)s;%(temp_min)s;%(condition)s);%(humidity_block)s;%(pressure_block)s;\
+%(wind_block)s;%(rain_block)s;%(name)s>]]
+[[<END:%(code)s:DATA>]]
+-->
+   </description>%(location)s
+  </item>"""
+
+_NAMES = ("Reus - Nord", "Reus - Centre", "Cambrils - Vilafortuny", "Pu&#231;ol-Ciudad Jard&#237;n",
+          "Sope&#241;a de Curue&#241;o", "Momp&#237;a", "Cornell&#224; - Gavarra", "Zafrilla (La Reclovilla)")
+
+# Conditions published by stations which are not members of *Condition*
+_UNKNOWN_CONDITIONS = ("snow", "hazecloud", "overcast")
+
+_PUBLISHED = datetime(2020, 6, 4, 10, 0, tzinfo=timezone.utc)
+
+
+def regional_feed(size, seed=43, missing=0.05, sentinels=0.05, unknown_conditions=0.05):
+    """
+    Returns a regional feed document with *size* items of distinct stations.
+    Each reading group of an item is missing, i.e. `(;;)`, with probability
+    *missing*, and reports the `-99,0` "not provided" sentinels with
+    probability *sentinels*. Conditions are empty or unknown with probability
+    *unknown_conditions*, and some items have no coordinates or only a
+    `<georss:point>`. The same arguments always produce the same document.
+    """
+    rng = random.Random(seed)
+    conditions = [condition.value for condition in Condition]
+    items = [_HEAD % (format_datetime(_PUBLISHED + timedelta(hours=1)), )]
+    for i in range(size):
+        published = _PUBLISHED + timedelta(seconds=rng.randrange(3600))
+        temperature = rng.uniform(-5, 40)
+        roll = rng.random()
+        if roll < unknown_conditions / 2:
+            condition = ""
+        elif roll < unknown_conditions:
+            condition = rng.choice(_UNKNOWN_CONDITIONS)
+        else:
+            condition = rng.choice(conditions)
+        values = {
+            "name": rng.choice(_NAMES),
+            "code": "ESCAT43%06d%05dX" % (i // 100000, i % 100000),
+            "published": format_datetime(published),
+            "updated": published.strftime("%d-%m-%Y %H:%M"),
+            "guid": rng.getrandbits(128),
+            "temperature": _number(temperature),
+            "temp_max": _number(temperature + rng.uniform(0, 5)),
+            "temp_min": _number(temperature - rng.uniform(0, 5)),
+            "condition": condition,
+            "humidity": _number(rng.uniform(10, 100)),
+            "pressure": _number(rng.uniform(980, 1040)),
+            "wind": _number(rng.uniform(0, 60)),
+            "rain": _number(rng.uniform(0, 30)),
+        }
+        values["humidity_block"] = _group(rng, missing, sentinels, values["humidity"], _number(rng.uniform(50, 100)),
+                                          _number(rng.uniform(10, 50)))
+        values["pressure_block"] = _group(rng, missing, sentinels, values["pressure"], _number(rng.uniform(1000, 1040)),
+                                          _number(rng.uniform(980, 1000)))
+        values["wind_block"] = _group(rng, missing, sentinels, values["wind"], _number(rng.uniform(0, 120)),
+                                      "%d" % (rng.randrange(360), ))
+        values["rain_block"] = _group(rng, missing, sentinels, values["rain"])
+        values["location"] = _location(rng)
+        items.append(_ITEM % values)
+    items.append(" </channel>\n</rss>\n")
+    return "\n".join(items).encode("utf-8")
+
+
+def _number(value):
+    # Meteoclimatic uses a decimal comma
+    return ("%.1f" % (value, )).replace(".", ",")
+
+
+def _group(rng, missing, sentinels, *values):
+    roll = rng.random()
+    if roll < missing:
+        return "(%s)" % (";" * (len(values) - 1), )
+    if roll < missing + sentinels:
+        values = ["-99,0"] * len(values)
+    return "(%s)" % (";".join(values), )
+
+
+def _location(rng):
+    latitude, longitude = rng.uniform(36, 43.8), rng.uniform(-9.3, 3.3)
+    roll = rng.random()
+    if roll < 0.05:
+        return ""
+    point = "\n   <georss:point>%.2f %.2f</georss:point>" % (latitude, longitude)
+    if roll < 0.1:
+        return point
+    return point + ("\n   <geo:Point>\n    <geo:lat>%.2f</geo:lat>\n    <geo:long>%.2f</geo:long>\n   </geo:Point>" %
+                    (latitude, longitude))
+
+
+class FeedServer(object):
+    """
+    Local HTTP stand-in of the Meteoclimatic service serving gzip compressed
+    feed documents keyed by feed code, e.g. `{"ESCAT43": regional_feed(1000)}`.
+    """
+
+    def __init__(self, feeds):
+        compressed = {code: gzip.compress(document) for code, document in feeds.items()}
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                body = compressed.get(self.path.rsplit("/", 1)[-1])
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/rss+xml")
+                self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05, ), daemon=True)
+
+    @property
+    def base_url(self):
+        return "http://127.0.0.1:%d/feed/rss/{station_code}" % (self._server.server_address[1], )
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+if __name__ == "__main__":
+    sys.stdout.buffer.write(regional_feed(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
@@ -0,0 +1,150 @@
+"""
+Benchmark suite run by asv (https://asv.readthedocs.io) on synthetic regional
+feeds of 10, 1k and 50k items, see asv.conf.json.
+
+Usage: asv run, or asv run --python=same --quick to try the current checkout
+"""
+import functools
+import time
+import tracemalloc
+
+from meteoclimatic import MeteoclimaticClient, Observation
+from meteoclimatic.feed import parse_rfc822_date
+from meteoclimatic.parser import PARSER_ENGINES, iter_feed_items
+from meteoclimatic.transport import PooledTransport
+
+from .feeds import FeedServer, regional_feed
+
+SIZES = (10, 1000, 50000)
+
+
+@functools.lru_cache(maxsize=None)
+def _feed(size):
+    return regional_feed(size)
+
+
+def _observations(document, engine):
+    observations = []
+    for item in iter_feed_items(document, engine):
+        try:
+            observations.append(Observation.from_feed_item(item))
+        except ValueError:
+            pass
+    return observations
+
+
+class ParseSuite(object):
+    """Parse time and throughput of every parser engine."""
+
+    params = (SIZES, list(PARSER_ENGINES))
+    param_names = ("items", "engine")
+    number = 1
+    repeat = (1, 5, 30.0)
+    timeout = 600
+
+    def setup(self, size, engine):
+        if engine == "bs4" and size > 1000:
+            # Building the whole soup of a large feed takes minutes
+            raise NotImplementedError()
+        self.document = _feed(size)
+
+    def time_feed_items(self, size, engine):
+        list(iter_feed_items(self.document, engine))
+
+    def time_observations(self, size, engine):
+        _observations(self.document, engine)
+
+    def track_observations_per_second(self, size, engine):
+        start = time.perf_counter()
+        _observations(self.document, engine)
+        return size / (time.perf_counter() - start)
+
+    track_observations_per_second.unit = "observations/s"
+
+
+class LazySuite(object):
+    """Eager and lazy observations of a feed, reading only their station code and current temperature."""
+
+    params = (SIZES, [False, True])
+    param_names = ("items", "lazy")
+
+    def setup(self, size, lazy):
+        self.items = list(iter_feed_items(_feed(size), "raw"))
+
+    def time_code_and_temperature(self, size, lazy):
+        for item in self.items:
+            try:
+                observation = Observation.from_feed_item(item, lazy)
+            except ValueError:
+                continue
+            observation.station.code, observation.weather.temp_current
+
+
+class DateSuite(object):
+    """Parsing of the publication dates of a feed, with a cold memo table."""
+
+    params = (SIZES, )
+    param_names = ("items", )
+
+    def setup(self, size):
+        self.dates = [item.pub_date for item in iter_feed_items(_feed(size), "raw")]
+
+    def time_parse_rfc822_date(self, size):
+        parse_rfc822_date.cache_clear()
+        for date in self.dates:
+            parse_rfc822_date(date)
+
+
+class MemorySuite(object):
+    """Memory allocated while parsing a feed into observations."""
+
+    params = (SIZES, ["lxml", "raw"])
+    param_names = ("items", "engine")
+    timeout = 600
+
+    def setup(self, size, engine):
+        self.document = _feed(size)
+
+    def track_peak_traced_memory(self, size, engine):
+        tracemalloc.start()
+        try:
+            _observations(self.document, engine)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    track_peak_traced_memory.unit = "bytes"
+
+    def peakmem_observations(self, size, engine):
+        _observations(self.document, engine)
+
+
+class FetchSuite(object):
+    """End-to-end latency of the client against a local HTTP stand-in of the service."""
+
+    params = (SIZES, ["lxml", "raw"])
+    param_names = ("items", "engine")
+    number = 1
+    repeat = (1, 5, 30.0)
+    timeout = 600
+
+    def setup(self, size, engine):
+        self.server = FeedServer({"ESCAT43": _feed(size), "ESCAT4300000000000X": _feed(1)})
+        self.server.__enter__()
+        self.transport = PooledTransport()
+        self.client = MeteoclimaticClient(parser=engine, base_url=self.server.base_url, transport=self.transport)
+
+    def teardown(self, size, engine):
+        self.transport.close()
+        self.server.__exit__(None, None, None)
+
+    def time_weather_at_region(self, size, engine):
+        self.client.weather_at_region("ESCAT43")
+
+    def time_iter_observations(self, size, engine):
+        for _ in self.client.iter_observations("ESCAT43"):
+            pass
+
+    def time_weather_at_station(self, size, engine):
+        # Station feeds hold a single item whatever the size of the region
+        self.client.weather_at_station("ESCAT4300000000000X")
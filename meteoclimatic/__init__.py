@@ -2,3 +2,5 @@ from meteoclimatic.weather import Weather, Condition  # noqa: F401
 from meteoclimatic.station import Station  # noqa: F401
 from meteoclimatic.observation import Observation  # noqa: F401
 from meteoclimatic.client import MeteoclimaticClient  # noqa: F401
+from meteoclimatic.async_client import AsyncMeteoclimaticClient  # noqa: F401
+from meteoclimatic.batch import ObservationBatch  # noqa: F401
@@ -0,0 +1,246 @@
+import json
+import os
+import re
+import struct
+import threading
+from datetime import date, datetime, timedelta, timezone
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+from meteoclimatic.batch import _CONDITION_CODES, _NO_CONDITION, COLUMNS, CONDITIONS, FLOAT_COLUMNS, ObservationBatch
+from meteoclimatic.observation import Observation
+from meteoclimatic.station import Station
+from meteoclimatic.weather import Condition, Weather
+
+# Partition files start with the magic, the length of a JSON header holding the
+# station and the format version, the header and the padding aligning the
+# records, followed by fixed-width little-endian records
+_MAGIC = b"MCOBS\x00\x00\x01"
+_HEADER_LENGTH = struct.Struct("<I")
+_FORMAT_VERSION = 1
+_EXTENSION = ".obs"
+_DAY_FORMAT = "%Y-%m-%d"
+_CONDITION_SIZE = 16
+_STATION_CODE = re.compile(r"\w+")
+
+if np is not None:
+    RECORD = np.dtype([("reception_time", "<M8[s]"), ("condition", "S%d" % (_CONDITION_SIZE, ))] +
+                      [(name, "<f8") for name in FLOAT_COLUMNS])
+else:  # pragma: no cover
+    RECORD = None
+
+
+class ObservationArchive(object):
+    """
+    On-disk archive of observations, partitioned in a directory per UTC day
+    holding a file per station. Each file starts with a small header with the
+    name, URL and coordinates of the station, followed by fixed-width records
+    of *RECORD* which are appended in bulk and read through `numpy.memmap`, so
+    scans only open the partitions of the requested days and station prefix,
+    and only page in the records they touch.
+
+    Stations are stored as they were in the first observation of the day, and
+    conditions longer than 16 bytes are truncated. Appends from several
+    threads are serialized, but a partition must have a single writer process.
+
+    :param path: path of the root directory of the archive, created if missing
+    :type path: `str`
+    :returns: an *ObservationArchive* instance
+    :raises: *ImportError* when NumPy is not installed
+    """
+
+    def __init__(self, path):
+        """Initialize the class."""
+        if np is None:
+            raise ImportError("ObservationArchive requires NumPy, install it with 'pip install numpy'")
+        self.path = os.fspath(path)
+        os.makedirs(self.path, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def append(self, observations):
+        """
+        Appends observations to the archive, writing the records of each
+        partition at once.
+        :param observations: the observations
+        :type observations: iterable of *Observation*
+        :returns: the number of observations appended
+        :raises: *ValueError* when a station code is not valid
+        """
+        partitions = {}
+        for observation in observations:
+            day = observation.reception_time.astimezone(timezone.utc).date()
+            partitions.setdefault((day, observation.station.code), []).append(observation)
+
+        with self._lock:
+            for (day, station_code), group in partitions.items():
+                self._write(self._partition_path(day, station_code), group)
+        return sum(len(group) for group in partitions.values())
+
+    def observations(self, start=None, end=None, prefix=""):
+        """
+        Lazily reads the observations of the archive received between *start*
+        and *end*, from stations whose code starts with *prefix*. Observations
+        are returned by day, by station code, and in the order they were
+        appended.
+        :param start: first reception time, inclusive, the first day if None
+        :type start: `datetime.datetime`
+        :param end: last reception time, exclusive, the last day if None
+        :type end: `datetime.datetime`
+        :param prefix: prefix of the station codes, e.g. "ESCAT43"
+        :type prefix: `str`
+        :returns: an iterator of *Observation* instances
+        """
+        for station, records in self._scan(start, end, prefix):
+            # Records become tuples of naive datetimes, bytes and floats
+            for record in records.tolist():
+                reception_time = record[0].replace(tzinfo=timezone.utc)
+                weather = Weather(reception_time, _condition(record[1]), *[
+                    value if value == value else None for value in record[2:]])
+                yield Observation(reception_time, station, weather)
+
+    def batches(self, start=None, end=None, prefix=""):
+        """
+        Lazily reads the archive like *observations*, as one *ObservationBatch*
+        per partition. Weather and reception time columns are views of the
+        mapped files, so they are only read when used.
+        :param start: first reception time, inclusive, the first day if None
+        :type start: `datetime.datetime`
+        :param end: last reception time, exclusive, the last day if None
+        :type end: `datetime.datetime`
+        :param prefix: prefix of the station codes, e.g. "ESCAT43"
+        :type prefix: `str`
+        :returns: an iterator of *ObservationBatch* instances
+        """
+        for station, records in self._scan(start, end, prefix):
+            conditions = records["condition"]
+            codes = np.full(len(records), _NO_CONDITION, dtype="int8")
+            for condition in CONDITIONS:
+                codes[conditions == condition.value.encode("ascii")] = _CONDITION_CODES[condition.value]
+            columns = {name: records[name] for name in COLUMNS if name in RECORD.names}
+            columns["station_code"] = np.full(len(records), station.code)
+            columns["station_name"] = np.full(len(records), station.name)
+            columns["condition"] = codes
+            yield ObservationBatch(columns)
+
+    def read_batch(self, start=None, end=None, prefix=""):
+        """
+        Reads the archive like *observations* into a single batch.
+        :param start: first reception time, inclusive, the first day if None
+        :type start: `datetime.datetime`
+        :param end: last reception time, exclusive, the last day if None
+        :type end: `datetime.datetime`
+        :param prefix: prefix of the station codes, e.g. "ESCAT43"
+        :type prefix: `str`
+        :returns: an *ObservationBatch* instance
+        """
+        return ObservationBatch.concatenate(self.batches(start, end, prefix))
+
+    def days(self):
+        """
+        Returns the days stored in the archive.
+        :returns: a sorted `list` of `datetime.date`
+        """
+        days = []
+        for entry in os.scandir(self.path):
+            try:
+                days.append(datetime.strptime(entry.name, _DAY_FORMAT).date())
+            except ValueError:
+                continue
+        return sorted(days)
+
+    def _scan(self, start, end, prefix):
+        first = _utc(start).date() if start is not None else date.min
+        last = (_utc(end) - timedelta(seconds=1)).date() if end is not None else date.max
+        low = np.datetime64(int(_utc(start).timestamp()), "s") if start is not None else None
+        high = np.datetime64(int(_utc(end).timestamp()), "s") if end is not None else None
+        for day in self.days():
+            if day < first or day > last:
+                continue
+            directory = os.path.join(self.path, day.strftime(_DAY_FORMAT))
+            names = sorted(entry.name for entry in os.scandir(directory)
+                           if entry.name.startswith(prefix) and entry.name.endswith(_EXTENSION))
+            for name in names:
+                station, records = _read(os.path.join(directory, name))
+                if len(records) == 0:
+                    continue
+                # Only the boundary days need their reception times compared
+                if low is not None and day == first:
+                    records = records[records["reception_time"] >= low]
+                if high is not None and day == last:
+                    records = records[records["reception_time"] < high]
+                if len(records):
+                    yield station, records
+
+    def _partition_path(self, day, station_code):
+        if not _STATION_CODE.fullmatch(station_code):
+            raise ValueError("Invalid station code '%s'" % (station_code, ))
+        return os.path.join(self.path, day.strftime(_DAY_FORMAT), station_code + _EXTENSION)
+
+    def _write(self, path, observations):
+        records = np.zeros(len(observations), dtype=RECORD)
+        records["reception_time"] = [int(o.reception_time.timestamp()) for o in observations]
+        records["condition"] = [_condition_bytes(o.weather.condition) for o in observations]
+        for name in FLOAT_COLUMNS:
+            # None values become NaN
+            records[name] = np.array([getattr(o.weather, name) for o in observations], dtype="float64")
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            with open(path, "xb") as f:
+                f.write(_header(observations[0].station))
+        except FileExistsError:
+            pass
+        with open(path, "ab") as f:
+            f.write(records.tobytes())
+
+
+def _header(station):
+    header = json.dumps({"version": _FORMAT_VERSION, "name": station.name, "code": station.code,
+                         "url": station.url, "latitude": station.latitude, "longitude": station.longitude},
+                        separators=(",", ":")).encode("utf-8")
+    size = len(_MAGIC) + _HEADER_LENGTH.size + len(header)
+    header += b" " * (-size % 8)
+    return _MAGIC + _HEADER_LENGTH.pack(len(header)) + header
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        prefix = f.read(len(_MAGIC) + _HEADER_LENGTH.size)
+        if len(prefix) < len(_MAGIC) + _HEADER_LENGTH.size or prefix[:len(_MAGIC)] != _MAGIC:
+            raise ValueError("Invalid archive partition '%s'" % (path, ))
+        length, = _HEADER_LENGTH.unpack(prefix[len(_MAGIC):])
+        header = json.loads(f.read(length))
+        if header.get("version") != _FORMAT_VERSION:
+            raise ValueError("Unsupported archive partition version '%s'" % (path, ))
+        offset = len(prefix) + length
+        # A record cut short by an interrupted append is ignored
+        count = (os.fstat(f.fileno()).st_size - offset) // RECORD.itemsize
+    station = Station(header["name"], header["code"], header["url"], header["latitude"], header["longitude"])
+    if count == 0:
+        return station, np.zeros(0, dtype=RECORD)
+    return station, np.memmap(path, dtype=RECORD, mode="r", offset=offset, shape=(count, ))
+
+
+def _utc(value):
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _condition_bytes(condition):
+    if isinstance(condition, Condition):
+        condition = condition.value
+    return (condition or "").encode("utf-8")[:_CONDITION_SIZE]
+
+
+def _condition(value):
+    if not value:
+        return None
+    condition = value.decode("utf-8", "replace")
+    try:
+        return Condition(condition)
+    except ValueError:
+        return condition
@@ -0,0 +1,177 @@
+import asyncio
+import time
+
+from meteoclimatic import Observation
+from meteoclimatic.client import (BASE_URL, BatchResult, _connection_errors, _group_station_codes, _observations_from_items,
+                                  _open_url, _select_observations)
+from meteoclimatic.exceptions import MeteoclimaticError, StationNotFound
+from meteoclimatic.parser import PARSER_ENGINES, iter_feed_items
+from meteoclimatic.singleflight import AsyncSingleFlight
+from meteoclimatic.transport import PooledTransport
+
+
+class ThreadedAsyncTransport(object):
+    """
+    Default transport of *AsyncMeteoclimaticClient*, running the requests of a
+    blocking transport in an executor so they do not block the event loop.
+
+    Any object providing an awaitable `fetch(url)` method returning the body
+    of the response as `bytes`, and raising *MeteoclimaticError* on HTTP
+    errors, can be used as a transport instead (e.g. one based on aiohttp).
+
+    :param transport: blocking transport, a new *PooledTransport* if None
+    :type transport: *meteoclimatic.transport.PooledTransport* or compatible object
+    :param executor: executor running the requests, the loop default if None
+    :type executor: `concurrent.futures.Executor`
+    """
+
+    def __init__(self, transport=None, executor=None):
+        """Initialize the class."""
+        self._transport = transport if transport is not None else PooledTransport()
+        self._executor = executor
+
+    async def fetch(self, url):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._fetch, url)
+
+    def _fetch(self, url):
+        response = _open_url(self._transport, url)
+        try:
+            with _connection_errors(url):
+                return response.read()
+        finally:
+            response.close()
+
+
+class AsyncMeteoclimaticClient(object):
+    """
+    Asyncio flavour of *MeteoclimaticClient*. Feeds are downloaded through a
+    pluggable async transport and parsed in an executor, off the event loop.
+    Concurrent lookups of the same feed share a single download and parse.
+
+    :param parser: name of the feed parser engine, "lxml" (streaming, default),
+        "raw" (fast scan of the raw feed bytes) or "bs4" (BeautifulSoup)
+    :type parser: `str`
+    :param transport: async transport used to download the feeds
+    :type transport: *ThreadedAsyncTransport* or compatible object
+    :param base_url: URL template of the feeds, with a `{station_code}` field
+    :type base_url: `str`
+    :param executor: executor parsing the feeds, the loop default if None
+    :type executor: `concurrent.futures.Executor`
+    :param lazy: whether the observations of regional feeds are
+        *LazyObservation* instances decoding their fields on first access, see
+        *MeteoclimaticClient*
+    :type lazy: `bool`
+    :raises: *ValueError* when the parser engine is unknown
+    """
+
+    def __init__(self, parser="lxml", transport=None, base_url=BASE_URL, executor=None, lazy=False):
+        """Initialize the class."""
+        if parser not in PARSER_ENGINES:
+            raise ValueError("Unknown parser engine '%s'" % (parser, ))
+        self._parser = parser
+        self._transport = transport if transport is not None else ThreadedAsyncTransport()
+        self._base_url = base_url
+        self._executor = executor
+        self._lazy = lazy
+        self._flights = AsyncSingleFlight()
+
+    async def weather_at_station(self, station_code):
+        """
+        Returns the current observation of a station.
+
+        :param station_code: code of the station
+        :type station_code: `str`
+        :returns: an *Observation* instance
+        :raises: *StationNotFound* when the feed does not contain the station
+        """
+        observation = await self._fetch_and_parse(station_code, self._parse_first_observation)
+
+        if observation is None:
+            raise StationNotFound(station_code)
+
+        return observation
+
+    async def weather_at_region(self, prefix):
+        """
+        Returns the observations of every station published in a regional feed.
+
+        :param prefix: code prefix of the region (e.g. "ESCAT43")
+        :type prefix: `str`
+        :returns: a `dict` of *Observation* instances keyed by station code
+        :raises: *StationNotFound* when the feed does not contain any station
+        """
+        observations = await self._fetch_and_parse(prefix, self._parse_observations)
+
+        if len(observations) == 0:
+            raise StationNotFound(prefix)
+
+        return observations
+
+    async def gather_stations(self, station_codes, concurrency=10):
+        """
+        Returns the observations of several stations, downloading each regional
+        feed only once and at most *concurrency* feeds at the same time.
+
+        A failing feed does not abort the batch: the error is recorded for each
+        of its stations in the `errors` attribute of the result, as done by
+        *MeteoclimaticClient.weather_at_stations*.
+
+        :param station_codes: codes of the stations
+        :type station_codes: iterable of `str`
+        :param concurrency: maximum number of feeds downloaded concurrently
+        :type concurrency: `int`
+        :returns: a *BatchResult* of *Observation* instances keyed by station
+            code, in the same order as *station_codes*
+        :raises: *ValueError* when concurrency is not a positive number
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be greater than 0")
+        station_codes = list(dict.fromkeys(station_codes))
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch_group(feed_code, codes):
+            result = BatchResult()
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    result.update(_select_observations(
+                        await self._fetch_and_parse(feed_code, self._parse_observations), codes))
+                except MeteoclimaticError as exc:
+                    result.errors.update((code, exc) for code in codes)
+                elapsed = time.perf_counter() - start
+            for code in codes:
+                if code not in result and code not in result.errors:
+                    result.errors[code] = StationNotFound(code)
+                result.timings[code] = elapsed
+            return result
+
+        merged = BatchResult()
+        for group_result in await asyncio.gather(
+                *[fetch_group(feed_code, codes) for feed_code, codes in _group_station_codes(station_codes).items()]):
+            merged.update(group_result)
+            merged.errors.update(group_result.errors)
+            merged.timings.update(group_result.timings)
+
+        result = BatchResult((code, merged[code]) for code in station_codes if code in merged)
+        result.errors = {code: merged.errors[code] for code in station_codes if code in merged.errors}
+        result.timings = {code: merged.timings[code] for code in station_codes}
+        return result
+
+    async def _fetch_and_parse(self, feed_code, parse):
+        url = self._base_url.format(station_code=feed_code)
+        return await self._flights.do((url, parse.__name__), self._fetch_and_parse_url, url, parse)
+
+    async def _fetch_and_parse_url(self, url, parse):
+        xml_page = await self._transport.fetch(url)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, parse, xml_page)
+
+    def _parse_first_observation(self, xml_page):
+        item = next(iter_feed_items(xml_page, self._parser), None)
+        if item is None:
+            return None
+        return Observation.from_feed_item(item)
+
+    def _parse_observations(self, xml_page):
+        return _observations_from_items(iter_feed_items(xml_page, self._parser), self._lazy)
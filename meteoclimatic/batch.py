@@ -0,0 +1,258 @@
+import logging
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+from meteoclimatic.feed import FeedItemHelper, parse_rfc822_date
+from meteoclimatic.parser import iter_feed_items
+from meteoclimatic.weather import RANGES, Condition
+
+# Conditions are stored as their index in this tuple, -1 when not provided or unrecognized
+CONDITIONS = tuple(Condition)
+_CONDITION_CODES = {condition.value: code for code, condition in enumerate(CONDITIONS)}
+_NO_CONDITION = -1
+
+FLOAT_COLUMNS = ("temp_current", "temp_max", "temp_min",
+                 "humidity_current", "humidity_max", "humidity_min",
+                 "pressure_current", "pressure_max", "pressure_min",
+                 "wind_current", "wind_max", "wind_bearing",
+                 "rain")
+
+COLUMNS = ("station_code", "station_name", "reception_time", "condition") + FLOAT_COLUMNS
+
+
+class ObservationBatch(object):
+    """
+    Columnar container of the observations of many stations, backed by NumPy
+    arrays. Weather values are `float64` columns holding NaN when the station
+    does not provide them, conditions are `int8` indexes of *CONDITIONS* (-1
+    when not provided) and reception times are UTC `datetime64[s]` values.
+
+    Indexing a batch with a column name returns the column array, and indexing
+    it with a boolean mask, an index array or a slice returns a new batch with
+    the selected rows.
+
+    :param columns: arrays of the batch keyed by name, one for each of *COLUMNS*
+    :type columns: `dict`
+    :returns: an *ObservationBatch* instance
+    :raises: *ImportError* when NumPy is not installed, *ValueError* when the
+        columns are missing or do not have the same length
+    """
+
+    def __init__(self, columns):
+        """Initialize the class."""
+        if np is None:
+            raise ImportError("ObservationBatch requires NumPy, install it with 'pip install numpy'")
+        missing = [name for name in COLUMNS if name not in columns]
+        if missing:
+            raise ValueError("Missing batch columns: %s" % (", ".join(missing), ))
+        self.columns = {name: np.asarray(columns[name]) for name in COLUMNS}
+        if len(set(len(column) for column in self.columns.values())) > 1:
+            raise ValueError("Batch columns must have the same length")
+
+    @classmethod
+    def from_feed_items(cls, feed_items):
+        """
+        Builds a batch out of RSS feed items, decoding their data blocks
+        straight into the columns without creating *Observation* instances.
+        Items that cannot be parsed or hold out-of-range values are skipped, as
+        they are by *MeteoclimaticClient*.
+        :param feed_items: the input RSS feed items
+        :type feed_items: iterable of `meteoclimatic.feed.FeedItem`
+        :returns: an *ObservationBatch* instance
+        """
+        rows = {name: [] for name in COLUMNS}
+        for item in feed_items:
+            try:
+                record = FeedItemHelper(item).decode()
+                reception_time = parse_rfc822_date(item.pub_date)
+            except ValueError as exc:
+                logging.warning("Skipping unparseable feed item: %s" % (exc, ))
+                continue
+            rows["station_code"].append(record.station_code)
+            rows["station_name"].append(item.title)
+            rows["reception_time"].append(int(reception_time.timestamp()))
+            rows["condition"].append(_CONDITION_CODES.get(record.condition, _NO_CONDITION))
+            for name in FLOAT_COLUMNS:
+                rows[name].append(getattr(record, name))
+
+        batch = cls._from_rows(rows)
+        valid = batch._valid_rows()
+        if not valid.all():
+            logging.warning("Skipping %d feed items with out of range values" % (len(valid) - valid.sum(), ))
+            batch = batch[valid]
+        return batch
+
+    @classmethod
+    def from_feed(cls, source, engine="lxml"):
+        """
+        Builds a batch out of a station or regional feed document.
+        :param source: the feed document
+        :type source: `bytes`, `str` or file-like object
+        :param engine: name of the parser engine, see *iter_feed_items*
+        :type engine: `str`
+        :returns: an *ObservationBatch* instance
+        """
+        return cls.from_feed_items(iter_feed_items(source, engine))
+
+    @classmethod
+    def from_observations(cls, observations):
+        """
+        Builds a batch out of *Observation* instances.
+        :param observations: the observations
+        :type observations: iterable of *Observation*
+        :returns: an *ObservationBatch* instance
+        """
+        rows = {name: [] for name in COLUMNS}
+        for observation in observations:
+            rows["station_code"].append(observation.station.code)
+            rows["station_name"].append(observation.station.name)
+            rows["reception_time"].append(int(observation.reception_time.timestamp()))
+            condition = observation.weather.condition
+            if isinstance(condition, Condition):
+                condition = condition.value
+            rows["condition"].append(_CONDITION_CODES.get(condition, _NO_CONDITION))
+            for name in FLOAT_COLUMNS:
+                rows[name].append(getattr(observation.weather, name))
+        return cls._from_rows(rows)
+
+    @classmethod
+    def concatenate(cls, batches):
+        """
+        Joins several batches into one, keeping the order of their rows.
+        :param batches: the batches
+        :type batches: iterable of *ObservationBatch*
+        :returns: an *ObservationBatch* instance
+        """
+        batches = list(batches)
+        if not batches:
+            return cls._from_rows({name: [] for name in COLUMNS})
+        return cls({name: np.concatenate([batch.columns[name] for batch in batches]) for name in COLUMNS})
+
+    @classmethod
+    def _from_rows(cls, rows):
+        columns = {
+            "station_code": np.array(rows["station_code"], dtype=str),
+            "station_name": np.array(rows["station_name"], dtype=str),
+            "reception_time": np.array(rows["reception_time"], dtype="int64").astype("datetime64[s]"),
+            "condition": np.array(rows["condition"], dtype="int8"),
+        }
+        for name in FLOAT_COLUMNS:
+            # None values become NaN
+            columns[name] = np.array(rows[name], dtype="float64")
+        return cls(columns)
+
+    def _valid_rows(self):
+        # Same ranges as the ones validated by Weather, NaN comparisons are False
+        invalid = np.zeros(len(self), dtype=bool)
+        for name, (minimum, maximum, _) in RANGES.items():
+            invalid |= (self.columns[name] < minimum) | (self.columns[name] > maximum)
+        return ~invalid
+
+    def filter(self, mask):
+        """
+        Selects the rows of the batch.
+        :param mask: boolean mask, index array or slice of the rows to keep
+        :type mask: `numpy.ndarray` or `slice`
+        :returns: a new *ObservationBatch* instance
+        """
+        return ObservationBatch({name: column[mask] for name, column in self.columns.items()})
+
+    def conditions(self):
+        """
+        Returns the conditions of the batch.
+        :returns: a `list` of *Condition* members, None when not provided
+        """
+        return [CONDITIONS[code] if code != _NO_CONDITION else None for code in self.columns["condition"].tolist()]
+
+    def min(self, column):
+        """
+        Returns the minimum of a weather column, ignoring missing values.
+        :param column: name of one of *FLOAT_COLUMNS*
+        :type column: `str`
+        :returns: a `float`, NaN when every value is missing
+        """
+        return self._reduce(np.nanmin, column)
+
+    def max(self, column):
+        """
+        Returns the maximum of a weather column, ignoring missing values.
+        :param column: name of one of *FLOAT_COLUMNS*
+        :type column: `str`
+        :returns: a `float`, NaN when every value is missing
+        """
+        return self._reduce(np.nanmax, column)
+
+    def mean(self, column):
+        """
+        Returns the mean of a weather column, ignoring missing values.
+        :param column: name of one of *FLOAT_COLUMNS*
+        :type column: `str`
+        :returns: a `float`, NaN when every value is missing
+        """
+        return self._reduce(np.nanmean, column)
+
+    def _reduce(self, function, column):
+        if column not in FLOAT_COLUMNS:
+            raise ValueError("Unknown weather column '%s'" % (column, ))
+        values = self.columns[column]
+        if np.isnan(values).all():
+            return float("nan")
+        return float(function(values))
+
+    def to_pandas(self):
+        """
+        Converts the batch to a pandas DataFrame. Conditions become a
+        categorical column and reception times are timezone-aware.
+        :returns: a `pandas.DataFrame` instance
+        :raises: *ImportError* when pandas is not installed
+        """
+        import pandas as pd
+
+        data = dict(self.columns)
+        data["reception_time"] = pd.DatetimeIndex(self.columns["reception_time"], tz="UTC")
+        data["condition"] = pd.Categorical.from_codes(
+            self.columns["condition"], categories=[condition.value for condition in CONDITIONS])
+        return pd.DataFrame(data, columns=COLUMNS)
+
+    def to_arrow(self):
+        """
+        Converts the batch to an Arrow table. Conditions become a dictionary
+        column and missing weather values become nulls.
+        :returns: a `pyarrow.Table` instance
+        :raises: *ImportError* when pyarrow is not installed
+        """
+        import pyarrow as pa
+
+        codes = self.columns["condition"]
+        arrays = [
+            pa.array(self.columns["station_code"]),
+            pa.array(self.columns["station_name"]),
+            pa.array(self.columns["reception_time"], type=pa.timestamp("s", tz="UTC")),
+            pa.DictionaryArray.from_arrays(pa.array(codes, mask=codes == _NO_CONDITION),
+                                           [condition.value for condition in CONDITIONS]),
+        ]
+        arrays.extend(pa.array(self.columns[name], from_pandas=True) for name in FLOAT_COLUMNS)
+        return pa.Table.from_arrays(arrays, names=list(COLUMNS))
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.columns[key]
+        return self.filter(key)
+
+    def __len__(self):
+        return len(self.columns["station_code"])
+
+    def __eq__(self, other):
+        if not isinstance(other, ObservationBatch):
+            return NotImplemented
+        for name in COLUMNS:
+            if not np.array_equal(self.columns[name], other.columns[name],
+                                  equal_nan=self.columns[name].dtype.kind == "f"):
+                return False
+        return True
+
+    def __repr__(self):
+        return "%s(%d observations)" % (self.__class__, len(self))
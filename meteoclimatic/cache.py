@@ -0,0 +1,210 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+
+
+class ObservationCache(object):
+    """
+    In-process cache of *Observation* instances keyed by station code. Entries
+    expire after the `<ttl>` advertised by their feed or, when the feed does not
+    provide it, *default_ttl* seconds after the publication date of the
+    observation. When *max_size* entries are stored, the least recently used
+    one is evicted.
+
+    :param max_size: maximum number of observations kept in the cache
+    :type max_size: `int`
+    :param default_ttl: seconds an observation is valid after its publication
+        date when its feed does not provide a ttl
+    :type default_ttl: `float`
+    :param clock: function returning the current time in seconds since the epoch
+    :type clock: callable
+    :returns: an *ObservationCache* instance
+    :raises: *ValueError* when *max_size* is not a positive number
+    """
+
+    def __init__(self, max_size=1024, default_ttl=600, clock=time.time):
+        """Initialize the class."""
+        if max_size < 1:
+            raise ValueError("max_size must be greater than 0")
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, station_code):
+        """
+        Returns the cached observation of a station.
+        :param station_code: code of the station
+        :type station_code: `str`
+        :returns: an *Observation* instance, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(station_code)
+            if entry is not None and entry[1] <= self._clock():
+                del self._entries[station_code]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(station_code)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, observation, ttl=None):
+        """
+        Stores the observation of a station.
+        :param observation: the observation to cache
+        :type observation: *Observation*
+        :param ttl: minutes the observation can be cached, as advertised by the
+            `<ttl>` element of its feed
+        :type ttl: `int`
+        """
+        if ttl is not None:
+            expires = self._clock() + ttl * 60
+        else:
+            expires = observation.reception_time.timestamp() + self.default_ttl
+        with self._lock:
+            self._entries[observation.station.code] = (observation, expires)
+            self._entries.move_to_end(observation.station.code)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Removes every observation from the cache."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteFeedCache(object):
+    """
+    On-disk cache of raw feed documents keyed by URL, backed by an SQLite
+    database, so it can be shared by every process of a host. Writes are atomic
+    transactions and entries expire *ttl* seconds after being stored.
+
+    Processes fetching the same feed coordinate through a lease stored in the
+    database: only one of them downloads an expired feed while the others wait
+    for it to be stored, so N workers trigger a single request per feed.
+
+    :param path: path of the SQLite database file, created if missing
+    :type path: `str`
+    :param ttl: seconds a feed document is valid after being stored
+    :type ttl: `float`
+    :param lease_timeout: seconds after which the lease of a download is
+        considered abandoned and another process can take it over
+    :type lease_timeout: `float`
+    :param poll_interval: seconds between checks while waiting for a lease
+    :type poll_interval: `float`
+    :param clock: function returning the current time in seconds since the epoch
+    :type clock: callable
+    :returns: a *SQLiteFeedCache* instance
+    """
+
+    def __init__(self, path, ttl=60, lease_timeout=30, poll_interval=0.05, clock=time.time):
+        """Initialize the class."""
+        self.path = path
+        self.ttl = ttl
+        self.lease_timeout = lease_timeout
+        self.poll_interval = poll_interval
+        self._clock = clock
+        self._local = threading.local()
+        # No connection is kept open, so that processes forked afterwards do not inherit it
+        with closing(self._connect()) as connection, connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS feeds "
+                               "(url TEXT PRIMARY KEY, body BLOB NOT NULL, expires REAL NOT NULL)")
+            connection.execute("CREATE TABLE IF NOT EXISTS leases (url TEXT PRIMARY KEY, expires REAL NOT NULL)")
+
+    def get(self, url):
+        """
+        Returns the cached document of a feed.
+        :param url: URL of the feed
+        :type url: `str`
+        :returns: the `bytes` of the document, or None if missing or expired
+        """
+        row = self._connection().execute(
+            "SELECT body FROM feeds WHERE url = ? AND expires > ?", (url, self._clock())).fetchone()
+        if row is None:
+            return None
+        return bytes(row[0])
+
+    def put(self, url, body, ttl=None):
+        """
+        Stores the document of a feed.
+        :param url: URL of the feed
+        :type url: `str`
+        :param body: the document of the feed
+        :type body: `bytes`
+        :param ttl: seconds the document is valid, the cache ttl if None
+        :type ttl: `float`
+        """
+        expires = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._connection() as connection:
+            connection.execute("INSERT OR REPLACE INTO feeds (url, body, expires) VALUES (?, ?, ?)",
+                               (url, sqlite3.Binary(body), expires))
+
+    def get_or_fetch(self, url, fetch):
+        """
+        Returns the cached document of a feed, calling *fetch* to download and
+        store it when missing or expired. When another process is already
+        downloading the feed, waits for its document instead.
+        :param url: URL of the feed
+        :type url: `str`
+        :param fetch: function returning the `bytes` of the document
+        :type fetch: callable
+        :returns: the `bytes` of the document
+        """
+        while True:
+            body = self.get(url)
+            if body is not None:
+                return body
+            if self._acquire_lease(url):
+                try:
+                    body = fetch()
+                    self.put(url, body)
+                    return body
+                finally:
+                    self._release_lease(url)
+            time.sleep(self.poll_interval)
+
+    def purge(self):
+        """Removes every expired document from the cache."""
+        now = self._clock()
+        with self._connection() as connection:
+            connection.execute("DELETE FROM feeds WHERE expires <= ?", (now, ))
+            connection.execute("DELETE FROM leases WHERE expires <= ?", (now, ))
+
+    def _acquire_lease(self, url):
+        now = self._clock()
+        with self._connection() as connection:
+            cursor = connection.execute(
+                "INSERT INTO leases (url, expires) VALUES (?, ?) "
+                "ON CONFLICT (url) DO UPDATE SET expires = excluded.expires WHERE leases.expires <= ?",
+                (url, now + self.lease_timeout, now))
+            return cursor.rowcount == 1
+
+    def _release_lease(self, url):
+        with self._connection() as connection:
+            connection.execute("DELETE FROM leases WHERE url = ?", (url, ))
+
+    def _connection(self):
+        # SQLite connections cannot be shared between threads, nor with a forked process
+        pid = os.getpid()
+        if getattr(self._local, "pid", None) != pid:
+            self._local.connection = self._connect()
+            self._local.pid = pid
+        return self._local.connection
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=self.lease_timeout)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
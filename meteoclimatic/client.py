@@ -1,34 +1,581 @@
-from urllib.request import urlopen
-from urllib.error import HTTPError
-from bs4 import BeautifulSoup
+import logging
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.client import HTTPException
 
-from meteoclimatic.exceptions import MeteoclimaticError, StationNotFound
+from meteoclimatic.exceptions import MeteoclimaticError, ServiceUnavailable, StationNotFound
 from meteoclimatic import Observation
+from meteoclimatic.observation import LazyObservation
+from meteoclimatic.batch import ObservationBatch
+from meteoclimatic.feed import FeedChannel, FeedItemHelper
+from meteoclimatic.instrumentation import FeedMetrics
+from meteoclimatic.parser import PARSER_ENGINES, iter_feed_items
+from meteoclimatic.singleflight import SingleFlight
+from meteoclimatic.spatial import StationIndex
+from meteoclimatic.tracker import ObservationTracker
+from meteoclimatic.transport import PooledTransport
+
+
+BASE_URL = "https://www.meteoclimatic.net/feed/rss/{station_code}"
+
+# Station codes are hierarchical (e.g. "ESCAT43" + "00000043206B"), the first
+# characters identify the country, region and province feed of the station
+_REGION_PREFIX_LENGTH = 7
+
+# Validators of the last response of a feed URL and the observations parsed out of it
+_RevalidatedFeed = namedtuple("_RevalidatedFeed", ["etag", "last_modified", "observations", "ttl"])
+
+
+class BatchResult(dict):
+    """
+    Observations of a batch of stations keyed by station code.
+
+    :ivar errors: exception raised for each station that could not be fetched
+    :vartype errors: `dict`
+    :ivar timings: seconds spent fetching and parsing the feed of each station
+    :vartype timings: `dict`
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the class."""
+        super().__init__(*args, **kwargs)
+        self.errors = {}
+        self.timings = {}
 
 
 class MeteoclimaticClient(object):
     """
     Entry point class providing clients for the Meteoclimatic service.
+
+    The client remembers the `ETag` and `Last-Modified` headers of every feed
+    and revalidates them on later requests. When the service answers with
+    `304 Not Modified`, the previously parsed observations are returned.
+    Concurrent lookups of the same feed share a single download and parse.
+
+    When a cache is given, every fetched observation is stored in it and
+    station lookups are answered from the cache until the observation expires.
+    When a feed cache is given, feed documents are read from it and only
+    downloaded when missing or expired, so several processes can share them.
+
+    Every station with coordinates seen in a feed is added to a spatial index,
+    which answers *stations_near* and *nearest_station* queries. When a
+    directory is given, every station seen is also added to it, and batches of
+    stations are fetched with the feeds planned by the directory.
+
+    When an instrumentation is given, the *FeedMetrics* of every feed lookup,
+    with the time spent in each phase, the bytes received and the number of
+    items, are handed to its `record` method.
+
+    :param parser: name of the feed parser engine, "lxml" (streaming, default),
+        "raw" (fast scan of the raw feed bytes) or "bs4" (BeautifulSoup)
+    :type parser: `str`
+    :param base_url: URL template of the feeds, with a `{station_code}` field
+    :type base_url: `str`
+    :param transport: transport used to download the feeds, a new
+        *PooledTransport* keeping connections alive if None
+    :type transport: *meteoclimatic.transport.PooledTransport* or compatible object
+    :param cache: cache of the observations, no caching if None
+    :type cache: *meteoclimatic.cache.ObservationCache*
+    :param feed_cache: cache of the feed documents, no caching if None
+    :type feed_cache: *meteoclimatic.cache.SQLiteFeedCache*
+    :param directory: directory collecting the stations seen in the feeds
+    :type directory: *meteoclimatic.directory.StationDirectory*
+    :param tracker: tracker of the observations emitted by *poll_changes*, a
+        new one if None
+    :type tracker: *meteoclimatic.tracker.ObservationTracker*
+    :param instrumentation: recorder of the metrics of the feed lookups, no
+        metrics if None
+    :type instrumentation: *meteoclimatic.instrumentation.MetricsCollector* or compatible object
+    :param lazy: whether the observations of regional feeds are
+        *LazyObservation* instances decoding their fields on first access.
+        Their stations and reception times are still decoded right away, but
+        items with out-of-range weather values are not skipped, the
+        *ValueError* is raised when the value is accessed instead
+    :type lazy: `bool`
+    :raises: *ValueError* when the parser engine is unknown
     """
 
-    _base_url = "https://www.meteoclimatic.net/feed/rss/{station_code}"
+    def __init__(self, parser="lxml", base_url=BASE_URL, transport=None, cache=None, feed_cache=None,
+                 directory=None, tracker=None, instrumentation=None, lazy=False):
+        if parser not in PARSER_ENGINES:
+            raise ValueError("Unknown parser engine '%s'" % (parser, ))
+        self._parser = parser
+        self._base_url = base_url
+        self._transport = transport if transport is not None else PooledTransport()
+        self._cache = cache
+        self._feed_cache = feed_cache
+        self._directory = directory
+        self._instrumentation = instrumentation
+        self._lazy = lazy
+        self._revalidated_feeds = {}
+        self._revalidated_feeds_lock = threading.Lock()
+        self._feed_ttls = {}
+        self._flights = SingleFlight()
+        self.station_index = StationIndex()
+        self.tracker = tracker if tracker is not None else ObservationTracker()
 
-    def weather_at_station(self, station_code):
-        url = self._base_url.format(station_code=station_code)
+    def weather_at_station(self, station_code, refresh=False):
+        """
+        Returns the current observation of a station.
 
-        try:
-            parse_xml_url = urlopen(url)
-        except HTTPError as exc:
-            raise MeteoclimaticError("Error fetching station data [status_code=%d]" %
-                  (exc.getcode(), )) from exc
+        :param station_code: code of the station
+        :type station_code: `str`
+        :param refresh: whether to bypass the cache and fetch the station
+        :type refresh: `bool`
+        :returns: an *Observation* instance
+        :raises: *StationNotFound* when the feed does not contain any station
+        """
+        if self._cache is not None and not refresh:
+            observation = self._cache.get(station_code)
+            if observation is not None:
+                return observation
 
-        xml_page = parse_xml_url.read()
-        parse_xml_url.close()
-        soup_page = BeautifulSoup(xml_page, "xml")
-        items = soup_page.findAll("item")
+        observations = self._fetch_observations(station_code, strict=True)
 
-        if len(items) == 0:
+        if len(observations) == 0:
             raise StationNotFound(station_code)
 
-        observation = Observation.from_feed_item(items[0])
+        observation = observations[0]
         return observation
+
+    def weather_at_region(self, prefix):
+        """
+        Returns the observations of every station published in a regional feed.
+
+        :param prefix: code prefix of the region (e.g. "ESCAT43")
+        :type prefix: `str`
+        :returns: a `dict` of *Observation* instances keyed by station code
+        :raises: *StationNotFound* when the feed does not contain any station
+        """
+        observations = _observations_by_code(self._fetch_observations(prefix))
+
+        if len(observations) == 0:
+            raise StationNotFound(prefix)
+
+        return observations
+
+    def weather_at_stations(self, station_codes, max_workers=None, refresh=False):
+        """
+        Returns the observations of several stations, downloading each regional
+        feed only once. Codes sharing a region prefix are fetched together and
+        the feeds are downloaded concurrently in a thread pool.
+
+        A failing feed does not abort the batch: the error is recorded for each
+        of its stations in the `errors` attribute of the result.
+
+        :param station_codes: codes of the stations
+        :type station_codes: iterable of `str`
+        :param max_workers: maximum number of threads, see
+            `concurrent.futures.ThreadPoolExecutor`
+        :type max_workers: `int`
+        :param refresh: whether to bypass the cache and fetch every station
+        :type refresh: `bool`
+        :returns: a *BatchResult* of *Observation* instances keyed by station
+            code, in the same order as *station_codes*
+        """
+        station_codes = list(dict.fromkeys(station_codes))
+        merged = BatchResult()
+        if self._cache is not None and not refresh:
+            for code in station_codes:
+                observation = self._cache.get(code)
+                if observation is not None:
+                    merged[code] = observation
+                    merged.timings[code] = 0.0
+
+        pending = [code for code in station_codes if code not in merged]
+        if self._directory is not None:
+            groups = self._directory.plan_feeds(pending)
+        else:
+            groups = _group_station_codes(pending)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            group_results = list(executor.map(self._fetch_group, groups.keys(), groups.values()))
+
+        for group_result in group_results:
+            merged.update(group_result)
+            merged.errors.update(group_result.errors)
+            merged.timings.update(group_result.timings)
+
+        result = BatchResult((code, merged[code]) for code in station_codes if code in merged)
+        result.errors = {code: merged.errors[code] for code in station_codes if code in merged.errors}
+        result.timings = {code: merged.timings[code] for code in station_codes}
+        return result
+
+    def iter_observations(self, feed_code):
+        """
+        Yields the observations of a station or regional feed while the feed is
+        still being downloaded. With the default "lxml" parser the document is
+        parsed in chunks as they arrive and never held in memory as a whole.
+
+        :param feed_code: code of a station or code prefix of a region
+        :type feed_code: `str`
+        :returns: an iterator of *Observation* instances
+        :raises: *StationNotFound* when the feed does not contain any station
+        """
+        url = self._base_url.format(station_code=feed_code)
+        if self._feed_cache is not None:
+            observations = self._fetch_observations(feed_code)
+            yield from observations
+            if len(observations) == 0:
+                raise StationNotFound(feed_code)
+            return
+
+        revalidated = self._revalidated_feeds.get(url)
+        with self._metered(url) as metrics:
+            response = self._request(url, metrics, _conditional_headers(revalidated))
+            if response.status == 304 and revalidated is not None:
+                response.close()
+                observations = revalidated.observations
+                self._record_observations(url, observations, revalidated.ttl)
+                yield from observations
+            else:
+                observations, channel = [], FeedChannel()
+                try:
+                    with _connection_errors(url):
+                        items = iter_feed_items(response, self._parser, channel)
+                        for observation in _metered_observations(items, metrics, lazy=self._lazy):
+                            observations.append(observation)
+                            yield observation
+                finally:
+                    response.close()
+                    metrics.bytes = response.received
+                self._store_feed(url, response, observations, channel.ttl)
+
+        if len(observations) == 0:
+            raise StationNotFound(feed_code)
+
+    def poll_changes(self, feed_code):
+        """
+        Yields the observations of a station or regional feed that are new or
+        changed since the previous poll of the client tracker. Unchanged items
+        are not parsed, and nothing is parsed at all when the service answers
+        that the feed was not modified.
+
+        :param feed_code: code of a station or code prefix of a region
+        :type feed_code: `str`
+        :returns: an iterator of *Observation* instances
+        """
+        url = self._base_url.format(station_code=feed_code)
+        channel = FeedChannel()
+        if self._feed_cache is not None:
+            with self._metered(url) as metrics:
+                xml_page = self._feed_cache.get_or_fetch(url, lambda: self._download(url, metrics))
+                items = _metered_items(iter_feed_items(xml_page, self._parser, channel), metrics)
+                observations = list(_metered_changes(self.tracker, items, metrics))
+            self._record_observations(url, observations, channel.ttl)
+            yield from observations
+            return
+
+        with self._metered(url) as metrics:
+            response = self._request(url, metrics, _conditional_headers(self.tracker.get_validators(url)))
+            if response.status == 304:
+                response.close()
+                return
+            observations = []
+            try:
+                with _connection_errors(url):
+                    items = _metered_items(iter_feed_items(response, self._parser, channel), metrics)
+                    for observation in _metered_changes(self.tracker, items, metrics):
+                        observations.append(observation)
+                        yield observation
+            finally:
+                response.close()
+                metrics.bytes = response.received
+        self.tracker.set_validators(url, response.headers.get("etag"), response.headers.get("last-modified"))
+        self._record_observations(url, observations, channel.ttl)
+
+    def weather_batch_at_region(self, prefix):
+        """
+        Returns the observations of every station published in a regional feed
+        as an *ObservationBatch*, decoding the feed items straight into NumPy
+        columns without creating *Observation* instances. Requires NumPy.
+
+        :param prefix: code prefix of the region (e.g. "ESCAT43")
+        :type prefix: `str`
+        :returns: an *ObservationBatch* instance
+        :raises: *StationNotFound* when the feed does not contain any station
+        """
+        url = self._base_url.format(station_code=prefix)
+        with self._metered(url) as metrics:
+            if self._feed_cache is not None:
+                source = self._feed_cache.get_or_fetch(url, lambda: self._download(url, metrics))
+            else:
+                source = self._request(url, metrics)
+            start = time.perf_counter()
+            try:
+                # Items are decoded straight into columns, so decoding is part of the parse phase
+                with _connection_errors(url):
+                    batch = ObservationBatch.from_feed(source, self._parser)
+            finally:
+                if self._feed_cache is None:
+                    source.close()
+                    metrics.bytes = source.received
+            metrics.parse = time.perf_counter() - start
+            metrics.items = len(batch)
+
+        if len(batch) == 0:
+            raise StationNotFound(prefix)
+
+        return batch
+
+    def feed_ttl(self, feed_code):
+        """
+        Returns the number of minutes a feed can be cached, as advertised by the
+        `<ttl>` element of the last response of the feed.
+
+        :param feed_code: code of a station or code prefix of a region
+        :type feed_code: `str`
+        :returns: an `int`, or None if the feed was not fetched or has no ttl
+        """
+        return self._feed_ttls.get(self._base_url.format(station_code=feed_code))
+
+    def stations_near(self, latitude, longitude, radius_km):
+        """
+        Returns the stations seen in the fetched feeds within a distance of a
+        point. Fetch the regional feeds of the area first, e.g. with
+        *weather_at_region*, to index their stations.
+
+        :param latitude: latitude of the point in decimal degrees
+        :type latitude: `float`
+        :param longitude: longitude of the point in decimal degrees
+        :type longitude: `float`
+        :param radius_km: search radius in km
+        :type radius_km: `float`
+        :returns: a `list` of *meteoclimatic.spatial.NearbyStation* tuples sorted by distance
+        """
+        return self.station_index.near(latitude, longitude, radius_km)
+
+    def nearest_station(self, latitude, longitude, k=1):
+        """
+        Returns the stations seen in the fetched feeds closest to a point.
+
+        :param latitude: latitude of the point in decimal degrees
+        :type latitude: `float`
+        :param longitude: longitude of the point in decimal degrees
+        :type longitude: `float`
+        :param k: number of stations to return
+        :type k: `int`
+        :returns: a `list` of at most *k* *meteoclimatic.spatial.NearbyStation*
+            tuples sorted by distance
+        """
+        return self.station_index.nearest(latitude, longitude, k)
+
+    def _fetch_group(self, feed_code, station_codes):
+        result = BatchResult()
+        start = time.perf_counter()
+        try:
+            result.update(_select_observations(_observations_by_code(self._fetch_observations(feed_code)), station_codes))
+        except MeteoclimaticError as exc:
+            result.errors.update((code, exc) for code in station_codes)
+        elapsed = time.perf_counter() - start
+
+        for code in station_codes:
+            if code not in result and code not in result.errors:
+                result.errors[code] = StationNotFound(code)
+            result.timings[code] = elapsed
+        return result
+
+    def _fetch_observations(self, feed_code, strict=False):
+        url = self._base_url.format(station_code=feed_code)
+        return self._flights.do((url, strict), self._fetch_url_observations, url, strict)
+
+    def _fetch_url_observations(self, url, strict):
+        with self._metered(url) as metrics:
+            if self._feed_cache is not None:
+                xml_page = self._feed_cache.get_or_fetch(url, lambda: self._download(url, metrics))
+                observations, ttl = self._parse_observations(xml_page, strict, metrics)
+                self._record_observations(url, observations, ttl)
+                return observations
+
+            revalidated = self._revalidated_feeds.get(url)
+            parse_xml_url = self._request(url, metrics, _conditional_headers(revalidated))
+            xml_page = self._read(parse_xml_url, metrics)
+
+            if parse_xml_url.status == 304 and revalidated is not None:
+                self._record_observations(url, revalidated.observations, revalidated.ttl)
+                return revalidated.observations
+
+            observations, ttl = self._parse_observations(xml_page, strict, metrics)
+            self._store_feed(url, parse_xml_url, observations, ttl)
+            return observations
+
+    def _download(self, url, metrics):
+        return self._read(self._request(url, metrics), metrics)
+
+    def _request(self, url, metrics, headers=None):
+        start = time.perf_counter()
+        response = _open_url(self._transport, url, headers)
+        metrics.connect += time.perf_counter() - start
+        metrics.status = response.status
+        return response
+
+    def _read(self, response, metrics):
+        start = time.perf_counter()
+        try:
+            with _connection_errors(metrics.url):
+                return response.read()
+        finally:
+            response.close()
+            metrics.download += time.perf_counter() - start
+            metrics.bytes += response.received
+
+    @contextmanager
+    def _metered(self, url):
+        metrics = FeedMetrics(url)
+        try:
+            yield metrics
+        except Exception as exc:
+            metrics.error = exc
+            raise
+        finally:
+            if self._instrumentation is not None:
+                self._instrumentation.record(metrics)
+
+    def _parse_observations(self, xml_page, strict, metrics):
+        channel = FeedChannel()
+        items = iter_feed_items(xml_page, self._parser, channel)
+        observations = list(_metered_observations(items, metrics, strict, self._lazy))
+        return observations, channel.ttl
+
+    def _store_feed(self, url, response, observations, ttl):
+        etag, last_modified = response.headers.get("etag"), response.headers.get("last-modified")
+        with self._revalidated_feeds_lock:
+            if etag is None and last_modified is None:
+                self._revalidated_feeds.pop(url, None)
+            else:
+                self._revalidated_feeds[url] = _RevalidatedFeed(etag, last_modified, observations, ttl)
+        self._record_observations(url, observations, ttl)
+
+    def _record_observations(self, url, observations, ttl):
+        if ttl is not None:
+            self._feed_ttls[url] = ttl
+        self.station_index.update(observation.station for observation in observations)
+        if self._directory is not None:
+            self._directory.update(observation.station for observation in observations)
+        if self._cache is None:
+            return
+        for observation in observations:
+            self._cache.put(observation, ttl)
+
+
+def _open_url(transport, url, headers=None):
+    with _connection_errors(url):
+        response = transport.request(url, headers)
+        if response.status >= 400:
+            # Reading the error page lets the transport reuse the connection
+            response.read()
+            response.close()
+            raise MeteoclimaticError("Error fetching station data [status_code=%d]" %
+                                     (response.status, ))
+    return response
+
+
+@contextmanager
+def _connection_errors(url):
+    # Network failures are raised as the other errors of a lookup, so callers
+    # handling MeteoclimaticError do not have to know the transport exceptions
+    try:
+        yield
+    except (HTTPException, OSError) as exc:
+        raise ServiceUnavailable("Error connecting to %s: %s" % (url, exc)) from exc
+
+
+def _conditional_headers(revalidated):
+    headers = {}
+    if revalidated is not None and revalidated.etag is not None:
+        headers["If-None-Match"] = revalidated.etag
+    if revalidated is not None and revalidated.last_modified is not None:
+        headers["If-Modified-Since"] = revalidated.last_modified
+    return headers
+
+
+def _group_station_codes(station_codes):
+    groups = {}
+    for code in station_codes:
+        groups.setdefault(code[:_REGION_PREFIX_LENGTH], []).append(code)
+    # A lone station is cheaper to fetch from its own feed than from its region
+    return {(codes[0] if len(codes) == 1 else prefix): codes for prefix, codes in groups.items()}
+
+
+def _select_observations(observations, station_codes):
+    return {code: observations[code] for code in station_codes if code in observations}
+
+
+def _observations_from_items(items, lazy=False):
+    return _observations_by_code(_iter_observations(items, lazy))
+
+
+def _observations_by_code(observations):
+    return {observation.station.code: observation for observation in observations}
+
+
+def _metered_items(items, metrics):
+    # Feed items, adding the time spent parsing them to the metrics
+    items = iter(items)
+    while True:
+        start = time.perf_counter()
+        item = next(items, None)
+        metrics.parse += time.perf_counter() - start
+        if item is None:
+            return
+        metrics.items += 1
+        yield item
+
+
+def _metered_observations(items, metrics, strict=False, lazy=False):
+    # Station lookups are strict and always decode their single item, so
+    # invalid values are raised right away
+    for item in _metered_items(items, metrics):
+        start = time.perf_counter()
+        try:
+            helper = FeedItemHelper(item)
+            if lazy and not strict:
+                observation = _decoded_keys(LazyObservation(item, helper.match))
+                metrics.decode += time.perf_counter() - start
+            else:
+                record = helper.decode()
+                decoded = time.perf_counter()
+                metrics.decode += decoded - start
+                observation = Observation.from_feed_record(item, record)
+                metrics.build += time.perf_counter() - decoded
+        except ValueError as exc:
+            if strict:
+                raise
+            metrics.skipped += 1
+            logging.warning("Skipping unparseable feed item: %s" % (exc, ))
+            continue
+        yield observation
+
+
+def _decoded_keys(observation):
+    # The station and reception time of every observation are read by the
+    # clients to key, index and cache it, so a lazy observation failing to
+    # decode them is skipped as its eager counterpart would be
+    observation.station
+    observation.reception_time
+    return observation
+
+
+def _metered_changes(tracker, items, metrics):
+    # The tracker decodes and builds the observations of the changed items,
+    # which is all accounted as the build phase
+    changes = tracker.changes(items)
+    while True:
+        start = time.perf_counter()
+        parse = metrics.parse
+        observation = next(changes, None)
+        metrics.build += time.perf_counter() - start - (metrics.parse - parse)
+        if observation is None:
+            return
+        yield observation
+
+
+def _iter_observations(items, lazy=False):
+    for item in items:
+        try:
+            observation = Observation.from_feed_item(item, lazy)
+            yield _decoded_keys(observation) if lazy else observation
+        except ValueError as exc:
+            logging.warning("Skipping unparseable feed item: %s" % (exc, ))
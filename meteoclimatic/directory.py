@@ -0,0 +1,236 @@
+import gzip
+import json
+import threading
+import unicodedata
+
+from meteoclimatic.station import Station
+
+# Lengths of the country (e.g. "ES"), region ("ESCAT") and province ("ESCAT43")
+# prefixes of the station codes, each of them having its own feed
+FEED_PREFIX_LENGTHS = (2, 5, 7)
+
+_SNAPSHOT_VERSION = 1
+_STATION_URL = "http://www.meteoclimatic.net/perfil/{code}"
+
+
+class _TrieNode(object):
+    __slots__ = ("children", "station", "count")
+
+    def __init__(self):
+        self.children = {}
+        self.station = None
+        self.count = 0
+
+
+class StationDirectory(object):
+    """
+    Directory of the known Meteoclimatic stations. Stations are kept in a
+    prefix trie keyed by station code, so the stations under a country, region
+    or province prefix are found without scanning the whole directory, and in
+    an index of normalized names.
+
+    :param stations: initial stations of the directory
+    :type stations: iterable of *Station*
+    :returns: a *StationDirectory* instance
+    """
+
+    def __init__(self, stations=()):
+        """Initialize the class."""
+        self._root = _TrieNode()
+        self._names = {}
+        self._lock = threading.Lock()
+        self.update(stations)
+
+    def add(self, station):
+        """
+        Adds a station to the directory, replacing any station with the same code.
+        :param station: the station
+        :type station: *Station*
+        """
+        with self._lock:
+            path = [self._root]
+            for char in station.code:
+                path.append(path[-1].children.setdefault(char, _TrieNode()))
+            previous = path[-1].station
+            if previous is station:
+                return
+            if previous is None:
+                for node in path:
+                    node.count += 1
+            else:
+                self._names[_normalize_name(previous.name)].pop(previous.code, None)
+            path[-1].station = station
+            self._names.setdefault(_normalize_name(station.name), {})[station.code] = station
+
+    def update(self, stations):
+        """
+        Adds several stations to the directory.
+        :param stations: the stations
+        :type stations: iterable of *Station*
+        """
+        for station in stations:
+            self.add(station)
+
+    def get(self, station_code):
+        """
+        Returns a station of the directory.
+        :param station_code: code of the station
+        :type station_code: `str`
+        :returns: a *Station* instance, or None if unknown
+        """
+        with self._lock:
+            node = self._find(station_code)
+            return node.station if node is not None else None
+
+    def stations_with_prefix(self, prefix):
+        """
+        Returns the stations whose code starts with a prefix.
+        :param prefix: code prefix (e.g. "ESCAT43")
+        :type prefix: `str`
+        :returns: a `list` of *Station* instances sorted by code
+        """
+        with self._lock:
+            node = self._find(prefix)
+            if node is None:
+                return []
+            stations, pending = [], [node]
+            while pending:
+                node = pending.pop()
+                if node.station is not None:
+                    stations.append(node.station)
+                pending.extend(node.children[char] for char in sorted(node.children, reverse=True))
+            return stations
+
+    def count(self, prefix=""):
+        """
+        Returns the number of stations whose code starts with a prefix.
+        :param prefix: code prefix, every station if empty
+        :type prefix: `str`
+        :returns: an `int`
+        """
+        with self._lock:
+            node = self._find(prefix)
+            return node.count if node is not None else 0
+
+    def find_by_name(self, name):
+        """
+        Returns the stations with a name, ignoring case, accents and repeated
+        whitespace.
+        :param name: name of the station
+        :type name: `str`
+        :returns: a `list` of *Station* instances sorted by code
+        """
+        with self._lock:
+            stations = self._names.get(_normalize_name(name), {})
+            return [stations[code] for code in sorted(stations)]
+
+    def plan_feeds(self, station_codes, max_feed_size=None, prefix_lengths=(7, )):
+        """
+        Computes the fewest feeds whose stations cover a set of station codes.
+        Candidate feeds are the prefixes of the codes of the given lengths and
+        the feed of each station. A prefix feed is only used when it is known
+        to hold at most *max_feed_size* stations, and between plans with the
+        same number of feeds, the one downloading fewer stations is chosen.
+
+        :param station_codes: codes of the stations
+        :type station_codes: iterable of `str`
+        :param max_feed_size: maximum number of stations of a prefix feed, no
+            limit if None
+        :type max_feed_size: `int`
+        :param prefix_lengths: lengths of the candidate prefixes, see
+            *FEED_PREFIX_LENGTHS*
+        :type prefix_lengths: `tuple` of `int`
+        :returns: a `dict` with the codes covered by each feed keyed by feed code
+        """
+        station_codes = list(dict.fromkeys(station_codes))
+        lengths = sorted(set(prefix_lengths))
+        plan = {}
+        with self._lock:
+            for _, codes in _group_by_prefix(station_codes, lengths[0] if lengths else None).items():
+                plan.update(self._plan(codes, lengths, max_feed_size)[2])
+        return plan
+
+    def _plan(self, codes, lengths, max_feed_size):
+        # Returns the (number of feeds, number of stations, plan) covering the codes,
+        # which all share the prefix of length lengths[0]
+        if not lengths:
+            return len(codes), len(codes), {code: [code] for code in codes}
+
+        split_feeds, split_stations, split_plan = 0, 0, {}
+        for _, group in _group_by_prefix(codes, lengths[1] if len(lengths) > 1 else None).items():
+            feeds, stations, plan = self._plan(group, lengths[1:], max_feed_size)
+            split_feeds, split_stations = split_feeds + feeds, split_stations + stations
+            split_plan.update(plan)
+        split = (split_feeds, split_stations, split_plan)
+
+        prefix = codes[0][:lengths[0]]
+        if len(prefix) < lengths[0] or any(len(code) <= lengths[0] for code in codes):
+            # The codes are not longer than the prefix, so it is not a regional feed
+            return split
+        node = self._find(prefix)
+        size = (node.count if node is not None else 0) + sum(1 for code in codes if self._find_station(code) is None)
+        if (max_feed_size is None or size <= max_feed_size) and (1, size) < split[:2]:
+            return 1, size, {prefix: codes}
+        return split
+
+    def _find(self, prefix):
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def _find_station(self, station_code):
+        node = self._find(station_code)
+        return node.station if node is not None else None
+
+    def save(self, path):
+        """
+        Saves a compressed snapshot of the directory.
+        :param path: path of the snapshot file
+        :type path: `str`
+        """
+        rows = []
+        for station in self.stations_with_prefix(""):
+            url = station.url if station.url != _STATION_URL.format(code=station.code) else None
+            rows.append([station.code, station.name, url, station.latitude, station.longitude])
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump({"version": _SNAPSHOT_VERSION, "stations": rows}, f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a directory out of a snapshot saved with *save*.
+        :param path: path of the snapshot file
+        :type path: `str`
+        :returns: a *StationDirectory* instance
+        :raises: *ValueError* when the file is not a valid snapshot
+        """
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        if not isinstance(snapshot, dict) or snapshot.get("version") != _SNAPSHOT_VERSION:
+            raise ValueError("Unsupported station directory snapshot")
+        return cls(Station(name, code, url if url is not None else _STATION_URL.format(code=code), latitude, longitude)
+                   for code, name, url, latitude, longitude in snapshot["stations"])
+
+    def __contains__(self, station_code):
+        return self.get(station_code) is not None
+
+    def __iter__(self):
+        return iter(self.stations_with_prefix(""))
+
+    def __len__(self):
+        return self._root.count
+
+
+def _group_by_prefix(codes, length):
+    groups = {}
+    for code in codes:
+        groups.setdefault(code[:length] if length is not None else code, []).append(code)
+    return groups
+
+
+def _normalize_name(name):
+    decomposed = unicodedata.normalize("NFKD", name)
+    return " ".join("".join(char for char in decomposed if not unicodedata.combining(char)).casefold().split())
@@ -9,3 +9,16 @@ class StationNotFound(MeteoclimaticError):
     def __init__(self, station_code):
         self.station_code = station_code
         super().__init__("Station code %s did not return any item" % (station_code, ))
+
+
+class ServiceUnavailable(MeteoclimaticError):
+    """Raised when the Meteoclimatic service cannot be reached, or the connection fails during a request"""
+    pass
+
+
+class CircuitOpen(ServiceUnavailable):
+    """Raised without contacting the service while the circuit breaker of its host is open"""
+
+    def __init__(self, host):
+        self.host = host
+        super().__init__("Circuit breaker open for host %s" % (host, ))
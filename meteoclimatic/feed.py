@@ -1,37 +1,215 @@
+import functools
 import re
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+# "Thu, 04 Jun 2020 10:48:01 +0000", the weekday and the seconds being optional
+_RFC822_DATE = re.compile(
+    r"\s*(?:[A-Za-z]{3},\s*)?(\d{1,2})\s+([A-Za-z]{3})\s+(\d{4}|\d{2})\s+(\d{2}):(\d{2})(?::(\d{2}))?"
+    r"\s+([+-]\d{4}|[A-Za-z]{1,3})\s*$")
+_MONTHS = {name: number for number, name in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), 1)}
+# Zone names of RFC 822, besides the military ones other than "Z" whose sign is ambiguous
+_ZONES = {"gmt": timezone.utc, "ut": timezone.utc, "utc": timezone.utc, "z": timezone.utc}
+_ZONES.update((name, timezone(timedelta(hours=hours))) for name, hours in (
+    ("est", -5), ("edt", -4), ("cst", -6), ("cdt", -5), ("mst", -7), ("mdt", -6), ("pst", -8), ("pdt", -7)))
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_rfc822_date(text):
+    """
+    Parses an RFC 822 date, such as the `<pubDate>` of the feed items, into a
+    timezone-aware `datetime`. Unlike `datetime.strptime` it does not depend
+    on the locale. Results are memoized, so the many items of a regional feed
+    published at the same time share a single `datetime` instance.
+    :param text: the date (e.g. "Thu, 04 Jun 2020 10:48:01 +0000")
+    :type text: `str`
+    :returns: a `datetime.datetime` instance
+    :raises: *ValueError* when the text is not a valid date
+    """
+    match = _RFC822_DATE.match(text) if isinstance(text, str) else None
+    month = _MONTHS.get(match.group(2).lower()) if match else None
+    if month is None:
+        raise ValueError("Invalid RFC 822 date '%s'" % (text, ))
+    day, _, year, hour, minute, second, zone = match.groups()
+    year = int(year)
+    if year < 100:
+        # Two-digit years of RFC 822, read as RFC 2822 does
+        year += 2000 if year < 50 else 1900
+    return datetime(year, month, int(day), int(hour), int(minute), int(second or 0), tzinfo=_timezone(zone))
+
+
+def _timezone(zone):
+    tz = _ZONES.get(zone.lower())
+    if tz is not None:
+        return tz
+    if zone[0] not in "+-" or int(zone[3:]) > 59:
+        raise ValueError("Invalid RFC 822 time zone '%s'" % (zone, ))
+    offset = timedelta(hours=int(zone[1:3]), minutes=int(zone[3:]))
+    if offset == timedelta(0):
+        return timezone.utc
+    return timezone(-offset if zone[0] == "-" else offset)
+
+
+def _decode_text(value):
+    if len(value) == 0:
+        return None
+    return value
+
+
+def _decode_float(value):
+    if len(value) == 0:
+        return None
+    try:
+        value = float(value.replace(",", "."))
+    except ValueError:
+        return None
+    if value == -99.0:
+        # Meteoclimatic returns -99,0 when the station does not provide the value
+        return None
+    return value
+
+
+FeedRecord = namedtuple("FeedRecord", [
+    "station_code", "temp_current", "temp_max", "temp_min", "condition",
+    "humidity_current", "humidity_max", "humidity_min",
+    "pressure_current", "pressure_max", "pressure_min",
+    "wind_current", "wind_max", "wind_bearing", "rain"])
+FeedRecord.__doc__ = """Typed values of the data block of a Meteoclimatic RSS feed item, None when not provided."""
 
 
 class FeedItemHelper(object):
     """Helper class to get content from a Meteoclimatic RSS feed item."""
 
     _regex_pattern = r"\[\[\<(?P<station_code>\w+);\((?P<temp_current>-?[0-9,]+);(?P<temp_max>-?[0-9,]+);(?P<temp_min>-?[0-9,]+);(?P<condition>\w*)\);\((?P<humidity_current>-?[0-9,]*);(?P<humidity_max>-?[0-9,]*);(?P<humidity_min>-?[0-9,]*)\);\((?P<pressure_current>-?[0-9,]*);(?P<pressure_max>-?[0-9,]*);(?P<pressure_min>-?[0-9,]*)\);\((?P<wind_current>-?[0-9,]*);(?P<wind_max>-?[0-9,]*);(?P<wind_bearing>-?[0-9,]*)\);\((?P<rain>-?[0-9,]*)\);"  # noqa: E501
+    _regex = re.compile(_regex_pattern)
+
+    # Converters of the regex groups, in the same order as the FeedRecord fields
+    _decoders = (_decode_text, _decode_float, _decode_float, _decode_float, _decode_text,
+                 _decode_float, _decode_float, _decode_float,
+                 _decode_float, _decode_float, _decode_float,
+                 _decode_float, _decode_float, _decode_float, _decode_float)
 
     def __init__(self, feed_item):
         """Initialize the class."""
-        self.match = re.search(self._regex_pattern, str(feed_item.description))
+        self.match = self._regex.search(str(feed_item.description))
         if not self.match:
             raise ValueError("Could not parse station information")
 
+    def decode(self):
+        """Return a *FeedRecord* with every value of the item, decoded in a single pass."""
+        return self.decode_match(self.match)
+
+    @classmethod
+    def decode_match(cls, match):
+        """Return a *FeedRecord* with every value of a data block match, decoded in a single pass."""
+        return FeedRecord._make([decode(value) for decode, value in zip(cls._decoders, match.groups())])
+
     def get_text(self, field_name):
         """Return the value in 'field_name' from the item or None if not found."""
         try:
             value = self.match.group(field_name)
         except IndexError:
             return None
-        if len(value) == 0:
-            return None
-        return value
+        return _decode_text(value)
 
     def get_float(self, field_name):
         """Return the value in 'field_name' from the item or None if not found."""
         value = self.get_text(field_name)
         if value is None:
             return None
+        return _decode_float(value)
+
+
+class FeedItem(object):
+    """
+    Parser-independent representation of a Meteoclimatic RSS feed item.
+
+    :param title: Title of the item, usually the station name
+    :type title: `str`
+    :param link: URL of the station page
+    :type link: `str`
+    :param pub_date: Publication date of the item in RFC 822 format
+    :type pub_date: `str`
+    :param description: Description of the item, including the data block comment
+    :type description: `str`
+    :param guid: Unique identifier of the item
+    :type guid: `str`
+    :param latitude: Latitude of the station
+    :type latitude: `str`
+    :param longitude: Longitude of the station
+    :type longitude: `str`
+    :returns: a *FeedItem* instance
+    """
+
+    def __init__(self, title, link, pub_date, description, guid=None, latitude=None, longitude=None):
+        """Initialize the class."""
+        self.title = title
+        self.link = link
+        self.pub_date = pub_date
+        self.description = description
+        self.guid = guid
+        self.latitude = latitude
+        self.longitude = longitude
+
+    @classmethod
+    def from_tag(cls, tag):
+        """
+        Builds a *FeedItem* out of a BeautifulSoup RSS item.
+        :param tag: the input RSS feed item
+        :type tag: `bs4.element.Tag`
+        :returns: a *FeedItem* instance
+        """
+        latitude, longitude = _tag_text(tag.find("lat")), _tag_text(tag.find("long"))
+        point = _tag_text(tag.find("point"))
+        if (latitude is None or longitude is None) and point is not None:
+            latitude, longitude = split_point(point)
+        return cls(_tag_text(tag.title), _tag_text(tag.link), _tag_text(tag.pubDate),
+                   str(tag.description), _tag_text(tag.guid), latitude, longitude)
+
+    def __eq__(self, other):
+        if not isinstance(other, FeedItem):
+            return NotImplemented
+        prop_names = list(self.__dict__)
+        for prop in prop_names:
+            if self.__dict__[prop] != other.__dict__[prop]:
+                return False
+        return True
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__, self.__dict__)
+
+
+class FeedChannel(object):
+    """
+    Channel-level metadata of a Meteoclimatic RSS feed, filled in by the parser
+    engines while the items of the feed are read.
+
+    :ivar ttl: number of minutes the feed can be cached, None if not provided
+    :vartype ttl: `int`
+    """
+
+    def __init__(self):
+        """Initialize the class."""
+        self.ttl = None
+
+    def set_ttl(self, text):
+        """Sets the ttl out of the text of the `<ttl>` element, ignoring invalid values."""
         try:
-            value = float(value.replace(",", "."))
-        except ValueError:
-            return None
-        if value == -99.0:
-            # Meteoclimatic returns -99,0 when the station does not provide the value
-            return None
-        return value
+            self.ttl = int(text.strip())
+        except (AttributeError, ValueError):
+            self.ttl = None
+
+
+def split_point(point):
+    """Return the (latitude, longitude) texts of a georss point, or (None, None) if malformed."""
+    parts = point.split()
+    if len(parts) != 2:
+        return None, None
+    return parts[0], parts[1]
+
+
+def _tag_text(tag):
+    if tag is None:
+        return None
+    return tag.text
@@ -0,0 +1,184 @@
+import logging
+import threading
+
+# Phases of a feed lookup, in the order they happen
+PHASES = ("connect", "download", "parse", "decode", "build")
+
+
+class FeedMetrics(object):
+    """
+    Measurements of a feed lookup, handed to the *record* method of the
+    instrumentation of the client once the lookup is over.
+
+    Phase durations are in seconds: *connect* until the response headers are
+    received, *download* reading the body, *parse* extracting the feed items
+    out of the XML document, *decode* decoding the data blocks of the items and
+    *build* creating the *Observation* instances, including the parsing of the
+    publication dates. When a feed is parsed while it is being downloaded, the
+    time waiting for the network is part of *parse*. Lookups of columnar
+    batches account decoding as *parse*, and lookups of changes account it as
+    *build*.
+
+    :ivar url: URL of the feed
+    :vartype url: `str`
+    :ivar status: HTTP status of the response, None if nothing was downloaded
+    :vartype status: `int`
+    :ivar bytes: bytes of the body received, before decompression
+    :vartype bytes: `int`
+    :ivar items: feed items read
+    :vartype items: `int`
+    :ivar skipped: feed items that could not be parsed
+    :vartype skipped: `int`
+    :ivar error: exception that aborted the lookup, if any
+    :vartype error: `Exception`
+    """
+
+    __slots__ = ("url", "status", "bytes", "items", "skipped", "error") + PHASES
+
+    def __init__(self, url):
+        """Initialize the class."""
+        self.url = url
+        self.status = None
+        self.bytes = 0
+        self.items = 0
+        self.skipped = 0
+        self.error = None
+        for phase in PHASES:
+            setattr(self, phase, 0.0)
+
+    @property
+    def total(self):
+        """Seconds spent in all the phases."""
+        return sum(getattr(self, phase) for phase in PHASES)
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__, {prop: getattr(self, prop) for prop in self.__slots__})
+
+
+class MetricsCollector(object):
+    """
+    Instrumentation keeping running totals of the feed lookups of a client.
+    Any object with a `record(metrics)` method taking a *FeedMetrics* can be
+    used as instrumentation instead.
+    """
+
+    def __init__(self):
+        """Initialize the class."""
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(("fetches", "errors", "bytes", "items", "skipped"), 0)
+        self._seconds = dict.fromkeys(PHASES, 0.0)
+
+    def record(self, metrics):
+        """
+        Adds the measurements of a feed lookup to the totals.
+        :param metrics: measurements of the lookup
+        :type metrics: *FeedMetrics*
+        """
+        with self._lock:
+            self._counters["fetches"] += 1
+            self._counters["errors"] += metrics.error is not None
+            self._counters["bytes"] += metrics.bytes
+            self._counters["items"] += metrics.items
+            self._counters["skipped"] += metrics.skipped
+            for phase in PHASES:
+                self._seconds[phase] += getattr(metrics, phase)
+
+    def counters(self):
+        """
+        Returns the totals of the recorded lookups, with the seconds spent in
+        each phase keyed as `<phase>_seconds`.
+        :returns: a `dict` of counters keyed by name
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            counters.update(("%s_seconds" % (phase, ), seconds) for phase, seconds in self._seconds.items())
+        return counters
+
+
+class LoggingInstrumentation(object):
+    """
+    Instrumentation logging a line per feed lookup with the `logging` module.
+    Failed lookups are logged as warnings.
+
+    :param level: level of the log records of successful lookups
+    :type level: `int`
+    :param logger: logger of the records, the root logger if None
+    :type logger: `logging.Logger`
+    """
+
+    def __init__(self, level=logging.DEBUG, logger=None):
+        """Initialize the class."""
+        self.level = level
+        self._logger = logger if logger is not None else logging.getLogger()
+
+    def record(self, metrics):
+        """
+        Logs the measurements of a feed lookup.
+        :param metrics: measurements of the lookup
+        :type metrics: *FeedMetrics*
+        """
+        phases = " ".join("%s=%.4fs" % (phase, getattr(metrics, phase)) for phase in PHASES)
+        if metrics.error is not None:
+            self._logger.warning("Error fetching feed %s after %.4fs: %s [%s]" %
+                                 (metrics.url, metrics.total, metrics.error, phases))
+            return
+        self._logger.log(self.level, "Fetched feed %s [status=%s] in %.4fs: %s bytes=%d items=%d skipped=%d" %
+                         (metrics.url, metrics.status, metrics.total, phases, metrics.bytes, metrics.items,
+                          metrics.skipped))
+
+
+class PrometheusInstrumentation(object):
+    """
+    Instrumentation exporting the feed lookups as Prometheus metrics with
+    `prometheus_client`: a `<namespace>_phase_seconds` histogram labelled by
+    phase, and `<namespace>_fetches_total`, `<namespace>_errors_total`,
+    `<namespace>_bytes_total`, `<namespace>_items_total` and
+    `<namespace>_skipped_items_total` counters.
+
+    :param registry: registry of the metrics, the default one if None
+    :type registry: `prometheus_client.CollectorRegistry`
+    :param namespace: prefix of the metric names
+    :type namespace: `str`
+    :param buckets: upper bounds of the histogram buckets in seconds
+    :type buckets: `tuple` of `float`
+    :raises: *ImportError* when prometheus_client is not installed
+    """
+
+    def __init__(self, registry=None, namespace="meteoclimatic",
+                 buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)):
+        """Initialize the class."""
+        import prometheus_client
+
+        if registry is None:
+            registry = prometheus_client.REGISTRY
+        self._phase_seconds = prometheus_client.Histogram(
+            "phase_seconds", "Seconds spent in each phase of the feed lookups", ["phase"],
+            namespace=namespace, buckets=buckets, registry=registry)
+        self._fetches = prometheus_client.Counter(
+            "fetches", "Feed lookups", namespace=namespace, registry=registry)
+        self._errors = prometheus_client.Counter(
+            "errors", "Failed feed lookups", namespace=namespace, registry=registry)
+        self._bytes = prometheus_client.Counter(
+            "bytes", "Bytes of the feeds received", namespace=namespace, registry=registry)
+        self._items = prometheus_client.Counter(
+            "items", "Feed items read", namespace=namespace, registry=registry)
+        self._skipped = prometheus_client.Counter(
+            "skipped_items", "Feed items that could not be parsed", namespace=namespace, registry=registry)
+
+    def record(self, metrics):
+        """
+        Exports the measurements of a feed lookup.
+        :param metrics: measurements of the lookup
+        :type metrics: *FeedMetrics*
+        """
+        self._fetches.inc()
+        if metrics.error is not None:
+            self._errors.inc()
+        self._bytes.inc(metrics.bytes)
+        self._items.inc(metrics.items)
+        self._skipped.inc(metrics.skipped)
+        for phase in PHASES:
+            seconds = getattr(metrics, phase)
+            # Phases skipped by the lookup, e.g. the download of a cached feed, are not observed
+            if seconds > 0:
+                self._phase_seconds.labels(phase).observe(seconds)
@@ -1,7 +1,12 @@
 import logging
 from datetime import datetime
 from meteoclimatic import Station, Weather, Condition
-from meteoclimatic.feed import FeedItemHelper
+from meteoclimatic.feed import FeedItem, FeedItemHelper, FeedRecord, _decode_float, _decode_text, parse_rfc822_date
+from meteoclimatic.weather import check_range
+
+# Group of each field in the data block match of a feed item
+_FIELD_GROUPS = {name: group for group, name in enumerate(FeedRecord._fields, 1)}
+_WEATHER_FIELDS = frozenset(Weather.__slots__)
 
 
 class Observation:
@@ -22,7 +27,7 @@ class Observation:
     :raises: *ValueError* when negative values are provided as reception time
     """
 
-    _feed_datetime_format = "%a, %d %b %Y %H:%M:%S %z"
+    __slots__ = ("reception_time", "station", "weather")
 
     def __init__(self, reception_time: datetime, station: Station, weather: Weather):
         """Initialize the class."""
@@ -42,63 +47,209 @@ class Observation:
         self.weather = weather
 
     @classmethod
-    def from_feed_item(cls, feed_item):
+    def from_feed_item(cls, feed_item, lazy=False):
         """
         Parses an *Observation* instance out of an RSS feed item.
         :param feed_item: the input RSS feed item
-        :type feed_item: `bs4.element.Tag`
+        :type feed_item: `meteoclimatic.feed.FeedItem` or `bs4.element.Tag`
+        :param lazy: whether to return a *LazyObservation* decoding its fields
+            on first access
+        :type lazy: `bool`
         :returns: an *Observation* instance
         :raises: *ValueError* if it is not possible to parse the data
         """
+        if not isinstance(feed_item, FeedItem):
+            feed_item = FeedItem.from_tag(feed_item)
         helper = FeedItemHelper(feed_item)
+        if lazy:
+            return LazyObservation(feed_item, helper.match)
+        return cls.from_feed_record(feed_item, helper.decode())
 
-        station_name = feed_item.title.text
-        station_code = helper.get_text("station_code")
-        station_url = feed_item.link.text
-        station = Station(station_name, station_code, station_url)
-
-        reception_time = datetime.strptime(
-            feed_item.pubDate.text, cls._feed_datetime_format)
-
-        condition_str = helper.get_text("condition")
-        try:
-            condition = Condition(condition_str)
-        except ValueError:
-            logging.info(
-                "Unrecognized condidition '%s', using literal value instead of meteoclimatic.Condition" % (condition_str, ))
-            condition = condition_str
-        temp_current = helper.get_float("temp_current")
-        temp_max = helper.get_float("temp_max")
-        temp_min = helper.get_float("temp_min")
-        humidity_current = helper.get_float("humidity_current")
-        humidity_max = helper.get_float("humidity_max")
-        humidity_min = helper.get_float("humidity_min")
-        pressure_current = helper.get_float("pressure_current")
-        pressure_max = helper.get_float("pressure_max")
-        pressure_min = helper.get_float("pressure_min")
-        wind_current = helper.get_float("wind_current")
-        wind_max = helper.get_float("wind_max")
-        wind_bearing = helper.get_float("wind_bearing")
-        rain = helper.get_float("rain")
-        wind_max = helper.get_float("wind_max")
+    @classmethod
+    def from_feed_record(cls, feed_item, record):
+        """
+        Builds an *Observation* instance out of an RSS feed item and its
+        already decoded data block.
+        :param feed_item: the input RSS feed item
+        :type feed_item: `meteoclimatic.feed.FeedItem`
+        :param record: the data block decoded by *FeedItemHelper.decode*
+        :type record: `meteoclimatic.feed.FeedRecord`
+        :returns: an *Observation* instance
+        :raises: *ValueError* if it is not possible to parse the data
+        """
+        station = _station(feed_item, record.station_code)
+        reception_time = parse_rfc822_date(feed_item.pub_date)
+        condition = _condition(record.condition)
 
         weather = Weather(reception_time, condition,
-                          temp_current, temp_max, temp_min,
-                          humidity_current, humidity_max, humidity_min,
-                          pressure_current, pressure_max, pressure_min,
-                          wind_current, wind_max, wind_bearing,
-                          rain)
+                          record.temp_current, record.temp_max, record.temp_min,
+                          record.humidity_current, record.humidity_max, record.humidity_min,
+                          record.pressure_current, record.pressure_max, record.pressure_min,
+                          record.wind_current, record.wind_max, record.wind_bearing,
+                          record.rain)
 
         return cls(reception_time, station, weather)
 
     def __eq__(self, other):
         if not isinstance(other, Observation):
             return NotImplemented
-        prop_names = list(self.__dict__)
-        for prop in prop_names:
-            if self.__dict__[prop] != other.__dict__[prop]:
+        for prop in Observation.__slots__:
+            if getattr(self, prop) != getattr(other, prop):
                 return False
         return True
 
     def __repr__(self):
-        return "%s(%r)" % (self.__class__, self.__dict__)
+        return "%s(%r)" % (self.__class__, {prop: getattr(self, prop) for prop in Observation.__slots__})
+
+    def __reduce__(self):
+        return (Observation, (self.reception_time, self.station, self.weather))
+
+
+class LazyObservation(Observation):
+    """
+    An *Observation* of an RSS feed item which holds the match of the data
+    block of the item and decodes its reception time and station on first
+    access. Its weather is a *LazyWeather*, decoding each value on first access.
+
+    Invalid values raise the same *ValueError* an *Observation* would raise
+    when it is parsed, but only when they are accessed; *validate* decodes
+    every field at once. Its representation only shows the fields already
+    decoded, so it never raises.
+
+    :param feed_item: the RSS feed item
+    :type feed_item: `meteoclimatic.feed.FeedItem`
+    :param match: match of the data block of the item, see *FeedItemHelper*
+    :type match: `re.Match`
+    :returns: a *LazyObservation* instance
+    """
+
+    __slots__ = ("_feed_item", "_match")
+
+    def __init__(self, feed_item, match):
+        """Initialize the class."""
+        self._feed_item = feed_item
+        self._match = match
+        self.weather = LazyWeather(feed_item.pub_date, match)
+
+    def __getattr__(self, name):
+        # Only called while the slot of the attribute is unset
+        if name == "reception_time":
+            value = parse_rfc822_date(self._feed_item.pub_date)
+        elif name == "station":
+            value = _station(self._feed_item, _decode_text(self._match.group(_FIELD_GROUPS["station_code"])))
+        else:
+            raise AttributeError("'%s' object has no attribute '%s'" % (self.__class__.__name__, name))
+        setattr(self, name, value)
+        return value
+
+    def validate(self):
+        """
+        Decodes and validates every field of the observation.
+        :returns: the observation
+        :raises: *ValueError* if it is not possible to parse the data
+        """
+        self.reception_time
+        self.station
+        self.weather.validate()
+        return self
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__, _decoded_slots(self, Observation))
+
+
+class LazyWeather(Weather):
+    """
+    A *Weather* which holds the match of the data block of an RSS feed item,
+    and decodes and validates each of its values on first access.
+
+    :param pub_date: publication date of the item in RFC 822 format
+    :type pub_date: `str`
+    :param match: match of the data block of the item, see *FeedItemHelper*
+    :type match: `re.Match`
+    :returns: a *LazyWeather* instance
+    """
+
+    __slots__ = ("_pub_date", "_match")
+
+    def __init__(self, pub_date, match):
+        """Initialize the class."""
+        self._pub_date = pub_date
+        self._match = match
+
+    def __getattr__(self, name):
+        # Only called while the slot of the attribute is unset
+        if name not in _WEATHER_FIELDS:
+            raise AttributeError("'%s' object has no attribute '%s'" % (self.__class__.__name__, name))
+        value = self._decode(name)
+        setattr(self, name, value)
+        return value
+
+    def validate(self):
+        """
+        Decodes and validates every value of the weather at once, which is
+        cheaper than accessing each of them when most of them are used.
+        :returns: the weather
+        :raises: *ValueError* when a value is out of range
+        """
+        record = FeedItemHelper.decode_match(self._match)
+        Weather.__init__(self, parse_rfc822_date(self._pub_date), _condition(record.condition),
+                         *record[1:4], *record[5:])
+        return self
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__, _decoded_slots(self, Weather))
+
+    def _decode(self, name):
+        if name == "reference_time":
+            return parse_rfc822_date(self._pub_date)
+        text = self._match.group(_FIELD_GROUPS[name])
+        if name == "condition":
+            return _condition(_decode_text(text))
+        return check_range(name, _decode_float(text))
+
+
+class _Undecoded(object):
+
+    def __repr__(self):
+        return "<undecoded>"
+
+
+_UNDECODED = _Undecoded()
+
+
+def _decoded_slots(obj, cls):
+    # Reads the slots without decoding them, so that invalid values never raise
+    values = {}
+    for name in cls.__slots__:
+        try:
+            values[name] = getattr(cls, name).__get__(obj)
+        except AttributeError:
+            values[name] = _UNDECODED
+    return values
+
+
+def _station(feed_item, station_code):
+    latitude, longitude = _coordinate(feed_item.latitude, 90.0), _coordinate(feed_item.longitude, 180.0)
+    if latitude is None or longitude is None:
+        latitude, longitude = None, None
+    return Station(feed_item.title, station_code, feed_item.link, latitude, longitude)
+
+
+def _condition(condition_str):
+    try:
+        return Condition(condition_str)
+    except ValueError:
+        logging.info(
+            "Unrecognized condidition '%s', using literal value instead of meteoclimatic.Condition" % (condition_str, ))
+        return condition_str
+
+
+def _coordinate(text, limit):
+    # Malformed coordinates are dropped rather than failing the whole observation
+    try:
+        value = float(text)
+    except (TypeError, ValueError):
+        return None
+    if value < -limit or value > limit:
+        return None
+    return value
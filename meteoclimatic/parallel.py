@@ -0,0 +1,158 @@
+import logging
+import mmap
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from meteoclimatic.observation import Observation
+from meteoclimatic.parser import PARSER_ENGINES, iter_feed_items
+from meteoclimatic.station import Station
+from meteoclimatic.weather import Weather
+
+# Size in bytes of the item ranges of a document parsed by a worker, about 2000 items
+_CHUNK_SIZE = 4 * 1024 * 1024
+
+_ITEM = b"<item>"
+_FOOTER = b"</channel></rss>"
+
+OUTPUTS = ("observations", "batch")
+
+
+def parse_feeds(sources, workers=None, engine="lxml", chunk_size=_CHUNK_SIZE, output="observations"):
+    """
+    Parses feed documents, such as archived raw feed files, in a pool of
+    worker processes. Documents are split in ranges of items of about
+    *chunk_size* bytes which are parsed in parallel, and the results are
+    returned in the order of the documents and of their items, whatever the
+    number of workers. Items that cannot be parsed are skipped.
+
+    Workers send the observations back as plain tuples, which are much
+    cheaper to transfer than *Observation* instances, but the instances are
+    still created by the calling process, which bounds the speedup. With
+    `output="batch"`, workers decode the items straight into the NumPy
+    columns of an *ObservationBatch*, and the work left to the calling
+    process is joining them.
+
+    :param sources: paths of the feed files or feed documents
+    :type sources: iterable of `str`, `os.PathLike` or `bytes`
+    :param workers: number of worker processes, the number of CPUs if None,
+        parsed in the calling process if 1
+    :type workers: `int`
+    :param engine: name of the parser engine, see *iter_feed_items*
+    :type engine: `str`
+    :param chunk_size: approximate size in bytes of the item ranges parsed by
+        each task
+    :type chunk_size: `int`
+    :param output: "observations" or "batch", see *OUTPUTS*
+    :type output: `str`
+    :returns: an iterator of *Observation* instances, or an *ObservationBatch*
+        instance when *output* is "batch"
+    :raises: *ValueError* when an argument is not valid
+    """
+    if engine not in PARSER_ENGINES:
+        raise ValueError("Unknown parser engine '%s'" % (engine, ))
+    if output not in OUTPUTS:
+        raise ValueError("Unknown output '%s'" % (output, ))
+    if workers is not None and workers < 1:
+        raise ValueError("workers must be greater than 0")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be greater than 0")
+    results = _parse_chunks(sources, workers or os.cpu_count() or 1, engine, chunk_size, output)
+
+    if output == "batch":
+        from meteoclimatic.batch import ObservationBatch
+
+        return ObservationBatch.concatenate(ObservationBatch(columns) for columns in results)
+    return (_observation(row) for rows in results for row in rows)
+
+
+def _parse_chunks(sources, workers, engine, chunk_size, output):
+    tasks = (task for source in sources for task in _split(source, chunk_size))
+    if workers == 1:
+        for task in tasks:
+            yield _parse_chunk(task, engine, output)
+        return
+
+    with ProcessPoolExecutor(workers) as executor:
+        # Only a few tasks are submitted ahead, so the chunks of a large archive
+        # and their results are never held in memory all at once
+        pending = deque()
+        try:
+            for task in tasks:
+                pending.append(executor.submit(_parse_chunk, task, engine, output))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _split(source, chunk_size):
+    # Yields the tasks of a document: a self-contained document for in-memory
+    # sources, and the byte ranges of the header and the items for files
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        data = bytes(source)
+        head = data[:data.find(_ITEM)]
+        for start, end in _item_ranges(data, chunk_size):
+            yield head + data[start:end] + (_FOOTER if end < len(data) else b"")
+        return
+
+    path = os.fspath(source)
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            size = len(data)
+            head_end = data.find(_ITEM)
+            ranges = list(_item_ranges(data, chunk_size))
+    for start, end in ranges:
+        yield (path, head_end if head_end >= 0 else size, start, end, end == size)
+
+
+def _item_ranges(data, chunk_size):
+    start = data.find(_ITEM)
+    if start < 0:
+        return
+    while True:
+        end = data.find(_ITEM, start + chunk_size)
+        if end < 0:
+            yield start, len(data)
+            return
+        yield start, end
+        start = end
+
+
+def _read_chunk(task):
+    if isinstance(task, bytes):
+        return task
+    path, head_end, start, end, last = task
+    with open(path, "rb") as f:
+        head = f.read(head_end)
+        f.seek(start)
+        return head + f.read(end - start) + (b"" if last else _FOOTER)
+
+
+def _parse_chunk(task, engine, output):
+    document = _read_chunk(task)
+    if output == "batch":
+        from meteoclimatic.batch import ObservationBatch
+
+        return ObservationBatch.from_feed(document, engine).columns
+
+    rows = []
+    for item in iter_feed_items(document, engine):
+        try:
+            observation = Observation.from_feed_item(item)
+        except ValueError as exc:
+            logging.warning("Skipping unparseable feed item: %s" % (exc, ))
+            continue
+        station, weather = observation.station, observation.weather
+        rows.append((observation.reception_time, station.name, station.code, station.url, station.latitude,
+                     station.longitude) + tuple(getattr(weather, name) for name in Weather.__slots__[1:]))
+    return rows
+
+
+def _observation(row):
+    return Observation(row[0], Station(*row[1:6]), Weather(row[0], *row[6:]))
@@ -0,0 +1,236 @@
+import html
+import re
+from io import BytesIO
+from bs4 import BeautifulSoup
+from lxml import etree
+
+from meteoclimatic.feed import FeedChannel, FeedItem, split_point
+
+_GEO_NS = "{http://www.w3.org/2003/01/geo/wgs84_pos#}"
+_GEORSS_NS = "{http://www.georss.org/georss}"
+
+_CHUNK_SIZE = 64 * 1024
+
+_RAW_ENCODING = re.compile(rb"^\s*<\?xml[^>]*encoding=[\"']([\w.-]+)[\"']")
+
+
+class IncrementalFeedParser(object):
+    """
+    Incremental parser built on `lxml.etree.XMLPullParser`. The feed document
+    can be fed in chunks as it is received, and every *FeedItem* is returned as
+    soon as its closing `</item>` tag has been read. Processed elements are
+    released, so memory usage does not grow with the feed size.
+
+    :param channel: channel metadata filled in while parsing, a new one if None
+    :type channel: `meteoclimatic.feed.FeedChannel`
+    """
+
+    def __init__(self, channel=None):
+        """Initialize the class."""
+        self.channel = channel if channel is not None else FeedChannel()
+        self._parser = etree.XMLPullParser(events=("end", ), tag=("item", "ttl"), recover=True)
+
+    def feed(self, data):
+        """
+        Feeds a chunk of the document to the parser.
+        :param data: the next chunk of the feed document
+        :type data: `bytes`
+        :returns: a `list` of the *FeedItem* instances completed by this chunk
+        """
+        self._parser.feed(data)
+        return self._read_items()
+
+    def close(self):
+        """
+        Terminates the parsing of the document.
+        :returns: a `list` of the remaining *FeedItem* instances
+        """
+        try:
+            self._parser.close()
+        except etree.XMLSyntaxError:
+            # Raised by lxml when the document does not even have a root element
+            pass
+        return self._read_items()
+
+    def _read_items(self):
+        items = []
+        for _, element in self._parser.read_events():
+            if element.tag == "ttl":
+                self.channel.set_ttl(element.text)
+                continue
+            items.append(_element_to_item(element))
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+        return items
+
+
+def iter_items_lxml(source, channel=None, chunk_size=_CHUNK_SIZE):
+    """
+    Streaming parser engine built on *IncrementalFeedParser*. File-like sources,
+    such as HTTP responses, are read and parsed in chunks so items are yielded
+    while the document is still being received.
+
+    :param source: the feed document
+    :type source: `bytes`, `str` or binary file-like object
+    :param channel: channel metadata filled in while parsing
+    :type channel: `meteoclimatic.feed.FeedChannel`
+    :param chunk_size: number of bytes read from file-like sources at a time
+    :type chunk_size: `int`
+    :returns: an iterator of *FeedItem* instances
+    """
+    if isinstance(source, str):
+        source = source.encode("utf-8")
+    if isinstance(source, bytes):
+        source = BytesIO(source)
+
+    parser = IncrementalFeedParser(channel)
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def iter_items_bs4(source, channel=None):
+    """
+    Parser engine building the whole BeautifulSoup tree before extracting the
+    items. Slower than the *lxml* engine but kept as a reference implementation.
+
+    :param source: the feed document
+    :type source: `bytes`, `str` or file-like object
+    :param channel: channel metadata filled in while parsing
+    :type channel: `meteoclimatic.feed.FeedChannel`
+    :returns: an iterator of *FeedItem* instances
+    """
+    soup_page = BeautifulSoup(source, "xml")
+    ttl = soup_page.find("ttl")
+    if channel is not None and ttl is not None:
+        channel.set_ttl(ttl.text)
+    for tag in soup_page.find_all("item"):
+        yield FeedItem.from_tag(tag)
+
+
+def iter_items_raw(source, channel=None):
+    """
+    Fast parser engine scanning the raw bytes of the feed for the few elements
+    used by *Observation.from_feed_item*, without building any XML tree. The
+    description of each *FeedItem* only holds the `[[<BEGIN:...:DATA>]]` data
+    block. It relies on the element and namespace prefix names used by
+    Meteoclimatic (e.g. `<geo:lat>` and `<georss:point>`).
+
+    :param source: the feed document
+    :type source: `bytes`, `str` or binary file-like object
+    :param channel: channel metadata filled in while parsing
+    :type channel: `meteoclimatic.feed.FeedChannel`
+    :returns: an iterator of *FeedItem* instances
+    """
+    if hasattr(source, "read"):
+        source = source.read()
+    if isinstance(source, str):
+        source = source.encode("utf-8")
+
+    match = _RAW_ENCODING.match(source)
+    encoding = match.group(1).decode("ascii") if match else "utf-8"
+
+    start = source.find(b"<item>")
+    if channel is not None:
+        ttl = _raw_element(source, b"<ttl>", b"</ttl>", 0, start if start >= 0 else len(source), encoding)
+        if ttl is not None:
+            channel.set_ttl(ttl)
+
+    while start >= 0:
+        end = source.find(b"</item>", start)
+        if end < 0:
+            break
+        yield _raw_item(source, start, end, encoding)
+        start = source.find(b"<item>", end)
+
+
+PARSER_ENGINES = {
+    "lxml": iter_items_lxml,
+    "bs4": iter_items_bs4,
+    "raw": iter_items_raw,
+}
+
+
+def iter_feed_items(source, engine="lxml", channel=None):
+    """
+    Parses the items of a Meteoclimatic RSS feed.
+
+    :param source: the feed document
+    :type source: `bytes`, `str` or file-like object
+    :param engine: name of the parser engine, one of *PARSER_ENGINES*
+    :type engine: `str`
+    :param channel: channel metadata filled in while parsing
+    :type channel: `meteoclimatic.feed.FeedChannel`
+    :returns: an iterator of *FeedItem* instances
+    :raises: *ValueError* when the engine is unknown
+    """
+    try:
+        parse = PARSER_ENGINES[engine]
+    except KeyError:
+        raise ValueError("Unknown parser engine '%s'" % (engine, )) from None
+    return parse(source, channel)
+
+
+def _element_to_item(element):
+    latitude = element.findtext("%sPoint/%slat" % (_GEO_NS, _GEO_NS))
+    longitude = element.findtext("%sPoint/%slong" % (_GEO_NS, _GEO_NS))
+    point = element.findtext("%spoint" % (_GEORSS_NS, ))
+    if (latitude is None or longitude is None) and point is not None:
+        latitude, longitude = split_point(point)
+    return FeedItem(element.findtext("title"), element.findtext("link"), element.findtext("pubDate"),
+                    _description_text(element.find("description")), element.findtext("guid"),
+                    latitude, longitude)
+
+
+def _description_text(description):
+    if description is None:
+        return None
+    # The data block lives in an XML comment, which has to be kept in the text
+    return (description.text or "") + "".join(
+        etree.tostring(child, encoding="unicode") for child in description)
+
+
+def _raw_item(source, start, end, encoding):
+    latitude = _raw_element(source, b"<geo:lat>", b"</geo:lat>", start, end, encoding)
+    longitude = _raw_element(source, b"<geo:long>", b"</geo:long>", start, end, encoding)
+    if latitude is None or longitude is None:
+        point = _raw_element(source, b"<georss:point>", b"</georss:point>", start, end, encoding)
+        if point is not None:
+            latitude, longitude = split_point(point)
+    return FeedItem(_raw_element(source, b"<title>", b"</title>", start, end, encoding),
+                    _raw_element(source, b"<link>", b"</link>", start, end, encoding),
+                    _raw_element(source, b"<pubDate>", b"</pubDate>", start, end, encoding),
+                    _raw_data_block(source, start, end, encoding),
+                    _raw_element(source, b"<guid", b"</guid>", start, end, encoding),
+                    latitude, longitude)
+
+
+def _raw_element(source, open_tag, close_tag, start, end, encoding):
+    position = source.find(open_tag, start, end)
+    if position < 0:
+        return None
+    position = source.find(b">", position + len(open_tag) - 1, end) + 1
+    close = source.find(close_tag, position, end)
+    if position == 0 or close < 0:
+        return None
+    text = source[position:close].decode(encoding, errors="replace")
+    if text.startswith("<![CDATA[") and text.endswith("]]>"):
+        return text[9:-3]
+    if "&" in text:
+        return html.unescape(text)
+    return text
+
+
+def _raw_data_block(source, start, end, encoding):
+    position = source.find(b"[[<BEGIN:", start, end)
+    if position < 0:
+        return None
+    position = source.find(b">]]", position, end) + 3
+    close = source.find(b"[[<END:", position, end)
+    if position == 2 or close < 0:
+        return None
+    return source[position:close].decode(encoding, errors="replace")
@@ -0,0 +1,274 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+
+
+class _Cadence(object):
+    """Update interval of a station, learned from the publication dates of its observations."""
+
+    __slots__ = ("published", "interval")
+
+    # Weight of the last interval in the moving average
+    _smoothing = 0.3
+
+    def __init__(self):
+        self.published = None
+        self.interval = None
+
+    def observe(self, published):
+        if self.published is not None and published > self.published:
+            sample = published - self.published
+            if self.interval is None:
+                self.interval = sample
+            else:
+                self.interval = self._smoothing * sample + (1 - self._smoothing) * self.interval
+        if self.published is None or published > self.published:
+            self.published = published
+
+    def next_update(self):
+        if self.published is None or self.interval is None:
+            return None
+        return self.published + self.interval
+
+
+class Poller(object):
+    """
+    Scheduler polling station and regional feeds with *MeteoclimaticClient.poll_changes*,
+    so only new or changed observations are delivered.
+
+    Feeds are kept in a priority queue ordered by the time they are next due.
+    After every poll a feed is scheduled when its stations are expected to
+    publish again, learned from the successive publication dates of their
+    observations, but never sooner than *min_interval* nor than the `<ttl>` of
+    the feed, and never later than *max_interval*. A random jitter spreads the
+    polls, and the requests of all the feeds never exceed *requests_per_second*.
+    Failing feeds are retried with an exponential backoff.
+
+    Observations are delivered to *callback* by *run*, or through the
+    asynchronous iterator returned by *observations*.
+
+    :param client: client used to poll the feeds
+    :type client: *MeteoclimaticClient*
+    :param callback: function called with every new or changed *Observation*
+    :type callback: callable
+    :param requests_per_second: maximum rate of feed requests
+    :type requests_per_second: `float`
+    :param default_interval: seconds between polls while the update interval
+        of the stations of a feed is unknown
+    :type default_interval: `float`
+    :param min_interval: minimum seconds between two polls of a feed
+    :type min_interval: `float`
+    :param max_interval: maximum seconds between two polls of a feed
+    :type max_interval: `float`
+    :param jitter: maximum fraction of the interval randomly added to it
+    :type jitter: `float`
+    :param respect_ttl: whether to never poll a feed before its `<ttl>` expires
+    :type respect_ttl: `bool`
+    :param on_error: function called with the feed code and the exception when
+        a poll fails, errors are logged if None
+    :type on_error: callable
+    :param clock: function returning the current time in seconds since the epoch
+    :type clock: callable
+    :returns: a *Poller* instance
+    :raises: *ValueError* when *requests_per_second* is not a positive number
+    """
+
+    def __init__(self, client, callback=None, requests_per_second=1.0, default_interval=600, min_interval=60,
+                 max_interval=3600, jitter=0.1, respect_ttl=True, on_error=None, clock=time.time):
+        """Initialize the class."""
+        if requests_per_second <= 0:
+            raise ValueError("requests_per_second must be greater than 0")
+        self._client = client
+        self._callback = callback
+        self._request_interval = 1.0 / requests_per_second
+        self.default_interval = default_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.respect_ttl = respect_ttl
+        self._on_error = on_error
+        self._clock = clock
+        self._random = random.Random()
+        self._queue = []
+        self._due = {}
+        self._cadences = {}
+        self._failures = {}
+        self._sequence = itertools.count()
+        self._next_request = 0.0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+
+    def add(self, feed_code, delay=0.0):
+        """
+        Schedules the polling of a feed.
+        :param feed_code: code of a station or code prefix of a region
+        :type feed_code: `str`
+        :param delay: seconds before the first poll
+        :type delay: `float`
+        """
+        with self._lock:
+            self._schedule(feed_code, self._clock() + delay)
+            self._cadences.setdefault(feed_code, {})
+        self._wakeup.set()
+
+    def remove(self, feed_code):
+        """
+        Stops polling a feed.
+        :param feed_code: code of a station or code prefix of a region
+        :type feed_code: `str`
+        """
+        with self._lock:
+            self._due.pop(feed_code, None)
+            self._cadences.pop(feed_code, None)
+            self._failures.pop(feed_code, None)
+
+    def due_time(self, feed_code):
+        """
+        Returns when a feed is next polled.
+        :param feed_code: code of a station or code prefix of a region
+        :type feed_code: `str`
+        :returns: seconds since the epoch, or None if the feed is not polled
+        """
+        return self._due.get(feed_code)
+
+    def next_delay(self):
+        """
+        Returns the seconds until the next poll can be made, considering both
+        the due time of the feeds and the request budget.
+        :returns: a `float`, zero if a poll is due, or None if no feed is polled
+        """
+        with self._lock:
+            entry = self._peek()
+            if entry is None:
+                return None
+            return max(0.0, entry[0] - self._clock(), self._next_request - self._clock())
+
+    def poll_next(self):
+        """
+        Polls the next feed, if it is due and the request budget allows it.
+        When the poll fails, the feed is backed off and the observations
+        yielded before the error are still returned, as the client tracker
+        already remembers them.
+        :returns: a `list` of the new or changed *Observation* instances
+        """
+        with self._lock:
+            entry = self._peek()
+            now = self._clock()
+            if entry is None or entry[0] > now or self._next_request > now:
+                return []
+            heapq.heappop(self._queue)
+            feed_code = entry[2]
+            self._next_request = max(self._next_request, now) + self._request_interval
+
+        observations = []
+        try:
+            for observation in self._client.poll_changes(feed_code):
+                observations.append(observation)
+        except Exception as exc:
+            # Besides MeteoclimaticError, errors of the feed cache or of a
+            # malformed feed are backed off too, so that the feed popped from
+            # the queue is never left unscheduled
+            self._reschedule_failure(feed_code, exc)
+            return observations
+        self._reschedule(feed_code, observations)
+        return observations
+
+    def run(self):
+        """
+        Polls the feeds as they are due and delivers every new or changed
+        observation to the callback, until *stop* is called.
+        :raises: *ValueError* when the poller has no callback
+        """
+        if self._callback is None:
+            raise ValueError("A callback is required to run the poller")
+        while not self._stopped:
+            delay = self.next_delay()
+            if delay is None or delay > 0:
+                self._wakeup.wait(delay)
+                self._wakeup.clear()
+                continue
+            for observation in self.poll_next():
+                self._callback(observation)
+
+    def stop(self):
+        """Stops *run* and the iterators returned by *observations*."""
+        self._stopped = True
+        self._wakeup.set()
+
+    async def observations(self, executor=None):
+        """
+        Polls the feeds as they are due and yields every new or changed
+        observation, until *stop* is called or no feed is left. Polls are run
+        in an executor so they do not block the event loop.
+        :param executor: executor running the polls, the default one if None
+        :type executor: `concurrent.futures.Executor`
+        :returns: an asynchronous iterator of *Observation* instances
+        """
+        loop = asyncio.get_running_loop()
+        while not self._stopped:
+            delay = self.next_delay()
+            if delay is None:
+                return
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            for observation in await loop.run_in_executor(executor, self.poll_next):
+                yield observation
+
+    def _reschedule(self, feed_code, observations):
+        with self._lock:
+            cadences = self._cadences.get(feed_code)
+            if cadences is None:
+                # Removed while it was being polled
+                return
+            self._failures.pop(feed_code, None)
+            for observation in observations:
+                cadences.setdefault(observation.station.code, _Cadence()).observe(
+                    observation.reception_time.timestamp())
+
+            now = self._clock()
+            updates = [update for update in (cadence.next_update() for cadence in cadences.values()) if update is not None]
+            # A station already late is expected to publish any time, so it is polled after min_interval
+            interval = min(updates) - now if updates else self.default_interval
+            interval = min(max(interval, self.min_interval), self.max_interval)
+            ttl = self._client.feed_ttl(feed_code)
+            if self.respect_ttl and ttl is not None:
+                interval = max(interval, ttl * 60)
+            self._schedule(feed_code, now + interval * (1 + self.jitter * self._random.random()))
+
+    def _reschedule_failure(self, feed_code, exc):
+        # The feed is rescheduled before the error handler runs, as the handler may raise
+        with self._lock:
+            if feed_code in self._cadences:
+                failures = self._failures.get(feed_code, 0) + 1
+                self._failures[feed_code] = failures
+                interval = min(self.min_interval * 2 ** (failures - 1), self.max_interval)
+                self._schedule(feed_code, self._clock() + interval * (1 + self.jitter * self._random.random()))
+        if self._on_error is not None:
+            self._on_error(feed_code, exc)
+        else:
+            logging.warning("Error polling feed %s: %s" % (feed_code, exc))
+
+    def _schedule(self, feed_code, due):
+        self._due[feed_code] = due
+        heapq.heappush(self._queue, (due, next(self._sequence), feed_code))
+
+    def _peek(self):
+        # Entries of removed or rescheduled feeds are dropped lazily
+        while self._queue:
+            due, _, feed_code = self._queue[0]
+            if self._due.get(feed_code) == due:
+                return self._queue[0]
+            heapq.heappop(self._queue)
+        return None
+
+    def __contains__(self, feed_code):
+        return feed_code in self._due
+
+    def __len__(self):
+        return len(self._due)
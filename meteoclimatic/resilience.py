@@ -0,0 +1,306 @@
+import math
+import random
+import threading
+import time
+from http.client import HTTPException
+from urllib.parse import urlsplit
+
+from meteoclimatic.exceptions import CircuitOpen, ServiceUnavailable
+from meteoclimatic.transport import DEFAULT_TIMEOUT, PooledTransport
+
+# Statuses worth retrying: rate limited, and server errors that may be transient
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket(object):
+    """
+    Thread-safe token bucket limiting the rate of requests. Share a single
+    instance between transports or clients to enforce a global rate.
+
+    :param rate: tokens added per second, i.e. sustained requests per second
+    :type rate: `float`
+    :param capacity: maximum number of tokens, i.e. size of the bursts, the
+        rate rounded up if None
+    :type capacity: `float`
+    :param clock: function returning a monotonic time in seconds
+    :type clock: callable
+    :param sleep: function sleeping a number of seconds
+    :type sleep: callable
+    :returns: a *TokenBucket* instance
+    :raises: *ValueError* when *rate* is not a positive number
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        """Initialize the class."""
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1, math.ceil(rate))
+        self.throttled = 0
+        self.throttled_seconds = 0.0
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Takes a token, waiting until one is available.
+        :returns: the seconds waited
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Tokens are taken immediately, so the waits of concurrent callers queue up
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            if wait > 0:
+                self.throttled += 1
+                self.throttled_seconds += wait
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    @property
+    def throttling(self):
+        """Whether the next request would have to wait for a token."""
+        with self._lock:
+            return self._tokens + (self._clock() - self._updated) * self.rate < 1
+
+
+class CircuitBreaker(object):
+    """
+    Circuit breaker of a host. After *failure_threshold* consecutive failures
+    the circuit opens and requests fail fast for *reset_timeout* seconds. Then
+    a single trial request is let through: the circuit closes if it succeeds
+    and opens again if it fails.
+
+    :param failure_threshold: consecutive failures opening the circuit
+    :type failure_threshold: `int`
+    :param reset_timeout: seconds the circuit stays open
+    :type reset_timeout: `float`
+    :param clock: function returning a monotonic time in seconds
+    :type clock: callable
+    :returns: a *CircuitBreaker* instance
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, clock=time.monotonic):
+        """Initialize the class."""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = None
+        self._trial = False
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """State of the circuit, one of *CLOSED*, *OPEN* or *HALF_OPEN*."""
+        with self._lock:
+            if self._opened_at is None:
+                return self.CLOSED
+            if self._clock() - self._opened_at < self.reset_timeout:
+                return self.OPEN
+            return self.HALF_OPEN
+
+    def allow(self):
+        """
+        Tells whether a request can be sent, letting a single trial request
+        through once the reset timeout has elapsed.
+        :returns: a `bool`
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial or self._clock() - self._opened_at < self.reset_timeout:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        """Closes the circuit."""
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def release_trial(self):
+        """
+        Lets another trial request through, without counting a failure, when
+        the pending one ended for a reason unrelated to the host.
+        """
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self):
+        """Counts a failure, opening the circuit when the threshold is reached."""
+        with self._lock:
+            self.failures += 1
+            if self._trial or (self._opened_at is None and self.failures >= self.failure_threshold):
+                self._opened_at = self._clock()
+                self._trial = False
+                self.opened += 1
+
+
+class ResilientTransport(object):
+    """
+    Transport wrapper protecting the client, and the service, from slowdowns
+    and outages. Requests are throttled by an optional *TokenBucket*, retried
+    with exponential backoff and jitter on connection errors, timeouts and
+    `429`/`5xx` responses, and fail fast with *CircuitOpen* while the circuit
+    breaker of their host is open.
+
+    When the retries are exhausted, connection errors and timeouts are raised
+    as *ServiceUnavailable* and error responses are returned to the client.
+
+    :param transport: wrapped transport, a *PooledTransport* with *timeout* if None
+    :type transport: *PooledTransport* or compatible object
+    :param rate_limiter: limiter of the request rate, no limit if None
+    :type rate_limiter: *TokenBucket*
+    :param retries: maximum number of retries of a request
+    :type retries: `int`
+    :param backoff_factor: seconds waited before the first retry, doubled on
+        every following retry
+    :type backoff_factor: `float`
+    :param max_backoff: maximum seconds waited before a retry
+    :type max_backoff: `float`
+    :param failure_threshold: consecutive failures opening the circuit of a host
+    :type failure_threshold: `int`
+    :param reset_timeout: seconds the circuit of a host stays open
+    :type reset_timeout: `float`
+    :param timeout: socket timeout in seconds of the default transport
+    :type timeout: `float`
+    :param clock: function returning a monotonic time in seconds
+    :type clock: callable
+    :param sleep: function sleeping a number of seconds
+    :type sleep: callable
+    :returns: a *ResilientTransport* instance
+    """
+
+    def __init__(self, transport=None, rate_limiter=None, retries=3, backoff_factor=0.5, max_backoff=10.0,
+                 failure_threshold=5, reset_timeout=30, timeout=DEFAULT_TIMEOUT, clock=time.monotonic, sleep=time.sleep):
+        """Initialize the class."""
+        self._transport = transport if transport is not None else PooledTransport(timeout=timeout)
+        self.rate_limiter = rate_limiter
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.requests = 0
+        self.retried = 0
+        self.failed = 0
+        self.rejected = 0
+        self._breakers = {}
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def request(self, url, headers=None):
+        """
+        Sends a GET request.
+        :param url: URL of the request
+        :type url: `str`
+        :param headers: additional HTTP headers of the request
+        :type headers: `dict`
+        :returns: a *TransportResponse* instance
+        :raises: *CircuitOpen* while the circuit of the host is open,
+            *ServiceUnavailable* when the host cannot be reached
+        """
+        host = urlsplit(url).netloc
+        breaker = self.circuit_breaker(host)
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                self._count("rejected")
+                raise CircuitOpen(host)
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            self._count("requests")
+
+            try:
+                response = self._transport.request(url, headers)
+            except (HTTPException, OSError) as exc:
+                breaker.record_failure()
+                if attempt >= self.retries:
+                    self._count("failed")
+                    raise ServiceUnavailable("Error connecting to %s: %s" % (host, exc)) from exc
+                delay = self._backoff(attempt)
+            except BaseException:
+                # Interruptions and bugs of the transport say nothing about the host, but
+                # a trial request of a half-open circuit must not be left pending
+                breaker.release_trial()
+                raise
+            else:
+                if response.status not in _RETRY_STATUSES:
+                    breaker.record_success()
+                    return response
+                breaker.record_failure()
+                if attempt >= self.retries:
+                    self._count("failed")
+                    return response
+                delay = self._backoff(attempt, response.headers.get("retry-after"))
+                # Reading the error page lets the transport reuse the connection
+                response.read()
+                response.close()
+
+            self._count("retried")
+            self._sleep(delay)
+            attempt += 1
+
+    def circuit_breaker(self, host):
+        """
+        Returns the circuit breaker of a host.
+        :param host: host, and port if any, of the service
+        :type host: `str`
+        :returns: a *CircuitBreaker* instance
+        """
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout, self._clock)
+                self._breakers[host] = breaker
+            return breaker
+
+    def counters(self):
+        """
+        Returns the counters of the transport, of its rate limiter and of the
+        circuit breakers.
+        :returns: a `dict` of counters keyed by name
+        """
+        with self._lock:
+            breakers = list(self._breakers.values())
+            counters = {"requests": self.requests, "retried": self.retried, "failed": self.failed,
+                        "rejected": self.rejected}
+        counters["circuits_opened"] = sum(breaker.opened for breaker in breakers)
+        counters["circuits_open"] = sum(1 for breaker in breakers if breaker.state != CircuitBreaker.CLOSED)
+        if self.rate_limiter is not None:
+            counters["throttled"] = self.rate_limiter.throttled
+            counters["throttled_seconds"] = self.rate_limiter.throttled_seconds
+        return counters
+
+    def close(self):
+        """Closes the wrapped transport, if it can be closed."""
+        close = getattr(self._transport, "close", None)
+        if close is not None:
+            close()
+
+    def _backoff(self, attempt, retry_after=None):
+        delay = min(self.max_backoff, self.backoff_factor * 2 ** attempt)
+        # Jitter keeps the retries of concurrent workers from hitting the service at once
+        delay *= 0.5 + random.random() / 2
+        if retry_after is not None and retry_after.strip().isdigit():
+            delay = max(delay, min(self.max_backoff, float(retry_after)))
+        return delay
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+
+
+class _Flight(object):
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent calls made with the same key, so only the first
+    caller runs the function and the callers arriving while it runs wait for
+    it and share its result, or its exception. Calls made after it returned
+    run the function again.
+    """
+
+    def __init__(self):
+        """Initialize the class."""
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function, *args):
+        """
+        Calls a function, unless a call with the same key is in flight.
+        :param key: key identifying the call
+        :type key: hashable
+        :param function: function called with *args*
+        :type function: callable
+        :returns: the result of the function
+        :raises: the exception raised by the function
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.waiters += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = function(*args)
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def waiters(self, key):
+        """
+        Returns the number of callers waiting for a call in flight.
+        :param key: key identifying the call
+        :type key: hashable
+        :returns: an `int`, zero if no call with that key is in flight
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            return flight.waiters if flight is not None else 0
+
+
+class AsyncSingleFlight(object):
+    """
+    Asyncio flavour of *SingleFlight*: concurrent coroutines awaiting calls
+    with the same key share a single task. A caller being cancelled does not
+    cancel the task the other callers are waiting for.
+    """
+
+    def __init__(self):
+        """Initialize the class."""
+        self._flights = {}
+
+    async def do(self, key, function, *args):
+        """
+        Awaits a coroutine function, unless a call with the same key is in flight.
+        :param key: key identifying the call
+        :type key: hashable
+        :param function: coroutine function called with *args*
+        :type function: callable
+        :returns: the result of the coroutine
+        :raises: the exception raised by the coroutine
+        """
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(function(*args))
+            self._flights[key] = task
+            task.add_done_callback(lambda _: self._land(key, task))
+        return await asyncio.shield(task)
+
+    def _land(self, key, task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+
+    def in_flight(self, key):
+        """
+        Tells whether a call with a key is in flight.
+        :param key: key identifying the call
+        :type key: hashable
+        :returns: a `bool`
+        """
+        return key in self._flights
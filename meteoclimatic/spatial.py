@@ -0,0 +1,159 @@
+import math
+import threading
+from collections import namedtuple
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Distance along a meridian covered by one degree of latitude
+_KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180.0
+
+NearbyStation = namedtuple("NearbyStation", ["station", "distance"])
+NearbyStation.__doc__ = """A *Station* and its great-circle distance in km to the queried point."""
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Return the great-circle distance in km between two points given in decimal degrees."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2 +
+         math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class StationIndex(object):
+    """
+    Spatial index of stations, bucketing them in a grid of *cell_size* degree
+    cells. Radius queries only measure the distance to the stations of the
+    cells overlapping the bounding box of the search circle, so they do not
+    scan every indexed station. Stations without coordinates are ignored.
+
+    :param cell_size: size of the grid cells in degrees
+    :type cell_size: `float`
+    :returns: a *StationIndex* instance
+    :raises: *ValueError* when *cell_size* is not a positive number
+    """
+
+    def __init__(self, cell_size=0.25):
+        """Initialize the class."""
+        if cell_size <= 0:
+            raise ValueError("cell_size must be greater than 0")
+        self.cell_size = cell_size
+        self._columns = int(math.ceil(360.0 / cell_size))
+        self._cells = {}
+        self._stations = {}
+        self._lock = threading.Lock()
+
+    def add(self, station):
+        """
+        Adds a station to the index, replacing any station with the same code.
+        :param station: the station
+        :type station: *Station*
+        """
+        if station.latitude is None or station.longitude is None:
+            return
+        key = self._cell(station.latitude, station.longitude)
+        with self._lock:
+            previous = self._stations.get(station.code)
+            if previous is not None and previous[0] is station:
+                return
+            if previous is not None:
+                self._cells[previous[1]].pop(station.code, None)
+            self._stations[station.code] = (station, key)
+            self._cells.setdefault(key, {})[station.code] = station
+
+    def update(self, stations):
+        """
+        Adds several stations to the index.
+        :param stations: the stations
+        :type stations: iterable of *Station*
+        """
+        for station in stations:
+            self.add(station)
+
+    def near(self, latitude, longitude, radius_km):
+        """
+        Returns the stations within a distance of a point.
+        :param latitude: latitude of the point in decimal degrees
+        :type latitude: `float`
+        :param longitude: longitude of the point in decimal degrees
+        :type longitude: `float`
+        :param radius_km: search radius in km
+        :type radius_km: `float`
+        :returns: a `list` of *NearbyStation* tuples sorted by distance
+        """
+        result = []
+        for station in self._candidates(latitude, longitude, radius_km):
+            distance = haversine_km(latitude, longitude, station.latitude, station.longitude)
+            if distance <= radius_km:
+                result.append(NearbyStation(station, distance))
+        result.sort(key=lambda nearby: nearby.distance)
+        return result
+
+    def nearest(self, latitude, longitude, k=1):
+        """
+        Returns the stations closest to a point. The search radius starts at
+        the size of a cell and is doubled until *k* stations are found.
+        :param latitude: latitude of the point in decimal degrees
+        :type latitude: `float`
+        :param longitude: longitude of the point in decimal degrees
+        :type longitude: `float`
+        :param k: number of stations to return
+        :type k: `int`
+        :returns: a `list` of at most *k* *NearbyStation* tuples sorted by distance
+        """
+        radius_km = self.cell_size * _KM_PER_DEGREE
+        while True:
+            result = self.near(latitude, longitude, radius_km)
+            if len(result) >= k or radius_km >= math.pi * EARTH_RADIUS_KM:
+                return result[:k]
+            radius_km *= 2
+
+    def _candidates(self, latitude, longitude, radius_km):
+        lat_delta = radius_km / _KM_PER_DEGREE
+        south, north = latitude - lat_delta, latitude + lat_delta
+        if south <= -90.0 or north >= 90.0:
+            # The circle contains a pole, so it spans every longitude
+            columns = None
+        else:
+            # Widest longitude span of a circle of that angular radius around the point
+            lon_delta = math.degrees(math.asin(min(1.0, math.sin(math.radians(lat_delta)) / math.cos(math.radians(latitude)))))
+            columns = self._column_range(longitude - lon_delta, longitude + lon_delta)
+        rows = range(self._row(south), self._row(north) + 1)
+
+        candidates = []
+        with self._lock:
+            if columns is not None and len(rows) * len(columns) < len(self._cells):
+                for row in rows:
+                    for column in columns:
+                        stations = self._cells.get((row, column))
+                        if stations:
+                            candidates.extend(stations.values())
+            else:
+                # Cheaper to filter the occupied cells than to visit every cell of the box
+                for (row, column), stations in self._cells.items():
+                    if row in rows and (columns is None or column in columns):
+                        candidates.extend(stations.values())
+        return candidates
+
+    def _column_range(self, west, east):
+        if east - west >= 360.0:
+            return None
+        first, last = self._column(west), self._column(east)
+        if first <= last:
+            return range(first, last + 1)
+        # The box crosses the antimeridian
+        return set(range(first, self._columns)) | set(range(0, last + 1))
+
+    def _cell(self, latitude, longitude):
+        return self._row(latitude), self._column(longitude)
+
+    def _row(self, latitude):
+        return int(math.floor(latitude / self.cell_size))
+
+    def _column(self, longitude):
+        return int(math.floor((longitude + 180.0) / self.cell_size)) % self._columns
+
+    def __contains__(self, station_code):
+        return station_code in self._stations
+
+    def __len__(self):
+        return len(self._stations)
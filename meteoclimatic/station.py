@@ -8,11 +8,18 @@ class Station:
     :type code: `str`
     :param url: URL of the station
     :type url: `str`
+    :param latitude: Latitude of the station in decimal degrees
+    :type latitude: `float`
+    :param longitude: Longitude of the station in decimal degrees
+    :type longitude: `float`
     :returns: a *Station* instance
-    :raises: *ValueError* when invalid empty or null values are provided
+    :raises: *ValueError* when invalid empty or null values are provided, or
+        when the coordinates are out of range
     """
 
-    def __init__(self, name: str, code: str, url: str):
+    __slots__ = ("name", "code", "url", "latitude", "longitude")
+
+    def __init__(self, name: str, code: str, url: str, latitude: float = None, longitude: float = None):
         """Initialize the class."""
         if name is None or len(name) == 0:
             raise ValueError("Station name cannot be empty")
@@ -23,14 +30,24 @@ class Station:
         self.code = code
         self.url = url
 
+        if latitude is not None and (latitude < -90.0 or latitude > 90.0):
+            raise ValueError("latitude must be between -90 and 90")
+        self.latitude = latitude
+
+        if longitude is not None and (longitude < -180.0 or longitude > 180.0):
+            raise ValueError("longitude must be between -180 and 180")
+        self.longitude = longitude
+
     def __eq__(self, other):
         if not isinstance(other, Station):
             return NotImplemented
-        prop_names = list(self.__dict__)
-        for prop in prop_names:
-            if self.__dict__[prop] != other.__dict__[prop]:
+        for prop in self.__slots__:
+            if getattr(self, prop) != getattr(other, prop):
                 return False
         return True
 
     def __repr__(self):
-        return "%s(%r)" % (self.__class__, self.__dict__)
+        return "%s(%r)" % (self.__class__, {prop: getattr(self, prop) for prop in self.__slots__})
+
+    def __reduce__(self):
+        return (Station, tuple(getattr(self, name) for name in Station.__slots__))
@@ -0,0 +1,161 @@
+import gzip
+import hashlib
+import json
+import logging
+import threading
+from collections import namedtuple
+
+from meteoclimatic.observation import Observation
+
+_STATE_VERSION = 1
+
+# Validators of the last response of a feed URL seen by the tracker
+FeedValidators = namedtuple("FeedValidators", ["etag", "last_modified"])
+
+
+class ObservationTracker(object):
+    """
+    Tracker of the observations already seen for every station, used to emit
+    only the stations whose data changed since the previous poll.
+
+    For each station it remembers the `guid` and publication date of the last
+    item emitted and a hash of its data block. Items with the same data block
+    are skipped without being parsed, and items published before the last one
+    emitted are ignored. The state can be saved and loaded, so a restarted
+    process does not emit every station again.
+
+    :param state: state returned by *state*, empty if None
+    :type state: `dict`
+    :returns: an *ObservationTracker* instance
+    :raises: *ValueError* when the state is not valid
+    """
+
+    def __init__(self, state=None):
+        """Initialize the class."""
+        self._stations = {}
+        self._feeds = {}
+        self._lock = threading.Lock()
+        if state is not None:
+            if not isinstance(state, dict) or state.get("version") != _STATE_VERSION:
+                raise ValueError("Unsupported observation tracker state")
+            self._stations = {code: tuple(seen) for code, seen in state["stations"].items()}
+            self._feeds = {url: FeedValidators(*validators) for url, validators in state["feeds"].items()}
+
+    def changes(self, feed_items):
+        """
+        Yields the observations of the feed items that are new or changed, and
+        remembers them. Items that cannot be parsed are skipped.
+        :param feed_items: the input RSS feed items
+        :type feed_items: iterable of `meteoclimatic.feed.FeedItem`
+        :returns: an iterator of *Observation* instances
+        """
+        for item in feed_items:
+            block = _data_block(item.description)
+            if block is None:
+                logging.warning("Skipping unparseable feed item: Could not parse station information")
+                continue
+            station_code = block[3:block.find(";")]
+            digest = hashlib.blake2b(block.encode("utf-8"), digest_size=8).hexdigest()
+            with self._lock:
+                seen = self._stations.get(station_code)
+            if seen is not None and seen[2] == digest:
+                continue
+
+            try:
+                observation = Observation.from_feed_item(item)
+            except ValueError as exc:
+                logging.warning("Skipping unparseable feed item: %s" % (exc, ))
+                continue
+            published = observation.reception_time.timestamp()
+            if seen is not None and published < seen[1]:
+                # Older than the last observation emitted, e.g. out of a stale cached feed
+                continue
+            with self._lock:
+                self._stations[station_code] = (item.guid, published, digest)
+            yield observation
+
+    def get_validators(self, url):
+        """
+        Returns the validators of the last response of a feed seen by the tracker.
+        :param url: URL of the feed
+        :type url: `str`
+        :returns: a *FeedValidators* tuple, or None if unknown
+        """
+        return self._feeds.get(url)
+
+    def set_validators(self, url, etag, last_modified):
+        """
+        Remembers the validators of the last response of a feed.
+        :param url: URL of the feed
+        :type url: `str`
+        :param etag: value of the `ETag` header, if any
+        :type etag: `str`
+        :param last_modified: value of the `Last-Modified` header, if any
+        :type last_modified: `str`
+        """
+        with self._lock:
+            if etag is None and last_modified is None:
+                self._feeds.pop(url, None)
+            else:
+                self._feeds[url] = FeedValidators(etag, last_modified)
+
+    def forget(self, station_code):
+        """
+        Forgets a station, so its next observation is emitted again.
+        :param station_code: code of the station
+        :type station_code: `str`
+        """
+        with self._lock:
+            self._stations.pop(station_code, None)
+            # A 304 response would hide the observation of the station
+            self._feeds.clear()
+
+    def state(self):
+        """
+        Returns the state of the tracker, which can be serialized to JSON.
+        :returns: a `dict`
+        """
+        with self._lock:
+            return {"version": _STATE_VERSION,
+                    "stations": {code: list(seen) for code, seen in self._stations.items()},
+                    "feeds": {url: list(validators) for url, validators in self._feeds.items()}}
+
+    def save(self, path):
+        """
+        Saves the state of the tracker.
+        :param path: path of the state file
+        :type path: `str`
+        """
+        state = self.state()
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(state, f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a tracker out of a state file saved with *save*.
+        :param path: path of the state file
+        :type path: `str`
+        :returns: an *ObservationTracker* instance
+        :raises: *ValueError* when the file is not a valid state
+        """
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def __contains__(self, station_code):
+        return station_code in self._stations
+
+    def __len__(self):
+        return len(self._stations)
+
+
+def _data_block(description):
+    # "[[<CODE;(...);...;Name" line following the "[[<BEGIN:CODE:DATA>]]" marker, which
+    # is the whole description of the items of the raw parser engine
+    if description is None:
+        return None
+    start = description.find("[[<", description.find("[[<BEGIN:") + 1)
+    end = description.find(">]]", start)
+    if start < 0 or end < 0 or description.find(";", start, end) < 0:
+        return None
+    return description[start:end]
@@ -0,0 +1,225 @@
+import threading
+import zlib
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
+from urllib.parse import urljoin, urlsplit
+
+_USER_AGENT = "pymeteoclimatic"
+_MAX_REDIRECTS = 5
+_REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+# Seconds a connection or a read can block, so a stalled service cannot hang the client
+DEFAULT_TIMEOUT = 30
+
+
+class TransportResponse(object):
+    """
+    Response returned by the transports of *MeteoclimaticClient*. The body is
+    transparently decoded when it was sent with gzip or deflate encoding.
+
+    :param status: HTTP status code of the response
+    :type status: `int`
+    :param headers: HTTP headers of the response
+    :type headers: `dict`
+    :param stream: binary file-like object with the raw body of the response
+    :type stream: file-like object
+    :param on_close: called with the response when it is closed
+    :type on_close: callable
+    :returns: a *TransportResponse* instance
+
+    :ivar received: bytes of the body read so far, before decoding
+    :vartype received: `int`
+    """
+
+    def __init__(self, status, headers, stream, on_close=None):
+        """Initialize the class."""
+        self.status = status
+        self.headers = {name.lower(): value for name, value in headers.items()}
+        self.closed = False
+        self._stream = stream
+        self._on_close = on_close
+        self._decoder = _content_decoder(self.headers.get("content-encoding"))
+        self._eof = False
+        self.received = 0
+
+    def read(self, amt=-1):
+        """
+        Reads the decoded body of the response.
+        :param amt: maximum number of raw bytes to read, everything if negative
+        :type amt: `int`
+        :returns: the decoded `bytes`, empty at the end of the body
+        """
+        if self._eof:
+            return b""
+        if self._decoder is None:
+            data = self._stream.read() if amt is None or amt < 0 else self._stream.read(amt)
+            self.received += len(data)
+            self._eof = len(data) == 0 or amt is None or amt < 0
+            return data
+
+        # A compressed chunk may not be enough to produce decoded output, keep
+        # reading so that an empty result always means the end of the body
+        while True:
+            raw = self._stream.read() if amt is None or amt < 0 else self._stream.read(amt)
+            if not raw:
+                self._eof = True
+                return self._decoder.flush()
+            self.received += len(raw)
+            data = self._decoder.decompress(raw)
+            if amt is None or amt < 0:
+                self._eof = True
+                return data + self._decoder.flush()
+            if data:
+                return data
+
+    def close(self):
+        """Releases the resources of the response."""
+        if self.closed:
+            return
+        self.closed = True
+        if self._on_close is not None:
+            self._on_close(self)
+        else:
+            self._stream.close()
+
+
+class PooledTransport(object):
+    """
+    Default transport of *MeteoclimaticClient*. Connections are kept alive and
+    reused through a thread-safe per-host pool, so consecutive requests to the
+    same host do not pay a new TCP and TLS handshake. Feeds are requested with
+    gzip and deflate encodings to reduce the size of the payloads.
+
+    Any object providing a `request(url, headers=None)` method returning a
+    *TransportResponse* can be used as a transport instead.
+
+    :param max_idle_connections: maximum number of idle connections kept per host
+    :type max_idle_connections: `int`
+    :param timeout: socket timeout in seconds, the global socket default if None
+    :type timeout: `float`
+    :returns: a *PooledTransport* instance
+    """
+
+    def __init__(self, max_idle_connections=10, timeout=DEFAULT_TIMEOUT):
+        """Initialize the class."""
+        self._max_idle_connections = max_idle_connections
+        self._timeout = timeout
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def request(self, url, headers=None):
+        """
+        Sends a GET request.
+        :param url: URL of the request
+        :type url: `str`
+        :param headers: additional HTTP headers of the request
+        :type headers: `dict`
+        :returns: a *TransportResponse* instance
+        :raises: *OSError* or *http.client.HTTPException* on connection errors
+        """
+        request_headers = {"Accept-Encoding": "gzip, deflate", "User-Agent": _USER_AGENT}
+        request_headers.update(headers or {})
+
+        for _ in range(_MAX_REDIRECTS):
+            response = self._request(url, request_headers)
+            location = response.headers.get("location")
+            if response.status not in _REDIRECT_STATUSES or location is None:
+                return response
+            response.read()
+            response.close()
+            url = urljoin(url, location)
+        return response
+
+    def close(self):
+        """Closes every idle connection of the pool."""
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for connections in pools.values():
+            for connection in connections:
+                connection.close()
+
+    def _request(self, url, headers):
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+
+        connection, reused = self._acquire(key)
+        try:
+            response = self._send(connection, path, headers)
+        except (HTTPException, OSError):
+            connection.close()
+            if not reused:
+                raise
+            # The server may have dropped the idle connection, retry on a new one
+            connection = self._connect(key)
+            response = self._send(connection, path, headers)
+
+        def release(transport_response):
+            self._release(key, connection, response)
+
+        return TransportResponse(response.status, response.headers, response, on_close=release)
+
+    @staticmethod
+    def _send(connection, path, headers):
+        connection.request("GET", path, headers=headers)
+        return connection.getresponse()
+
+    def _acquire(self, key):
+        with self._lock:
+            idle = self._pools.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._connect(key), False
+
+    def _connect(self, key):
+        scheme, host, port = key
+        connection_class = HTTPSConnection if scheme == "https" else HTTPConnection
+        if self._timeout is None:
+            return connection_class(host, port)
+        return connection_class(host, port, timeout=self._timeout)
+
+    def _release(self, key, connection, response):
+        if response.length == 0:
+            # Responses without body, e.g. 304 Not Modified, are complete once read
+            response.read()
+        # The connection can only be reused once its response is fully read
+        if not response.isclosed() or response.will_close:
+            response.close()
+            connection.close()
+            return
+        with self._lock:
+            idle = self._pools.setdefault(key, [])
+            if len(idle) < self._max_idle_connections:
+                idle.append(connection)
+                return
+        connection.close()
+
+
+def _content_decoder(content_encoding):
+    if content_encoding is None:
+        return None
+    content_encoding = content_encoding.strip().lower()
+    if content_encoding in ("gzip", "x-gzip"):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if content_encoding == "deflate":
+        return _DeflateDecoder()
+    return None
+
+
+class _DeflateDecoder(object):
+    """Decoder of deflate bodies, which some servers send without zlib header."""
+
+    def __init__(self):
+        self._decompressor = zlib.decompressobj()
+        self._first_chunk = True
+
+    def decompress(self, data):
+        if self._first_chunk:
+            self._first_chunk = False
+            try:
+                return self._decompressor.decompress(data)
+            except zlib.error:
+                self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._decompressor.decompress(data)
+
+    def flush(self):
+        return self._decompressor.flush()
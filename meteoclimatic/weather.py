@@ -21,6 +21,35 @@ class Condition(AutoName):
     storm = auto()
 
 
+# Valid (minimum, maximum) values of the ranged quantities, and the error raised
+# otherwise, checked by Weather, LazyWeather and ObservationBatch
+RANGES = {
+    "humidity_current": (0.0, 100.0, "humidity must be between 0 and 100"),
+    "humidity_max": (0.0, 100.0, "humidity must be between 0 and 100"),
+    "humidity_min": (0.0, 100.0, "humidity must be between 0 and 100"),
+    "wind_current": (0.0, float("inf"), "wind must be greatear than 0"),
+    "wind_max": (0.0, float("inf"), "wind must be greatear than 0"),
+    "wind_bearing": (0.0, 360.0, "wind bearing must be between 0 and 360"),
+    "rain": (0.0, float("inf"), "rain must be greatear than 0"),
+}
+
+
+def check_range(name, value):
+    """
+    Validates the value of a weather quantity.
+    :param name: name of the *Weather* attribute
+    :type name: `str`
+    :param value: the value, None when not provided
+    :type value: `float`
+    :returns: the value
+    :raises: *ValueError* when the value is out of the range of the quantity
+    """
+    limits = RANGES.get(name)
+    if value is not None and limits is not None and (value < limits[0] or value > limits[1]):
+        raise ValueError(limits[2])
+    return value
+
+
 class Weather:
     """
     A class encapsulating raw weather data.
@@ -60,6 +89,13 @@ class Weather:
         quantities
     """
 
+    __slots__ = ("reference_time", "condition",
+                 "temp_current", "temp_max", "temp_min",
+                 "humidity_current", "humidity_max", "humidity_min",
+                 "pressure_current", "pressure_max", "pressure_min",
+                 "wind_current", "wind_max", "wind_bearing",
+                 "rain")
+
     def __init__(self, reference_time: datetime, condition: Condition,
                  temp_current: float, temp_max: float, temp_min: float,
                  humidity_current: float, humidity_max: float, humidity_min: float,
@@ -78,39 +114,31 @@ class Weather:
         self.temp_max = temp_max
         self.temp_min = temp_min
 
-        for humidity in [humidity_current, humidity_max, humidity_min]:
-            if humidity is not None and (humidity < 0.0 or humidity > 100.0):
-                raise ValueError("humidity must be between 0 and 100")
-        self.humidity_current = humidity_current
-        self.humidity_max = humidity_max
-        self.humidity_min = humidity_min
+        self.humidity_current = check_range("humidity_current", humidity_current)
+        self.humidity_max = check_range("humidity_max", humidity_max)
+        self.humidity_min = check_range("humidity_min", humidity_min)
 
         self.pressure_current = pressure_current
         self.pressure_max = pressure_max
         self.pressure_min = pressure_min
 
-        for wind in [wind_current, wind_max]:
-            if wind is not None and wind < 0.0:
-                raise ValueError("wind must be greatear than 0")
-        self.wind_current = wind_current
-        self.wind_max = wind_max
-
-        if wind_bearing is not None and (wind_bearing < 0.0 or wind_bearing > 360.0):
-            raise ValueError("wind bearing must be between 0 and 360")
-        self.wind_bearing = wind_bearing
+        self.wind_current = check_range("wind_current", wind_current)
+        self.wind_max = check_range("wind_max", wind_max)
+        self.wind_bearing = check_range("wind_bearing", wind_bearing)
 
-        if rain is not None and rain < 0.0:
-            raise ValueError("rain must be greatear than 0")
-        self.rain = rain
+        self.rain = check_range("rain", rain)
 
     def __eq__(self, other):
         if not isinstance(other, Weather):
             return NotImplemented
-        prop_names = list(self.__dict__)
-        for prop in prop_names:
-            if self.__dict__[prop] != other.__dict__[prop]:
+        for prop in Weather.__slots__:
+            if getattr(self, prop) != getattr(other, prop):
                 return False
         return True
 
     def __repr__(self):
-        return "%s(%r)" % (self.__class__, self.__dict__)
+        return "%s(%r)" % (self.__class__, {prop: getattr(self, prop) for prop in Weather.__slots__})
+
+    def __reduce__(self):
+        # Classes with __slots__ and no __dict__ cannot be pickled with protocols 0 and 1
+        return (Weather, tuple(getattr(self, name) for name in Weather.__slots__))
@@ -18,6 +18,10 @@ setup(
     install_requires=['lxml>=4.5',
                       'beautifulsoup4>=4.9'
                       ],
+    extras_require={'numpy': ['numpy>=1.19'],
+                    'pandas': ['numpy>=1.19', 'pandas>=1.0'],
+                    'arrow': ['numpy>=1.19', 'pyarrow>=1.0'],
+                    'prometheus': ['prometheus_client>=0.8']},
     python_requires='>=3.8',
     classifiers=[
         "License :: OSI Approved :: MIT License",
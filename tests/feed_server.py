@@ -0,0 +1,133 @@
+import gzip
+import hashlib
+import io
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from meteoclimatic.transport import TransportResponse
+
+_feeds_dir = os.path.join(os.path.dirname(__file__), "feeds")
+
+
+_last_modified = "Thu, 04 Jun 2020 10:58:23 GMT"
+
+
+def read_feed(file_name):
+    with open(os.path.join(_feeds_dir, file_name), "rb") as f:
+        return f.read()
+
+
+def feed_etag(body):
+    return '"%s"' % (hashlib.md5(body).hexdigest(), )
+
+
+def is_not_modified(body, headers):
+    # If-Modified-Since is ignored when If-None-Match is given (RFC 7232)
+    if "If-None-Match" in headers:
+        return headers["If-None-Match"] == feed_etag(body)
+    return headers.get("If-Modified-Since") == _last_modified
+
+
+class FeedTransport(object):
+    """
+    In-memory transport serving the files of the tests/feeds directory. Unknown
+    codes get an empty feed. Feeds are served with `ETag` and `Last-Modified`
+    headers, and conditional requests get a `304 Not Modified` response.
+
+    :param feeds: file name or `bytes` of the feed, HTTP error status, or
+        exception raised by the request, served for each feed code
+    :type feeds: `dict`
+    """
+
+    def __init__(self, feeds):
+        self.feeds = feeds
+        self.urls = []
+        self.headers = []
+
+    def request(self, url, headers=None):
+        self.urls.append(url)
+        self.headers.append(headers or {})
+        feed = self.feeds.get(url.rsplit("/", 1)[-1])
+        if isinstance(feed, Exception):
+            raise feed
+        if isinstance(feed, int):
+            return TransportResponse(feed, {}, io.BytesIO(b""))
+        if feed is None:
+            body = b""
+        else:
+            body = feed if isinstance(feed, bytes) else read_feed(feed)
+        if is_not_modified(body, headers or {}):
+            return TransportResponse(304, {}, io.BytesIO(b""))
+        return TransportResponse(200, {"ETag": feed_etag(body), "Last-Modified": _last_modified}, io.BytesIO(body))
+
+
+class FeedServer(object):
+    """
+    Local HTTP stand-in for the Meteoclimatic service, serving the files of the
+    tests/feeds directory. Unknown codes get an empty feed. Feeds are served with
+    `ETag` and `Last-Modified` headers, and conditional requests get a
+    `304 Not Modified` response.
+
+    :param feeds: file name of the feed, or HTTP error status, served for each
+        feed code
+    :type feeds: `dict`
+    """
+
+    def __init__(self, feeds, compress=False):
+        self.feeds = feeds
+        self.compress = compress
+        self.requests = []
+        self.connections = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05, ), daemon=True)
+
+    @property
+    def base_url(self):
+        return "http://127.0.0.1:%d/feed/rss/{station_code}" % (self._server.server_address[1], )
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                server.connections += 1
+
+            def do_GET(self):
+                server.requests.append(self.path)
+                feed_code = self.path.rsplit("/", 1)[-1]
+                if isinstance(server.feeds.get(feed_code), int):
+                    self.send_error(server.feeds[feed_code])
+                    return
+                body = read_feed(server.feeds[feed_code]) if feed_code in server.feeds else b""
+                if is_not_modified(body, self.headers):
+                    self.send_response(304)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/rss+xml")
+                self.send_header("ETag", feed_etag(body))
+                self.send_header("Last-Modified", _last_modified)
+                if server.compress and "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip.compress(body)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,108 @@
+import os
+from datetime import datetime, timedelta, timezone
+import pytest
+from meteoclimatic import Condition, Observation, Station, Weather
+from meteoclimatic.parser import iter_feed_items
+from tests.feed_server import read_feed
+
+np = pytest.importorskip("numpy")
+from meteoclimatic.archive import ObservationArchive  # noqa: E402
+from meteoclimatic.batch import ObservationBatch  # noqa: E402
+
+
+def _observation(station_code, reception_time, temperature=20.0, condition=Condition.sun, name="Reus - Nord"):
+    station = Station(name, station_code, "http://www.meteoclimatic.net/perfil/%s" % (station_code, ), 41.2, 1.1)
+    weather = Weather(reception_time, condition, temperature, 25.0, 15.0, 50.0, None, 40.0, 1015.0, 1016.0, 1014.0,
+                      5.0, 10.0, 180.0, None)
+    return Observation(reception_time, station, weather)
+
+
+def _by_partition(observations):
+    return sorted(observations, key=lambda o: (o.reception_time.astimezone(timezone.utc).date(), o.station.code))
+
+
+_START = datetime(2020, 6, 4, 22, 0, tzinfo=timezone.utc)
+
+
+class TestObservationArchive:
+
+    def setup_method(self):
+        self.observations = [_observation(code, _START + timedelta(minutes=30 * i), temperature=float(i))
+                             for i in range(8) for code in ("ESCAT4300000043206B", "ESCAT0800000008940B")]
+
+    @pytest.mark.parametrize("test_file", ["region.xml", "full_station.xml", "no_condition.xml", "no_humidity.xml",
+                                           "no_wind.xml"])
+    def test_round_trip(self, tmp_path, test_file):
+        observations = [Observation.from_feed_item(item) for item in iter_feed_items(read_feed(test_file))]
+        archive = ObservationArchive(tmp_path)
+
+        assert archive.append(observations) == len(observations)
+
+        assert list(archive.observations()) == _by_partition(observations)
+
+    def test_partitions_by_day_and_station(self, tmp_path):
+        archive = ObservationArchive(tmp_path)
+        archive.append(self.observations)
+
+        assert archive.days() == [datetime(2020, 6, 4).date(), datetime(2020, 6, 5).date()]
+        assert sorted(os.listdir(tmp_path / "2020-06-04")) == ["ESCAT0800000008940B.obs", "ESCAT4300000043206B.obs"]
+
+    def test_appends_in_order(self, tmp_path):
+        archive = ObservationArchive(tmp_path)
+
+        archive.append(self.observations[:5])
+        archive.append(self.observations[5:])
+
+        assert list(archive.observations()) == _by_partition(self.observations)
+
+    def test_time_range_and_prefix(self, tmp_path):
+        archive = ObservationArchive(tmp_path)
+        archive.append(self.observations)
+        start, end = _START + timedelta(minutes=60), _START + timedelta(minutes=150)
+
+        observations = list(archive.observations(start, end, prefix="ESCAT43"))
+
+        assert [o.weather.temp_current for o in observations] == [2.0, 3.0, 4.0]
+        assert all(o.station.code == "ESCAT4300000043206B" for o in observations)
+        assert list(archive.observations(end=_START)) == []
+        assert len(list(archive.observations(start=datetime(2020, 6, 5)))) == 8
+
+    def test_batches(self, tmp_path):
+        archive = ObservationArchive(tmp_path)
+        archive.append(self.observations)
+
+        batches = list(archive.batches(prefix="ESCAT08"))
+
+        assert [len(batch) for batch in batches] == [4, 4]
+        # Columns are views of the mapped partition rather than copies
+        assert not batches[0]["temp_current"].flags.owndata
+        assert archive.read_batch() == ObservationBatch.from_observations(_by_partition(self.observations))
+
+    def test_unknown_conditions(self, tmp_path):
+        archive = ObservationArchive(tmp_path)
+        archive.append([_observation("ESCAT4300000043206B", _START, condition="hazecloud")])
+
+        [observation] = archive.observations()
+
+        assert observation.weather.condition == "hazecloud"
+        assert archive.read_batch().conditions() == [None]
+
+    def test_ignores_interrupted_appends(self, tmp_path):
+        archive = ObservationArchive(tmp_path)
+        archive.append(self.observations[:2])
+        with open(tmp_path / "2020-06-04" / "ESCAT4300000043206B.obs", "ab") as f:
+            f.write(b"\x00" * 10)
+
+        assert len(list(archive.observations())) == 2
+
+    def test_invalid_station_code(self, tmp_path):
+        with pytest.raises(ValueError):
+            ObservationArchive(tmp_path).append([_observation("../ESCAT43", _START)])
+
+    def test_invalid_partition(self, tmp_path):
+        archive = ObservationArchive(tmp_path)
+        (tmp_path / "2020-06-04").mkdir()
+        (tmp_path / "2020-06-04" / "ESCAT4300000043206B.obs").write_bytes(b"not an archive")
+
+        with pytest.raises(ValueError):
+            list(archive.observations())
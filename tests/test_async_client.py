@@ -0,0 +1,110 @@
+import asyncio
+import os
+import unittest
+from meteoclimatic.exceptions import StationNotFound, MeteoclimaticError
+from meteoclimatic import AsyncMeteoclimaticClient
+from meteoclimatic.client import BatchResult
+from tests.feed_server import FeedServer
+
+
+class CountingTransport(object):
+
+    def __init__(self, body):
+        self.body = body
+        self.urls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def fetch(self, url):
+        self.urls.append(url)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return self.body
+
+
+class TestAsyncMeteoclimaticClient(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.server = FeedServer({"ESCAT4300000043206B": "full_station.xml",
+                                  "ESCAT43": "region.xml",
+                                  "ESCAT0800000008940B": "no_condition.xml"})
+        self.server.__enter__()
+        self.client = AsyncMeteoclimaticClient(base_url=self.server.base_url)
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    async def test_get_station_info_ok(self):
+        res = await self.client.weather_at_station("ESCAT4300000043206B")
+
+        self.assertEqual(res.station.code, "ESCAT4300000043206B")
+        self.assertEqual(self.server.requests, ["/feed/rss/ESCAT4300000043206B"])
+
+    async def test_get_station_info_no_xml(self):
+        with self.assertRaises(StationNotFound) as error:
+            await self.client.weather_at_station("ESCAT4300000099999Z")
+        self.assertEqual(error.exception.station_code, "ESCAT4300000099999Z")
+
+    async def test_get_station_info_404(self):
+        self.server.feeds["ESCAT4300000043206B"] = 404
+
+        with self.assertRaises(MeteoclimaticError) as error:
+            await self.client.weather_at_station("ESCAT4300000043206B")
+        self.assertEqual(str(
+            error.exception), "Error fetching station data [status_code=404]")
+
+    async def test_get_region_info_ok(self):
+        res = await self.client.weather_at_region("ESCAT43")
+
+        self.assertEqual(len(res), 3)
+        self.assertEqual(res["ESCAT4300000043204A"].weather.temp_current, 18.1)
+
+    async def test_gather_stations_ok(self):
+        res = await self.client.gather_stations([
+            "ESCAT0800000008940B", "ESCAT4300000043206B", "ESCAT4300000043204A"], concurrency=2)
+
+        self.assertEqual(list(res.keys()), [
+            "ESCAT0800000008940B", "ESCAT4300000043206B", "ESCAT4300000043204A"])
+        self.assertEqual(sorted(self.server.requests), ["/feed/rss/ESCAT0800000008940B", "/feed/rss/ESCAT43"])
+
+    async def test_gather_stations_collects_errors(self):
+        self.server.feeds["ESCAT0800000008940B"] = 500
+
+        res = await self.client.gather_stations([
+            "ESCAT0800000008940B", "ESCAT4300000043206B", "ESCAT4300000099999Z", "ESCAT4300000043204A"])
+
+        self.assertIsInstance(res, BatchResult)
+        self.assertEqual(list(res.keys()), ["ESCAT4300000043206B", "ESCAT4300000043204A"])
+        self.assertIsInstance(res.errors["ESCAT0800000008940B"], MeteoclimaticError)
+        self.assertIsInstance(res.errors["ESCAT4300000099999Z"], StationNotFound)
+        self.assertEqual(list(res.timings.keys()), [
+            "ESCAT0800000008940B", "ESCAT4300000043206B", "ESCAT4300000099999Z", "ESCAT4300000043204A"])
+
+    async def test_gather_stations_limits_concurrency(self):
+        with open(os.path.join(os.path.dirname(__file__), "feeds", "full_station.xml"), "rb") as f:
+            transport = CountingTransport(f.read())
+        client = AsyncMeteoclimaticClient(transport=transport)
+
+        await client.gather_stations(["ESCAT%02d00000043206B" % (i, ) for i in range(10)], concurrency=3)
+
+        self.assertEqual(len(transport.urls), 10)
+        self.assertEqual(transport.max_in_flight, 3)
+
+    async def test_gather_stations_invalid_concurrency(self):
+        with self.assertRaises(ValueError):
+            await self.client.gather_stations(["ESCAT4300000043206B"], concurrency=0)
+
+    async def test_concurrent_lookups_share_one_fetch(self):
+        with open(os.path.join(os.path.dirname(__file__), "feeds", "full_station.xml"), "rb") as f:
+            transport = CountingTransport(f.read())
+        client = AsyncMeteoclimaticClient(transport=transport)
+
+        res = await asyncio.gather(*[client.weather_at_station("ESCAT4300000043206B") for _ in range(10)])
+
+        self.assertEqual(len(transport.urls), 1)
+        self.assertTrue(all(observation is res[0] for observation in res))
+
+        await client.weather_at_station("ESCAT4300000043206B")
+        self.assertEqual(len(transport.urls), 2)
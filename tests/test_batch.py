@@ -0,0 +1,100 @@
+import math
+import os
+import pytest
+from meteoclimatic import Condition, Observation
+from meteoclimatic.feed import FeedItem
+from meteoclimatic.parser import iter_feed_items
+
+np = pytest.importorskip("numpy")
+from meteoclimatic.batch import ObservationBatch  # noqa: E402
+
+
+def _read_feed(test_file):
+    with open(os.path.join(os.path.dirname(__file__), "feeds", test_file), "rb") as f:
+        return f.read()
+
+
+class TestObservationBatch:
+
+    @pytest.mark.parametrize("test_file", ["full_station.xml", "invalid_values.xml", "no_condition.xml",
+                                           "no_humidity.xml", "no_pressure.xml", "no_rain.xml", "no_wind.xml",
+                                           "region.xml"])
+    def test_from_feed_matches_observations(self, test_file):
+        observations = [Observation.from_feed_item(item) for item in iter_feed_items(_read_feed(test_file))]
+
+        batch = ObservationBatch.from_feed(_read_feed(test_file))
+
+        assert batch == ObservationBatch.from_observations(observations)
+        assert list(batch["station_code"]) == [o.station.code for o in observations]
+
+    @pytest.mark.parametrize("engine", ["lxml", "bs4", "raw"])
+    def test_from_feed_columns(self, engine):
+        batch = ObservationBatch.from_feed(_read_feed("region.xml"), engine)
+
+        assert len(batch) == 3
+        assert batch["temp_current"].dtype == np.float64
+        assert batch["temp_current"].tolist() == [17.6, 18.1, 15.9]
+        assert batch["reception_time"][0] == np.datetime64("2020-06-04T10:48:01")
+        assert batch.conditions() == [Condition.hazesun, Condition.sun, None]
+
+    def test_missing_values_are_nan(self):
+        batch = ObservationBatch.from_feed(_read_feed("no_humidity.xml"))
+
+        assert np.isnan(batch["humidity_current"]).all()
+        assert math.isnan(batch.mean("humidity_current"))
+
+    def test_skips_invalid_items(self):
+        items = list(iter_feed_items(_read_feed("region.xml")))
+        items[1].description = items[1].description.replace(";(77,0;", ";(177,0;")
+        items.append(FeedItem("Title", "http://link", "Thu, 04 Jun 2020 10:48:01 +0000", "no data"))
+
+        batch = ObservationBatch.from_feed_items(items)
+
+        assert batch["station_code"].tolist() == ["ESCAT4300000043206B", "ESCAT0800000008940B"]
+
+    def test_filter_and_statistics(self):
+        batch = ObservationBatch.from_feed(_read_feed("region.xml"))
+
+        warm = batch[batch["temp_current"] > 17.0]
+
+        assert warm["station_code"].tolist() == ["ESCAT4300000043206B", "ESCAT4300000043204A"]
+        assert len(batch[1:]) == 2
+        assert batch.min("temp_current") == 15.9
+        assert batch.max("temp_current") == 18.1
+        assert batch.mean("temp_current") == pytest.approx(17.2)
+        with pytest.raises(ValueError) as error:
+            batch.mean("station_code")
+        assert str(error.value) == "Unknown weather column 'station_code'"
+
+    def test_concatenate(self):
+        region = ObservationBatch.from_feed(_read_feed("region.xml"))
+        station = ObservationBatch.from_feed(_read_feed("no_humidity.xml"))
+
+        batch = ObservationBatch.concatenate([region, station])
+
+        assert len(batch) == 4
+        assert batch[:3] == region
+        assert batch[3:] == station
+        assert len(ObservationBatch.concatenate([])) == 0
+
+    def test_invalid_columns(self):
+        with pytest.raises(ValueError) as error:
+            ObservationBatch({"station_code": []})
+        assert str(error.value).startswith("Missing batch columns: station_name, reception_time")
+
+    def test_to_pandas(self):
+        pytest.importorskip("pandas")
+        frame = ObservationBatch.from_feed(_read_feed("region.xml")).to_pandas()
+
+        assert frame["station_code"].tolist() == ["ESCAT4300000043206B", "ESCAT4300000043204A", "ESCAT0800000008940B"]
+        assert str(frame["reception_time"].dt.tz) == "UTC"
+        assert frame["condition"].tolist()[:2] == ["hazesun", "sun"]
+        assert frame["condition"].isna().tolist() == [False, False, True]
+
+    def test_to_arrow(self):
+        pytest.importorskip("pyarrow")
+        table = ObservationBatch.from_feed(_read_feed("no_humidity.xml")).to_arrow()
+
+        assert table.num_rows == 1
+        assert table.column("humidity_current").null_count == 1
+        assert table.column("condition").to_pylist() == ["hazesun"]
@@ -0,0 +1,167 @@
+import os
+import pytest
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from meteoclimatic import Observation, Station, Weather
+from meteoclimatic.cache import ObservationCache, SQLiteFeedCache
+from meteoclimatic.exceptions import MeteoclimaticError
+
+
+def _observation(code, reception_time=datetime(2020, 6, 4, 10, 48, 1, 0, timezone.utc)):
+    return Observation(reception_time=reception_time,
+                       station=Station(name="Station %s" % (code, ), code=code, url=None),
+                       weather=Weather(reception_time, None, 17.6, 17.9, 16.0, 77.0, 96.0, 74.0,
+                                       1002.0, 1003.8, 1000.9, 0.0, 29.0, 300.0, 3.2))
+
+
+class FakeClock:
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestObservationCache:
+
+    def test_get_and_put(self):
+        cache = ObservationCache(clock=FakeClock(0))
+        observation = _observation("ESCAT4300000043206B")
+
+        assert cache.get("ESCAT4300000043206B") is None
+        cache.put(observation, ttl=60)
+
+        assert cache.get("ESCAT4300000043206B") is observation
+        assert (cache.hits, cache.misses, cache.evictions) == (1, 1, 0)
+
+    def test_entries_expire_after_feed_ttl(self):
+        clock = FakeClock(1000)
+        cache = ObservationCache(clock=clock)
+        cache.put(_observation("ESCAT4300000043206B"), ttl=10)
+
+        clock.now = 1000 + 10 * 60 - 1
+        assert cache.get("ESCAT4300000043206B") is not None
+        clock.now = 1000 + 10 * 60
+        assert cache.get("ESCAT4300000043206B") is None
+        assert len(cache) == 0
+
+    def test_entries_expire_after_publication_date_without_feed_ttl(self):
+        published = datetime(2020, 6, 4, 10, 48, 1, 0, timezone.utc)
+        clock = FakeClock(published.timestamp() + 299)
+        cache = ObservationCache(default_ttl=300, clock=clock)
+        cache.put(_observation("ESCAT4300000043206B", published))
+
+        assert cache.get("ESCAT4300000043206B") is not None
+        clock.now += 1
+        assert cache.get("ESCAT4300000043206B") is None
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = ObservationCache(max_size=2, clock=FakeClock(0))
+        cache.put(_observation("A"), ttl=60)
+        cache.put(_observation("B"), ttl=60)
+        cache.get("A")
+        cache.put(_observation("C"), ttl=60)
+
+        assert cache.get("B") is None
+        assert cache.get("A") is not None
+        assert cache.get("C") is not None
+        assert cache.evictions == 1
+        assert len(cache) == 2
+
+    def test_clear(self):
+        cache = ObservationCache(clock=FakeClock(0))
+        cache.put(_observation("A"), ttl=60)
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_invalid_max_size(self):
+        with pytest.raises(ValueError) as error:
+            ObservationCache(max_size=0)
+        assert str(error.value) == "max_size must be greater than 0"
+
+
+class TestSQLiteFeedCache:
+
+    def test_get_and_put(self, tmp_path):
+        cache = SQLiteFeedCache(str(tmp_path / "feeds.db"), clock=FakeClock(0))
+
+        assert cache.get("http://feed") is None
+        cache.put("http://feed", b"<rss/>")
+
+        assert cache.get("http://feed") == b"<rss/>"
+        assert SQLiteFeedCache(str(tmp_path / "feeds.db"), clock=FakeClock(0)).get("http://feed") == b"<rss/>"
+
+    def test_entries_expire_after_ttl(self, tmp_path):
+        clock = FakeClock(1000)
+        cache = SQLiteFeedCache(str(tmp_path / "feeds.db"), ttl=60, clock=clock)
+        cache.put("http://feed", b"<rss/>")
+        cache.put("http://other", b"<rss/>", ttl=120)
+
+        clock.now = 1060
+        assert cache.get("http://feed") is None
+        assert cache.get("http://other") == b"<rss/>"
+        cache.purge()
+        assert cache._connection().execute("SELECT url FROM feeds").fetchall() == [("http://other", )]
+
+    def test_get_or_fetch_stores_fetched_documents(self, tmp_path):
+        cache = SQLiteFeedCache(str(tmp_path / "feeds.db"))
+        fetched = []
+
+        def fetch():
+            fetched.append(1)
+            return b"<rss/>"
+
+        assert cache.get_or_fetch("http://feed", fetch) == b"<rss/>"
+        assert cache.get_or_fetch("http://feed", fetch) == b"<rss/>"
+        assert len(fetched) == 1
+
+    def test_get_or_fetch_releases_lease_on_errors(self, tmp_path):
+        cache = SQLiteFeedCache(str(tmp_path / "feeds.db"))
+
+        def fetch():
+            raise MeteoclimaticError("Error fetching station data [status_code=500]")
+
+        with pytest.raises(MeteoclimaticError):
+            cache.get_or_fetch("http://feed", fetch)
+        assert cache.get_or_fetch("http://feed", lambda: b"<rss/>") == b"<rss/>"
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+    def test_forked_processes_open_their_own_connection(self, tmp_path):
+        cache = SQLiteFeedCache(str(tmp_path / "feeds.db"))
+        assert getattr(cache._local, "connection", None) is None
+        cache.put("http://feed", b"<rss/>")
+        parent_connection = cache._connection()
+
+        pid = os.fork()
+        if pid == 0:
+            ok = False
+            try:
+                ok = cache._connection() is not parent_connection and cache.get("http://feed") == b"<rss/>"
+            finally:
+                os._exit(0 if ok else 1)
+        _, status = os.waitpid(pid, 0)
+
+        assert os.WEXITSTATUS(status) == 0
+        assert cache._connection() is parent_connection
+
+    def test_concurrent_workers_fetch_once(self, tmp_path):
+        fetched = []
+
+        def fetch():
+            fetched.append(1)
+            time.sleep(0.1)
+            return b"<rss/>"
+
+        def worker():
+            # Every worker has its own cache instance, as separate processes would
+            cache = SQLiteFeedCache(str(tmp_path / "feeds.db"), poll_interval=0.01)
+            return cache.get_or_fetch("http://feed", fetch)
+
+        SQLiteFeedCache(str(tmp_path / "feeds.db"))
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            bodies = list(executor.map(lambda _: worker(), range(8)))
+
+        assert bodies == [b"<rss/>"] * 8
+        assert len(fetched) == 1
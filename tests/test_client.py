@@ -1,43 +1,418 @@
+import io
 import os
+import socket
+import tempfile
+import threading
+import time
 import unittest
-from urllib.error import HTTPError
-from meteoclimatic.exceptions import StationNotFound, MeteoclimaticError
-from meteoclimatic import MeteoclimaticClient
 from unittest.mock import patch
+from meteoclimatic.exceptions import StationNotFound, MeteoclimaticError, ServiceUnavailable
+from meteoclimatic import MeteoclimaticClient
+from meteoclimatic.cache import ObservationCache, SQLiteFeedCache
+from meteoclimatic.directory import StationDirectory
+from meteoclimatic.observation import LazyObservation
+from meteoclimatic.tracker import ObservationTracker
+from meteoclimatic.transport import TransportResponse
+from meteoclimatic.parser import iter_feed_items
+from tests.feed_server import FeedServer, FeedTransport, feed_etag, read_feed
+
+
+class BlockingTransport(FeedTransport):
+    """*FeedTransport* holding every request until *release* is set."""
+
+    def __init__(self, feeds):
+        super().__init__(feeds)
+        self.release = threading.Event()
+
+    def request(self, url, headers=None):
+        self.release.wait(5)
+        return super().request(url, headers)
 
 
 class TestMeteoclimaticClient(unittest.TestCase):
 
     def setUp(self):
-        self.client = MeteoclimaticClient()
-
-    @patch('meteoclimatic.client.urlopen', autospec=True)
-    def test_get_station_info_ok(self, mock_urlopen):
-        f = open(os.path.join(os.path.dirname(
-            __file__), "feeds", "full_station.xml"))
-        mock_urlopen.return_value.read.return_value = f
+        self.transport = FeedTransport({"ESCAT4300000043206B": "full_station.xml",
+                                        "ESCAT0800000008940B": "region.xml",
+                                        "ESCAT43": "region.xml",
+                                        "ESCAT": "region.xml"})
+        self.client = MeteoclimaticClient(transport=self.transport)
 
+    def test_get_station_info_ok(self):
         res = self.client.weather_at_station("ESCAT4300000043206B")
 
-        mock_urlopen.assert_called_with(
-            "https://www.meteoclimatic.net/feed/rss/ESCAT4300000043206B")
+        self.assertEqual(self.transport.urls, [
+            "https://www.meteoclimatic.net/feed/rss/ESCAT4300000043206B"])
         self.assertEqual(res.station.code, "ESCAT4300000043206B")
 
-    @patch('meteoclimatic.client.urlopen', autospec=True)
-    def test_get_station_info_no_xml(self, mock_urlopen):
-        mock_urlopen.return_value.read.return_value = ""
-
+    def test_get_station_info_no_xml(self):
         with self.assertRaises(StationNotFound) as error:
-            self.client.weather_at_station("ESCAT4300000043206B")
-        self.assertEqual(error.exception.station_code, "ESCAT4300000043206B")
+            self.client.weather_at_station("ESCAT4300000099999Z")
+        self.assertEqual(error.exception.station_code, "ESCAT4300000099999Z")
         self.assertEqual(str(
-            error.exception), "Station code ESCAT4300000043206B did not return any item")
+            error.exception), "Station code ESCAT4300000099999Z did not return any item")
 
-    @patch('meteoclimatic.client.urlopen', autospec=True)
-    def test_get_station_info_404(self, mock_urlopen):
-        mock_urlopen.side_effect = HTTPError("", 404, "Not Found", [], None)
+    def test_get_station_info_404(self):
+        self.transport.feeds["ESCAT4300000043206B"] = 404
 
         with self.assertRaises(MeteoclimaticError) as error:
             self.client.weather_at_station("ESCAT4300000043206B")
         self.assertEqual(str(
             error.exception), "Error fetching station data [status_code=404]")
+
+    def test_get_region_info_ok(self):
+        res = self.client.weather_at_region("ESCAT")
+
+        self.assertEqual(self.transport.urls, [
+            "https://www.meteoclimatic.net/feed/rss/ESCAT"])
+        self.assertEqual(list(res.keys()), [
+            "ESCAT4300000043206B", "ESCAT4300000043204A", "ESCAT0800000008940B"])
+        self.assertEqual(res["ESCAT4300000043204A"].weather.temp_current, 18.1)
+
+    def test_get_region_info_lazy(self):
+        self.transport.feeds["ESCAT"] = read_feed("region.xml").replace(b";(77,0;", b";(177,0;")
+        client = MeteoclimaticClient(transport=self.transport, lazy=True)
+
+        res = client.weather_at_region("ESCAT")
+
+        self.assertIsInstance(res["ESCAT4300000043204A"], LazyObservation)
+        self.assertEqual(res["ESCAT4300000043204A"].weather.temp_current, 18.1)
+        self.assertEqual(res["ESCAT4300000043206B"].weather.temp_current, 17.6)
+        with self.assertRaisesRegex(ValueError, "humidity must be between 0 and 100"):
+            res["ESCAT4300000043206B"].weather.humidity_current
+        self.assertNotIsInstance(client.weather_at_station("ESCAT4300000043206B"), LazyObservation)
+
+    def test_get_region_info_lazy_skips_items_without_title(self):
+        for feed_code in ("ESCAT", "ESCAT43"):
+            self.transport.feeds[feed_code] = read_feed("region.xml").replace(
+                b"<title>Reus - Nord (Tarragona)</title>", b"<title></title>")
+        client = MeteoclimaticClient(transport=self.transport, lazy=True)
+
+        res = client.weather_at_region("ESCAT")
+
+        self.assertEqual(list(res.keys()), ["ESCAT4300000043204A", "ESCAT0800000008940B"])
+        batch = client.weather_at_stations(["ESCAT4300000043206B", "ESCAT4300000043204A", "ESCAT4300000043207C"])
+        self.assertEqual(list(batch.keys()), ["ESCAT4300000043204A"])
+        self.assertIsInstance(batch.errors["ESCAT4300000043206B"], StationNotFound)
+
+    def test_get_region_info_lazy_skips_items_with_invalid_dates(self):
+        self.transport.feeds["ESCAT"] = read_feed("region.xml").replace(b"<ttl>60</ttl>", b"").replace(
+            b"Thu, 04 Jun 2020 10:48:01", b"yesterday")
+        client = MeteoclimaticClient(transport=self.transport, cache=ObservationCache(), lazy=True)
+
+        res = client.weather_at_region("ESCAT")
+
+        self.assertEqual(list(res.keys()), ["ESCAT4300000043204A", "ESCAT0800000008940B"])
+
+    def test_get_region_info_no_xml(self):
+        with self.assertRaises(StationNotFound) as error:
+            self.client.weather_at_region("ESCAT46")
+        self.assertEqual(error.exception.station_code, "ESCAT46")
+
+    def test_get_stations_info_groups_by_region(self):
+        res = self.client.weather_at_stations([
+            "ESCAT0800000008940B", "ESCAT4300000043206B", "ESCAT4300000043204A", "ESCAT4300000099999Z"])
+
+        self.assertEqual(sorted(self.transport.urls), [
+            "https://www.meteoclimatic.net/feed/rss/ESCAT0800000008940B",
+            "https://www.meteoclimatic.net/feed/rss/ESCAT43"])
+        self.assertEqual(list(res.keys()), [
+            "ESCAT0800000008940B", "ESCAT4300000043206B", "ESCAT4300000043204A"])
+
+    def test_get_stations_info_collects_errors(self):
+        self.transport.feeds["ESCAT0800000008940B"] = 500
+
+        res = self.client.weather_at_stations([
+            "ESCAT0800000008940B", "ESCAT4300000043206B", "ESCAT4300000099999Z", "ESCAT4300000043204A"],
+            max_workers=2)
+
+        self.assertEqual(list(res.keys()), ["ESCAT4300000043206B", "ESCAT4300000043204A"])
+        self.assertIsInstance(res.errors["ESCAT0800000008940B"], MeteoclimaticError)
+        self.assertIsInstance(res.errors["ESCAT4300000099999Z"], StationNotFound)
+        self.assertEqual(list(res.timings.keys()), [
+            "ESCAT0800000008940B", "ESCAT4300000043206B", "ESCAT4300000099999Z", "ESCAT4300000043204A"])
+        self.assertEqual(list(res.errors.keys()), ["ESCAT0800000008940B", "ESCAT4300000099999Z"])
+        self.assertTrue(all(t >= 0 for t in res.timings.values()))
+
+    def test_get_stations_info_collects_connection_errors(self):
+        self.transport.feeds["ESCAT0800000008940B"] = socket.timeout("timed out")
+
+        res = self.client.weather_at_stations(["ESCAT0800000008940B", "ESCAT4300000043206B", "ESCAT4300000043204A"])
+
+        self.assertEqual(list(res.keys()), ["ESCAT4300000043206B", "ESCAT4300000043204A"])
+        self.assertIsInstance(res.errors["ESCAT0800000008940B"], ServiceUnavailable)
+        self.assertIsInstance(res.errors["ESCAT0800000008940B"].__cause__, socket.timeout)
+
+    def test_iter_observations_connection_reset(self):
+        class ResetStream(io.BytesIO):
+            def read(self, *args):
+                raise ConnectionResetError("Connection reset by peer")
+
+        self.transport.request = lambda url, headers=None: TransportResponse(200, {}, ResetStream())
+
+        with self.assertRaisesRegex(ServiceUnavailable, "Connection reset by peer"):
+            list(self.client.iter_observations("ESCAT43"))
+        with self.assertRaises(ServiceUnavailable):
+            list(self.client.poll_changes("ESCAT43"))
+        with self.assertRaises(ServiceUnavailable):
+            self.client.weather_at_region("ESCAT43")
+        with self.assertRaises(ServiceUnavailable):
+            self.client.weather_batch_at_region("ESCAT43")
+
+    def test_get_region_batch_ok(self):
+        batch = self.client.weather_batch_at_region("ESCAT43")
+
+        self.assertEqual(batch["station_code"].tolist(), list(self.client.weather_at_region("ESCAT43").keys()))
+        self.assertEqual(batch["temp_current"].tolist(), [17.6, 18.1, 15.9])
+
+    def test_get_region_batch_no_xml(self):
+        with self.assertRaises(StationNotFound) as error:
+            self.client.weather_batch_at_region("ESCAT46")
+        self.assertEqual(error.exception.station_code, "ESCAT46")
+
+    def test_stations_near(self):
+        self.assertEqual(self.client.stations_near(41.16, 1.10, 10.0), [])
+
+        self.client.weather_at_region("ESCAT")
+        near = self.client.stations_near(41.16, 1.10, 10.0)
+        nearest = self.client.nearest_station(41.36, 2.0, k=2)
+
+        self.assertEqual([nearby.station.code for nearby in near], ["ESCAT4300000043204A", "ESCAT4300000043206B"])
+        self.assertLess(near[0].distance, near[1].distance)
+        self.assertEqual([nearby.station.code for nearby in nearest], ["ESCAT0800000008940B", "ESCAT4300000043206B"])
+
+    def test_station_directory(self):
+        directory = StationDirectory()
+        client = MeteoclimaticClient(transport=self.transport, directory=directory)
+
+        client.weather_at_region("ESCAT")
+        res = client.weather_at_stations(["ESCAT4300000043206B", "ESCAT4300000043204A", "ESCAT0800000008940B"])
+
+        self.assertEqual(len(directory), 3)
+        self.assertEqual([s.code for s in directory.stations_with_prefix("ESCAT43")], [
+            "ESCAT4300000043204A", "ESCAT4300000043206B"])
+        self.assertEqual(sorted(self.transport.urls[1:]), [
+            "https://www.meteoclimatic.net/feed/rss/ESCAT0800000008940B",
+            "https://www.meteoclimatic.net/feed/rss/ESCAT43"])
+        self.assertEqual(len(res), 3)
+
+    def test_poll_changes(self):
+        first = [o.station.code for o in self.client.poll_changes("ESCAT43")]
+        with patch('meteoclimatic.client.iter_feed_items', wraps=iter_feed_items) as mock_parse:
+            second = list(self.client.poll_changes("ESCAT43"))
+        self.transport.feeds["ESCAT43"] = read_feed("region.xml").replace(b"(18,1;", b"(18,4;")
+        third = list(self.client.poll_changes("ESCAT43"))
+
+        self.assertEqual(first, ["ESCAT4300000043206B", "ESCAT4300000043204A", "ESCAT0800000008940B"])
+        self.assertEqual(self.transport.headers[1], {
+            "If-None-Match": feed_etag(read_feed("region.xml")),
+            "If-Modified-Since": "Thu, 04 Jun 2020 10:58:23 GMT"})
+        mock_parse.assert_not_called()
+        self.assertEqual(second, [])
+        self.assertEqual([(o.station.code, o.weather.temp_current) for o in third], [("ESCAT4300000043204A", 18.4)])
+
+    def test_poll_changes_does_not_share_validators(self):
+        self.client.weather_at_region("ESCAT43")
+
+        tracker = ObservationTracker()
+        client = MeteoclimaticClient(transport=self.transport, tracker=tracker)
+        changes = list(client.poll_changes("ESCAT43"))
+        list(self.client.poll_changes("ESCAT43"))
+
+        self.assertEqual(len(changes), 3)
+        self.assertEqual(len(tracker), 3)
+        self.assertEqual(self.transport.headers[1:], [{}, {}])
+
+    def test_poll_changes_with_feed_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            client = MeteoclimaticClient(transport=self.transport,
+                                         feed_cache=SQLiteFeedCache(os.path.join(directory, "feeds.db")))
+
+            first = list(client.poll_changes("ESCAT43"))
+            second = list(client.poll_changes("ESCAT43"))
+
+        self.assertEqual((len(first), len(second)), (3, 0))
+        self.assertEqual(len(self.transport.urls), 1)
+
+    def test_concurrent_lookups_share_one_fetch(self):
+        transport = BlockingTransport({"ESCAT4300000043206B": "full_station.xml", "ESCAT43": 500})
+        client = MeteoclimaticClient(transport=transport)
+        results, errors = [], []
+
+        def lookup(fetch, code, output):
+            try:
+                output.append(fetch(code))
+            except MeteoclimaticError as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=lookup, args=(client.weather_at_station, "ESCAT4300000043206B", results))
+                   for _ in range(8)]
+        threads += [threading.Thread(target=lookup, args=(client.weather_at_region, "ESCAT43", results))
+                    for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while (client._flights.waiters(("https://www.meteoclimatic.net/feed/rss/ESCAT4300000043206B", True)) < 7 or
+               client._flights.waiters(("https://www.meteoclimatic.net/feed/rss/ESCAT43", False)) < 3):
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.001)
+        transport.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(transport.urls), [
+            "https://www.meteoclimatic.net/feed/rss/ESCAT43",
+            "https://www.meteoclimatic.net/feed/rss/ESCAT4300000043206B"])
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(observation is results[0] for observation in results))
+        self.assertEqual(len(errors), 4)
+        self.assertTrue(all(error is errors[0] for error in errors))
+
+        client.weather_at_station("ESCAT4300000043206B")
+        self.assertEqual(len(transport.urls), 3)
+
+    def test_get_station_info_bs4_parser(self):
+        res = MeteoclimaticClient(parser="bs4", transport=self.transport).weather_at_station("ESCAT4300000043206B")
+
+        self.assertEqual(res.station.code, "ESCAT4300000043206B")
+
+    def test_get_region_info_raw_parser(self):
+        res = MeteoclimaticClient(parser="raw", transport=self.transport).weather_at_region("ESCAT43")
+
+        self.assertEqual(res, self.client.weather_at_region("ESCAT43"))
+
+    def test_unknown_parser(self):
+        with self.assertRaises(ValueError) as error:
+            MeteoclimaticClient(parser="foo")
+        self.assertEqual(str(error.exception), "Unknown parser engine 'foo'")
+
+    def test_iter_observations_ok(self):
+        res = self.client.iter_observations("ESCAT")
+
+        self.assertEqual(next(res).station.code, "ESCAT4300000043206B")
+        self.assertEqual([o.station.code for o in res], ["ESCAT4300000043204A", "ESCAT0800000008940B"])
+        self.assertEqual(self.transport.urls, [
+            "https://www.meteoclimatic.net/feed/rss/ESCAT"])
+
+    def test_iter_observations_no_xml(self):
+        with self.assertRaises(StationNotFound) as error:
+            list(self.client.iter_observations("ESCAT46"))
+        self.assertEqual(error.exception.station_code, "ESCAT46")
+
+    def test_revalidates_feeds(self):
+        first = self.client.weather_at_station("ESCAT4300000043206B")
+
+        with patch('meteoclimatic.client.iter_feed_items', wraps=iter_feed_items) as mock_parse:
+            second = self.client.weather_at_station("ESCAT4300000043206B")
+
+        self.assertEqual(self.transport.headers[1], {
+            "If-None-Match": feed_etag(read_feed("full_station.xml")),
+            "If-Modified-Since": "Thu, 04 Jun 2020 10:58:23 GMT"})
+        mock_parse.assert_not_called()
+        self.assertIs(second, first)
+
+    def test_revalidates_region_feeds(self):
+        first = self.client.weather_at_region("ESCAT43")
+        streamed = list(self.client.iter_observations("ESCAT43"))
+
+        with patch('meteoclimatic.client.iter_feed_items', wraps=iter_feed_items) as mock_parse:
+            second = self.client.weather_at_region("ESCAT43")
+            stations = self.client.weather_at_stations(["ESCAT4300000043206B", "ESCAT4300000043204A"])
+
+        self.assertEqual(len(self.transport.urls), 4)
+        self.assertEqual(len(self.transport.headers[0]), 0)
+        self.assertTrue(all(len(headers) == 2 for headers in self.transport.headers[1:]))
+        mock_parse.assert_not_called()
+        self.assertEqual(second, first)
+        self.assertEqual(streamed, list(first.values()))
+        self.assertIs(stations["ESCAT4300000043206B"], first["ESCAT4300000043206B"])
+
+    def test_modified_feeds_are_parsed_again(self):
+        self.client.weather_at_station("ESCAT4300000043206B")
+        self.transport.feeds["ESCAT4300000043206B"] = "region.xml"
+
+        res = self.client.weather_at_station("ESCAT4300000043206B")
+
+        self.assertEqual(res.station.code, "ESCAT4300000043206B")
+        self.assertEqual(len(self.transport.headers[1]), 2)
+        self.assertEqual(self.client.weather_at_station("ESCAT4300000043206B"), res)
+        self.assertEqual(len(self.transport.urls), 3)
+
+    def test_cached_observations(self):
+        cache = ObservationCache()
+        client = MeteoclimaticClient(transport=self.transport, cache=cache)
+
+        region = client.weather_at_region("ESCAT43")
+        station = client.weather_at_station("ESCAT4300000043206B")
+        stations = client.weather_at_stations(["ESCAT4300000043204A", "ESCAT0800000008940B"])
+
+        self.assertEqual(len(self.transport.urls), 1)
+        self.assertIs(station, region["ESCAT4300000043206B"])
+        self.assertEqual(list(stations.keys()), ["ESCAT4300000043204A", "ESCAT0800000008940B"])
+        self.assertEqual(stations.timings["ESCAT4300000043204A"], 0.0)
+        self.assertEqual((cache.hits, cache.misses), (3, 0))
+
+    def test_cached_observations_refresh(self):
+        client = MeteoclimaticClient(transport=self.transport, cache=ObservationCache())
+
+        client.weather_at_station("ESCAT4300000043206B")
+        client.weather_at_station("ESCAT4300000043206B", refresh=True)
+        client.weather_at_stations(["ESCAT4300000043206B"], refresh=True)
+
+        self.assertEqual(len(self.transport.urls), 3)
+
+    def test_shared_feed_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "feeds.db")
+            clients = [MeteoclimaticClient(transport=self.transport, feed_cache=SQLiteFeedCache(path))
+                       for _ in range(3)]
+
+            stations = [client.weather_at_station("ESCAT4300000043206B") for client in clients]
+            regions = [client.weather_at_region("ESCAT43") for client in clients]
+            streamed = [list(client.iter_observations("ESCAT43")) for client in clients]
+
+        self.assertEqual(len(self.transport.urls), 2)
+        self.assertTrue(all(station == stations[0] for station in stations))
+        self.assertTrue(all(region == regions[0] for region in regions))
+        self.assertEqual(streamed[0], list(regions[0].values()))
+
+
+class TestMeteoclimaticClientWithServer(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FeedServer({"ESCAT4300000043206B": "full_station.xml",
+                                  "ESCAT43": "region.xml",
+                                  "ESCAT4300000043204A": 404}, compress=True)
+        self.server.__enter__()
+        self.client = MeteoclimaticClient(base_url=self.server.base_url)
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def test_get_station_info_ok(self):
+        res = self.client.weather_at_station("ESCAT4300000043206B")
+
+        self.assertEqual(self.server.requests, ["/feed/rss/ESCAT4300000043206B"])
+        self.assertEqual(res.station.code, "ESCAT4300000043206B")
+
+    def test_get_station_info_404(self):
+        with self.assertRaises(MeteoclimaticError) as error:
+            self.client.weather_at_station("ESCAT4300000043204A")
+        self.assertEqual(str(
+            error.exception), "Error fetching station data [status_code=404]")
+
+    def test_connections_are_reused(self):
+        self.client.weather_at_station("ESCAT4300000043206B")
+        self.client.weather_at_region("ESCAT43")
+        list(self.client.iter_observations("ESCAT43"))
+        self.client.weather_at_station("ESCAT4300000043206B")
+
+        self.assertEqual(len(self.server.requests), 4)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_revalidates_feeds(self):
+        first = self.client.weather_at_region("ESCAT43")
+        second = self.client.weather_at_region("ESCAT43")
+
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(second, first)
@@ -0,0 +1,104 @@
+import gzip
+import os
+import tempfile
+import pytest
+from meteoclimatic import Station
+from meteoclimatic.directory import FEED_PREFIX_LENGTHS, StationDirectory
+
+
+def _station(code, name=None, latitude=None, longitude=None):
+    return Station(name or "Station %s" % (code, ), code, "http://www.meteoclimatic.net/perfil/%s" % (code, ),
+                   latitude, longitude)
+
+
+class TestStationDirectory:
+
+    _stations = [_station("ESCAT4300000043206B", "Reus - Nord (Tarragona)", 41.17, 1.11),
+                 _station("ESCAT4300000043204A", "Reus - Centre (Tarragona)", 41.15, 1.10),
+                 _station("ESCAT4300000043201C"),
+                 _station("ESCAT0800000008940B", "Cornellà - Gavarra (Barcelona)", 41.36, 2.08),
+                 _station("ESMAD2800000028001A"),
+                 _station("ESMAD2800000028002A")]
+
+    def test_stations_with_prefix(self):
+        directory = StationDirectory(self._stations)
+
+        assert len(directory) == 6
+        assert [s.code for s in directory.stations_with_prefix("ESCAT43")] == [
+            "ESCAT4300000043201C", "ESCAT4300000043204A", "ESCAT4300000043206B"]
+        assert len(directory.stations_with_prefix("ES")) == 6
+        assert directory.stations_with_prefix("FR") == []
+        assert (directory.count("ESCAT"), directory.count("ESCAT08"), directory.count("PT")) == (4, 1, 0)
+        assert directory.get("ESMAD2800000028001A") is self._stations[4]
+        assert directory.get("ESMAD28") is None
+        assert "ESCAT0800000008940B" in directory and "ESCAT08" not in directory
+
+    def test_add_replaces_station(self):
+        directory = StationDirectory(self._stations)
+        renamed = _station("ESCAT4300000043206B", "Reus Nord")
+
+        directory.add(renamed)
+
+        assert len(directory) == 6
+        assert directory.count("ESCAT43") == 3
+        assert directory.get("ESCAT4300000043206B") is renamed
+        assert directory.find_by_name("Reus - Nord (Tarragona)") == []
+
+    def test_find_by_name(self):
+        directory = StationDirectory(self._stations)
+
+        assert directory.find_by_name("cornella  -  GAVARRA (Barcelona)") == [self._stations[3]]
+        assert directory.find_by_name("Reus") == []
+
+    def test_snapshot(self):
+        directory = StationDirectory(self._stations + [Station("Custom", "PTLIS0000000001000", "http://example.com")])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "stations.json.gz")
+            directory.save(path)
+            loaded = StationDirectory.load(path)
+
+        assert list(loaded) == list(directory)
+        assert loaded.get("PTLIS0000000001000").url == "http://example.com"
+        assert loaded.get("ESCAT4300000043206B").latitude == 41.17
+
+    def test_snapshot_invalid(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "stations.json.gz")
+            with gzip.open(path, "wt") as f:
+                f.write('{"version": 0, "stations": []}')
+            with pytest.raises(ValueError) as error:
+                StationDirectory.load(path)
+        assert str(error.value) == "Unsupported station directory snapshot"
+
+    @pytest.mark.parametrize("codes,max_feed_size,prefix_lengths,expected", [
+        # Lone stations are fetched from their own feed, like MeteoclimaticClient does without directory
+        (["ESCAT4300000043206B", "ESCAT0800000008940B"], None, (7, ), {
+            "ESCAT4300000043206B": ["ESCAT4300000043206B"], "ESCAT0800000008940B": ["ESCAT0800000008940B"]}),
+        (["ESCAT4300000043206B", "ESCAT4300000043204A", "ESMAD2800000028001A"], None, (7, ), {
+            "ESCAT43": ["ESCAT4300000043206B", "ESCAT4300000043204A"],
+            "ESMAD2800000028001A": ["ESMAD2800000028001A"]}),
+        (["ESCAT4300000043206B", "ESCAT0800000008940B", "ESMAD2800000028001A"], None, FEED_PREFIX_LENGTHS, {
+            "ES": ["ESCAT4300000043206B", "ESCAT0800000008940B", "ESMAD2800000028001A"]}),
+        (["ESCAT4300000043206B", "ESCAT0800000008940B", "ESMAD2800000028001A"], 4, FEED_PREFIX_LENGTHS, {
+            "ESCAT": ["ESCAT4300000043206B", "ESCAT0800000008940B"],
+            "ESMAD2800000028001A": ["ESMAD2800000028001A"]}),
+        (["ESCAT4300000043206B", "ESCAT0800000008940B"], 3, FEED_PREFIX_LENGTHS, {
+            "ESCAT4300000043206B": ["ESCAT4300000043206B"], "ESCAT0800000008940B": ["ESCAT0800000008940B"]}),
+        # Unknown stations count in the size of their feeds
+        (["ESCAT4300000043206B", "ESCAT4300000043299Z", "ESCAT4300000043298Z"], 4, (5, 7), {
+            "ESCAT4300000043206B": ["ESCAT4300000043206B"],
+            "ESCAT4300000043299Z": ["ESCAT4300000043299Z"],
+            "ESCAT4300000043298Z": ["ESCAT4300000043298Z"]}),
+        (["ESCAT4300000043206B", "ESCAT4300000043299Z", "ESCAT4300000043298Z"], 5, (5, 7), {
+            "ESCAT43": ["ESCAT4300000043206B", "ESCAT4300000043299Z", "ESCAT4300000043298Z"]}),
+        (["ESCAT43", "ESCAT4300000043206B"], None, (7, ), {
+            "ESCAT43": ["ESCAT43"], "ESCAT4300000043206B": ["ESCAT4300000043206B"]}),
+        ([], None, (7, ), {}),
+    ])
+    def test_plan_feeds(self, codes, max_feed_size, prefix_lengths, expected):
+        directory = StationDirectory(self._stations)
+
+        plan = directory.plan_feeds(codes, max_feed_size=max_feed_size, prefix_lengths=prefix_lengths)
+
+        assert plan == expected
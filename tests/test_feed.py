@@ -0,0 +1,88 @@
+import os
+from datetime import datetime, timedelta, timezone
+import pytest
+from meteoclimatic.feed import FeedItem, FeedItemHelper, FeedRecord, parse_rfc822_date
+from meteoclimatic.parser import iter_feed_items
+
+
+def _feed_item(test_file):
+    with open(os.path.join(os.path.dirname(__file__), "feeds", test_file), "rb") as f:
+        return next(iter_feed_items(f.read()))
+
+
+class TestFeedItemHelper:
+
+    def test_decode_ok(self):
+        record = FeedItemHelper(_feed_item("full_station.xml")).decode()
+        assert record == FeedRecord(station_code="ESCAT4300000043206B",
+                                    temp_current=17.6, temp_max=17.9, temp_min=16.0, condition="hazesun",
+                                    humidity_current=77.0, humidity_max=96.0, humidity_min=74.0,
+                                    pressure_current=1002.0, pressure_max=1003.8, pressure_min=1000.9,
+                                    wind_current=0.0, wind_max=29.0, wind_bearing=300.0, rain=3.2)
+
+    def test_decode_missing_values(self):
+        record = FeedItemHelper(_feed_item("invalid_values.xml")).decode()
+        assert (record.wind_current, record.wind_max, record.wind_bearing) == (None, None, None)
+        record = FeedItemHelper(_feed_item("no_condition.xml")).decode()
+        assert record.condition is None
+        record = FeedItemHelper(_feed_item("no_humidity.xml")).decode()
+        assert (record.humidity_current, record.humidity_max, record.humidity_min) == (None, None, None)
+
+    @pytest.mark.parametrize("test_file", ["full_station.xml", "invalid_values.xml", "no_condition.xml",
+                                           "no_humidity.xml", "no_pressure.xml", "no_rain.xml", "no_wind.xml"])
+    def test_decode_matches_field_getters(self, test_file):
+        helper = FeedItemHelper(_feed_item(test_file))
+        record = helper.decode()
+        assert record.station_code == helper.get_text("station_code")
+        assert record.condition == helper.get_text("condition")
+        for field in FeedRecord._fields:
+            if field not in ("station_code", "condition"):
+                assert getattr(record, field) == helper.get_float(field)
+
+    def test_init_fails_without_data_block(self):
+        with pytest.raises(ValueError) as error:
+            FeedItemHelper(FeedItem("Title", "http://link", "Thu, 04 Jun 2020 10:48:01 +0000", "no data"))
+        assert str(error.value) == "Could not parse station information"
+
+
+class TestParseRfc822Date:
+
+    @pytest.mark.parametrize("text", [
+        "Thu, 04 Jun 2020 10:48:01 +0000",
+        "Mon, 31 Dec 2029 23:59:59 +0200",
+        "Sun, 01 Mar 2020 00:00:00 -0330",
+        "Sat, 29 Feb 2020 12:30:45 +1400",
+    ])
+    def test_matches_strptime(self, text):
+        expected = datetime.strptime(text, "%a, %d %b %Y %H:%M:%S %z")
+        parsed = parse_rfc822_date(text)
+        assert parsed == expected
+        assert parsed.utcoffset() == expected.utcoffset()
+
+    @pytest.mark.parametrize("text,expected", [
+        ("04 Jun 2020 10:48:01 +0000", datetime(2020, 6, 4, 10, 48, 1, tzinfo=timezone.utc)),
+        ("Thu, 4 jun 2020 10:48 GMT", datetime(2020, 6, 4, 10, 48, tzinfo=timezone.utc)),
+        ("  Thu,04 JUN 20 10:48:01 Z ", datetime(2020, 6, 4, 10, 48, 1, tzinfo=timezone.utc)),
+        ("Fri, 04 Jun 99 10:48:01 -0100", datetime(1999, 6, 4, 10, 48, 1, tzinfo=timezone(timedelta(hours=-1)))),
+        ("Thu, 04 Jun 2020 05:48:01 EST", datetime(2020, 6, 4, 5, 48, 1, tzinfo=timezone(timedelta(hours=-5)))),
+        ("Thu, 04 Jun 2020 06:48:01 edt", datetime(2020, 6, 4, 6, 48, 1, tzinfo=timezone(timedelta(hours=-4)))),
+        ("Thu, 04 Jun 2020 03:48:01 PDT", datetime(2020, 6, 4, 3, 48, 1, tzinfo=timezone(timedelta(hours=-7)))),
+    ])
+    def test_rfc822_variants(self, text, expected):
+        parsed = parse_rfc822_date(text)
+        assert parsed == expected
+        assert parsed.utcoffset() == expected.utcoffset()
+
+    @pytest.mark.parametrize("text", [
+        None, "", "yesterday", "Thu, 04 Jux 2020 10:48:01 +0000", "Thu, 31 Jun 2020 10:48:01 +0000",
+        "Thu, 04 Jun 2020 25:48:01 +0000", "Thu, 04 Jun 2020 10:48:01 +0060", "Thu, 04 Jun 2020 10:48:01 CEST",
+        "Thu, 04 Jun 2020 10:48:01 A",
+        "Thu, 04 Jun 2020 10:48:01 +0000 trailing",
+    ])
+    def test_invalid_dates(self, text):
+        with pytest.raises(ValueError):
+            parse_rfc822_date(text)
+
+    def test_memoizes_dates(self):
+        text = "Thu, 04 Jun 2020 10:48:01 +0000"
+        assert parse_rfc822_date(text) is parse_rfc822_date("".join(text))
@@ -0,0 +1,158 @@
+import gzip
+import io
+import logging
+import pytest
+from meteoclimatic import MeteoclimaticClient
+from meteoclimatic.cache import SQLiteFeedCache
+from meteoclimatic.exceptions import MeteoclimaticError
+from meteoclimatic.instrumentation import (PHASES, FeedMetrics, LoggingInstrumentation, MetricsCollector,
+                                           PrometheusInstrumentation)
+from meteoclimatic.transport import TransportResponse
+from tests.feed_server import FeedTransport, read_feed
+
+_REGION_URL = "https://www.meteoclimatic.net/feed/rss/ESCAT43"
+
+
+class RecordingInstrumentation(object):
+
+    def __init__(self):
+        self.metrics = []
+
+    def record(self, metrics):
+        self.metrics.append(metrics)
+
+
+class GzipTransport(FeedTransport):
+
+    def request(self, url, headers=None):
+        response = super().request(url, headers)
+        return TransportResponse(response.status, {"Content-Encoding": "gzip"},
+                                 io.BytesIO(gzip.compress(response.read())))
+
+
+class TestClientInstrumentation:
+
+    def setup_method(self):
+        self.transport = FeedTransport({"ESCAT43": "region.xml", "ESCAT08": 500})
+        self.instrumentation = RecordingInstrumentation()
+        self.client = MeteoclimaticClient(transport=self.transport, instrumentation=self.instrumentation)
+
+    def test_records_phases_of_a_lookup(self):
+        self.client.weather_at_region("ESCAT43")
+
+        [metrics] = self.instrumentation.metrics
+        assert metrics.url == _REGION_URL
+        assert metrics.status == 200
+        assert metrics.bytes == len(read_feed("region.xml"))
+        assert metrics.items == 3
+        assert metrics.skipped == 0
+        assert metrics.error is None
+        assert all(getattr(metrics, phase) > 0 for phase in PHASES)
+        assert metrics.total == pytest.approx(sum(getattr(metrics, phase) for phase in PHASES))
+
+    def test_records_compressed_bytes(self):
+        client = MeteoclimaticClient(transport=GzipTransport({"ESCAT43": "region.xml"}),
+                                     instrumentation=self.instrumentation)
+
+        client.weather_at_region("ESCAT43")
+
+        assert 0 < self.instrumentation.metrics[0].bytes < len(read_feed("region.xml"))
+
+    def test_records_revalidated_lookups(self):
+        self.client.weather_at_region("ESCAT43")
+        self.client.weather_at_region("ESCAT43")
+
+        metrics = self.instrumentation.metrics[1]
+        assert metrics.status == 304
+        assert metrics.items == 0
+        assert metrics.parse == 0.0
+
+    def test_records_errors(self):
+        with pytest.raises(MeteoclimaticError):
+            self.client.weather_at_region("ESCAT08")
+
+        [metrics] = self.instrumentation.metrics
+        assert isinstance(metrics.error, MeteoclimaticError)
+        assert metrics.items == 0
+
+    def test_records_skipped_items(self):
+        self.transport.feeds["ESCAT43"] = read_feed("region.xml").replace(b"Thu, 04 Jun 2020 10:50:00", b"yesterday")
+
+        assert len(self.client.weather_at_region("ESCAT43")) == 2
+        assert self.instrumentation.metrics[0].items == 3
+        assert self.instrumentation.metrics[0].skipped == 1
+
+    def test_records_streamed_lookups(self):
+        list(self.client.iter_observations("ESCAT43"))
+        list(self.client.poll_changes("ESCAT43"))
+
+        streamed, polled = self.instrumentation.metrics
+        assert (streamed.items, streamed.bytes) == (3, len(read_feed("region.xml")))
+        assert streamed.download == 0.0 and streamed.parse > 0
+        assert (polled.items, polled.bytes) == (3, len(read_feed("region.xml")))
+        assert polled.build > 0
+
+    def test_records_feed_cache_lookups(self, tmp_path):
+        client = MeteoclimaticClient(transport=self.transport, feed_cache=SQLiteFeedCache(str(tmp_path / "feeds.db")),
+                                     instrumentation=self.instrumentation)
+
+        client.weather_at_region("ESCAT43")
+        client.weather_at_region("ESCAT43")
+
+        downloaded, cached = self.instrumentation.metrics
+        assert downloaded.status == 200 and downloaded.bytes > 0
+        assert cached.status is None and cached.bytes == 0 and cached.connect == 0.0
+        assert cached.items == 3
+
+
+class TestMetricsCollector:
+
+    def test_counters(self):
+        collector = MetricsCollector()
+        client = MeteoclimaticClient(transport=FeedTransport({"ESCAT43": "region.xml", "ESCAT08": 500}),
+                                     instrumentation=collector)
+
+        client.weather_at_region("ESCAT43")
+        with pytest.raises(MeteoclimaticError):
+            client.weather_at_region("ESCAT08")
+        counters = collector.counters()
+
+        assert {name: counters[name] for name in ("fetches", "errors", "bytes", "items", "skipped")} == {
+            "fetches": 2, "errors": 1, "bytes": len(read_feed("region.xml")), "items": 3, "skipped": 0}
+        assert all(counters["%s_seconds" % (phase, )] > 0 for phase in PHASES)
+
+
+class TestLoggingInstrumentation:
+
+    def test_logs_lookups(self, caplog):
+        metrics = FeedMetrics(_REGION_URL)
+        metrics.status, metrics.bytes, metrics.items = 200, 1024, 3
+        failed = FeedMetrics(_REGION_URL)
+        failed.error = MeteoclimaticError("Error fetching station data [status_code=500]")
+
+        with caplog.at_level(logging.DEBUG):
+            LoggingInstrumentation().record(metrics)
+            LoggingInstrumentation().record(failed)
+
+        assert [record.levelno for record in caplog.records] == [logging.DEBUG, logging.WARNING]
+        assert "Fetched feed %s [status=200]" % (_REGION_URL, ) in caplog.records[0].getMessage()
+        assert "bytes=1024 items=3 skipped=0" in caplog.records[0].getMessage()
+        assert "status_code=500" in caplog.records[1].getMessage()
+
+
+class TestPrometheusInstrumentation:
+
+    def test_exports_metrics(self):
+        prometheus_client = pytest.importorskip("prometheus_client")
+        registry = prometheus_client.CollectorRegistry()
+        instrumentation = PrometheusInstrumentation(registry=registry)
+        metrics = FeedMetrics(_REGION_URL)
+        metrics.bytes, metrics.items, metrics.parse = 1024, 3, 0.002
+
+        instrumentation.record(metrics)
+
+        assert registry.get_sample_value("meteoclimatic_fetches_total") == 1
+        assert registry.get_sample_value("meteoclimatic_bytes_total") == 1024
+        assert registry.get_sample_value("meteoclimatic_items_total") == 3
+        assert registry.get_sample_value("meteoclimatic_phase_seconds_count", {"phase": "parse"}) == 1
+        assert registry.get_sample_value("meteoclimatic_phase_seconds_count", {"phase": "connect"}) is None
@@ -1,8 +1,11 @@
 import pytest
+import pickle
 import os
 from datetime import datetime, timezone
 from bs4 import BeautifulSoup
 from meteoclimatic import Observation, Station, Weather, Condition
+from meteoclimatic.observation import LazyObservation, LazyWeather
+from meteoclimatic.parser import iter_feed_items
 
 
 class TestObservation:
@@ -57,7 +60,9 @@ class TestObservation:
                                     1, 0, timezone.utc),
             station=Station(name="Reus - Nord (Tarragona)",
                             code="ESCAT4300000043206B",
-                            url="http://www.meteoclimatic.net/perfil/ESCAT4300000043206B"),
+                            url="http://www.meteoclimatic.net/perfil/ESCAT4300000043206B",
+                            latitude=41.17,
+                            longitude=1.11),
             weather=Weather(reference_time=datetime(2020, 6, 4, 10, 48,
                                                     1, 0, timezone.utc),
                             condition=Condition.hazesun,
@@ -80,7 +85,9 @@ class TestObservation:
                                                     1, 0, timezone.utc),
             station=Station(name="Cornellà - Gavarra (Barcelona)",
                             code="ESCAT0800000008940B",
-                            url="http://www.meteoclimatic.net/perfil/ESCAT0800000008940B"),
+                            url="http://www.meteoclimatic.net/perfil/ESCAT0800000008940B",
+                            latitude=41.36,
+                            longitude=2.08),
             weather=Weather(reference_time=datetime(2020, 6, 18, 8, 16,
                                                     1, 0, timezone.utc),
                             condition=None,
@@ -103,7 +110,9 @@ class TestObservation:
                                     0, 0, timezone.utc),
             station=Station(name="Mompía (Cantabria)",
                             code="ESCTB3900000039108A",
-                            url="http://www.meteoclimatic.net/perfil/ESCTB3900000039108A"),
+                            url="http://www.meteoclimatic.net/perfil/ESCTB3900000039108A",
+                            latitude=43.44,
+                            longitude=-3.92),
             weather=Weather(reference_time=datetime(2020, 6, 4, 11, 0,
                                                     0, 0, timezone.utc),
                             condition=Condition.hazesun,
@@ -126,7 +135,9 @@ class TestObservation:
                                     0, 0, timezone.utc),
             station=Station(name="Sopeña de Curueño (León)",
                             code="ESCYL2400000024840A",
-                            url="http://www.meteoclimatic.net/perfil/ESCYL2400000024840A"),
+                            url="http://www.meteoclimatic.net/perfil/ESCYL2400000024840A",
+                            latitude=42.81,
+                            longitude=-5.41),
             weather=Weather(reference_time=datetime(2020, 6, 4, 10, 39,
                                                     0, 0, timezone.utc),
                             condition=Condition.hazesun,
@@ -149,7 +160,9 @@ class TestObservation:
                                     0, 0, timezone.utc),
             station=Station(name="Zafrilla (La Reclovilla) (Cuenca)",
                             code="ESCLM1600000016317D",
-                            url="http://www.meteoclimatic.net/perfil/ESCLM1600000016317D"),
+                            url="http://www.meteoclimatic.net/perfil/ESCLM1600000016317D",
+                            latitude=40.29,
+                            longitude=-1.68),
             weather=Weather(reference_time=datetime(2020, 6, 4, 10, 45,
                                                     0, 0, timezone.utc),
                             condition=Condition.rain,
@@ -172,7 +185,9 @@ class TestObservation:
                                     0, 0, timezone.utc),
             station=Station(name="Sopeña de Curueño (León)",
                             code="ESCYL2400000024840A",
-                            url="http://www.meteoclimatic.net/perfil/ESCYL2400000024840A"),
+                            url="http://www.meteoclimatic.net/perfil/ESCYL2400000024840A",
+                            latitude=42.81,
+                            longitude=-5.41),
             weather=Weather(reference_time=datetime(2020, 6, 4, 10, 39,
                                                     0, 0, timezone.utc),
                             condition=Condition.hazesun,
@@ -195,7 +210,9 @@ class TestObservation:
                                     0, 0, timezone.utc),
             station=Station(name="Puçol-Ciudad Jardín (Valencia)",
                             code="ESPVA4600000046530D",
-                            url="http://www.meteoclimatic.net/perfil/ESPVA4600000046530D"),
+                            url="http://www.meteoclimatic.net/perfil/ESPVA4600000046530D",
+                            latitude=39.62,
+                            longitude=-0.31),
             weather=Weather(reference_time=datetime(2020, 6, 4, 10, 45,
                                                     0, 0, timezone.utc),
                             condition=Condition.sun,
@@ -222,3 +239,96 @@ class TestObservation:
         items = soup_page.findAll("item")
         actual = Observation.from_feed_item(items[0])
         assert actual == expected_result
+
+    def test_slots(self):
+        o = Observation(**self._test_dict)
+        for obj in (o, o.station, o.weather):
+            assert not hasattr(obj, "__dict__")
+        with pytest.raises(AttributeError):
+            o.foo = "bar"
+
+    @pytest.mark.parametrize("protocol", range(pickle.HIGHEST_PROTOCOL + 1))
+    def test_pickle(self, protocol):
+        o = Observation(**self._test_dict)
+        copy = pickle.loads(pickle.dumps(o, protocol))
+        assert copy == o
+        assert copy is not o
+        assert "'code': 'ESCAT4300000043206B'" in repr(copy.station)
+
+
+def _feed_items(test_file):
+    with open(os.path.join(os.path.dirname(__file__), "feeds", test_file), "rb") as f:
+        return list(iter_feed_items(f.read()))
+
+
+class TestLazyObservation:
+
+    @pytest.mark.parametrize("test_file", ["full_station.xml", "no_condition.xml", "no_humidity.xml",
+                                           "no_pressure.xml", "no_rain.xml", "no_wind.xml", "region.xml"])
+    def test_equals_eager_observation(self, test_file):
+        for item in _feed_items(test_file):
+            lazy = Observation.from_feed_item(item, lazy=True)
+
+            assert isinstance(lazy, LazyObservation)
+            assert isinstance(lazy.weather, LazyWeather)
+            assert lazy == Observation.from_feed_item(item)
+            assert Observation.from_feed_item(item, lazy=True).validate() == Observation.from_feed_item(item)
+
+    def test_decodes_fields_on_first_access(self):
+        lazy = Observation.from_feed_item(_feed_items("region.xml")[0], lazy=True)
+
+        assert lazy.station.code == "ESCAT4300000043206B"
+        assert lazy.weather.temp_current == 17.6
+        # Decoded values are stored in the slots, the other slots stay unset
+        assert Weather.temp_current.__get__(lazy.weather) == 17.6
+        with pytest.raises(AttributeError):
+            Weather.humidity_current.__get__(lazy.weather)
+        with pytest.raises(AttributeError):
+            lazy.weather.foo
+
+    @pytest.mark.parametrize("replaced,replacement,error", [
+        (";(77,0;", ";(177,0;", "humidity must be between 0 and 100"),
+        ("Thu, 04 Jun 2020 10:48:01", "yesterday", "Invalid RFC 822 date"),
+    ])
+    def test_raises_validation_errors_on_access(self, replaced, replacement, error):
+        item = _feed_items("region.xml")[0]
+        item.description = item.description.replace(replaced, replacement)
+        item.pub_date = item.pub_date.replace(replaced, replacement)
+        with pytest.raises(ValueError, match=error):
+            Observation.from_feed_item(item)
+
+        lazy = Observation.from_feed_item(item, lazy=True)
+
+        assert lazy.station.code == "ESCAT4300000043206B"
+        with pytest.raises(ValueError, match=error):
+            lazy.validate()
+
+    def test_repr_does_not_decode(self):
+        item = _feed_items("region.xml")[0]
+        item.description = item.description.replace(";(77,0;", ";(177,0;")
+        lazy = Observation.from_feed_item(item, lazy=True)
+        lazy.weather.temp_current
+
+        text = repr(lazy)
+
+        assert "'temp_current': 17.6" in text
+        assert "'humidity_current': <undecoded>" in text
+        assert "'station': <undecoded>" in text
+        with pytest.raises(ValueError, match="humidity must be between 0 and 100"):
+            lazy.weather.humidity_current
+
+    def test_raises_when_data_block_is_missing(self):
+        item = _feed_items("region.xml")[0]
+        item.description = "no data"
+
+        with pytest.raises(ValueError, match="Could not parse station information"):
+            Observation.from_feed_item(item, lazy=True)
+
+    @pytest.mark.parametrize("protocol", range(pickle.HIGHEST_PROTOCOL + 1))
+    def test_pickle(self, protocol):
+        lazy = Observation.from_feed_item(_feed_items("full_station.xml")[0], lazy=True)
+
+        copy = pickle.loads(pickle.dumps(lazy, protocol))
+
+        assert type(copy) is Observation and type(copy.weather) is Weather
+        assert copy == lazy
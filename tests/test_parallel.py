@@ -0,0 +1,57 @@
+import os
+import pytest
+from meteoclimatic import Observation
+from meteoclimatic.parallel import parse_feeds
+from meteoclimatic.parser import iter_feed_items
+from tests.feed_server import read_feed
+
+_feeds_dir = os.path.join(os.path.dirname(__file__), "feeds")
+
+
+def _observations(test_file):
+    return [Observation.from_feed_item(item) for item in iter_feed_items(read_feed(test_file))]
+
+
+class TestParseFeeds:
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    @pytest.mark.parametrize("chunk_size", [1, 1024 * 1024])
+    def test_keeps_order_of_documents_and_items(self, workers, chunk_size):
+        sources = [os.path.join(_feeds_dir, "region.xml"), read_feed("no_humidity.xml"),
+                   read_feed("region.xml"), os.path.join(_feeds_dir, "full_station.xml")]
+
+        observations = list(parse_feeds(sources, workers=workers, chunk_size=chunk_size))
+
+        assert observations == (_observations("region.xml") + _observations("no_humidity.xml") +
+                                _observations("region.xml") + _observations("full_station.xml"))
+
+    @pytest.mark.parametrize("engine", ["lxml", "bs4", "raw"])
+    def test_engines(self, engine):
+        observations = list(parse_feeds([read_feed("region.xml")], workers=1, engine=engine, chunk_size=1))
+
+        assert observations == _observations("region.xml")
+
+    def test_skips_unparseable_items_and_empty_files(self, tmp_path):
+        empty = tmp_path / "empty.xml"
+        empty.write_bytes(b"")
+        broken = read_feed("region.xml").replace(b"Thu, 04 Jun 2020 10:50:00", b"yesterday")
+
+        observations = list(parse_feeds([empty, broken, b"<rss/>"], workers=1, chunk_size=1))
+
+        assert [o.station.code for o in observations] == ["ESCAT4300000043206B", "ESCAT0800000008940B"]
+
+    def test_batch_output(self):
+        pytest.importorskip("numpy")
+        from meteoclimatic.batch import ObservationBatch
+
+        batch = parse_feeds([os.path.join(_feeds_dir, "region.xml"), read_feed("no_humidity.xml")],
+                            workers=2, chunk_size=1, output="batch")
+
+        assert batch == ObservationBatch.from_observations(_observations("region.xml") +
+                                                           _observations("no_humidity.xml"))
+
+    @pytest.mark.parametrize("kwargs", [{"workers": 0}, {"engine": "html5lib"}, {"output": "dataframe"},
+                                        {"chunk_size": 0}])
+    def test_invalid_arguments(self, kwargs):
+        with pytest.raises(ValueError):
+            parse_feeds([], **kwargs)
@@ -0,0 +1,108 @@
+import io
+import os
+import pytest
+from meteoclimatic import Observation
+from meteoclimatic.feed import FeedChannel, FeedItem
+from meteoclimatic.parser import IncrementalFeedParser, iter_feed_items, iter_items_lxml
+
+_feed_files = ["full_station.xml", "invalid_values.xml", "no_condition.xml", "no_humidity.xml",
+               "no_pressure.xml", "no_rain.xml", "no_wind.xml", "region.xml"]
+
+
+def _read_feed(test_file):
+    with open(os.path.join(os.path.dirname(__file__), "feeds", test_file), "rb") as f:
+        return f.read()
+
+
+class TestParser:
+
+    def test_lxml_items_ok(self):
+        items = list(iter_feed_items(_read_feed("full_station.xml"), "lxml"))
+        assert len(items) == 1
+        assert items[0].title == "Reus - Nord (Tarragona)"
+        assert items[0].link == "http://www.meteoclimatic.net/perfil/ESCAT4300000043206B"
+        assert items[0].pub_date == "Thu, 04 Jun 2020 10:48:01 +0000"
+        assert items[0].guid == "72835ce6195965cd1ba2d61b014de688"
+        assert items[0].latitude == "41.17"
+        assert items[0].longitude == "1.11"
+        assert "[[<ESCAT4300000043206B;(17,6;17,9;16,0;hazesun);" in items[0].description
+
+    @pytest.mark.parametrize("engine", ["lxml", "raw"])
+    @pytest.mark.parametrize("test_file", _feed_files)
+    def test_engines_yield_same_observations(self, engine, test_file):
+        data = _read_feed(test_file)
+        observations = [Observation.from_feed_item(i) for i in iter_feed_items(data, engine)]
+        bs4_observations = [Observation.from_feed_item(i) for i in iter_feed_items(data, "bs4")]
+        assert len(observations) > 0
+        assert observations == bs4_observations
+
+    @pytest.mark.parametrize("engine", ["lxml", "raw"])
+    @pytest.mark.parametrize("test_file", _feed_files)
+    def test_engines_yield_same_item_fields(self, engine, test_file):
+        data = _read_feed(test_file)
+        items = list(iter_feed_items(data, engine))
+        bs4_items = list(iter_feed_items(data, "bs4"))
+        assert len(items) == len(bs4_items)
+        for item, bs4_item in zip(items, bs4_items):
+            assert (item.title, item.link, item.pub_date, item.guid, item.latitude, item.longitude) == \
+                (bs4_item.title, bs4_item.link, bs4_item.pub_date, bs4_item.guid, bs4_item.latitude, bs4_item.longitude)
+
+    def test_raw_items_ok(self):
+        items = list(iter_feed_items(_read_feed("invalid_values.xml"), "raw"))
+        assert items[0].title == "Puçol-Ciudad Jardín (Valencia)"
+        assert items[0].description.strip() == \
+            "[[<ESPVA4600000046530D;(23,1;25,4;19,6;sun);(49,0;85,0;47,0);(1002,2;1002,8;999,9);" \
+            "(-99,0;-99,0;-99);(0,2);Pu&#231;ol-Ciudad Jard&#237;n>]]"
+
+    def test_raw_reads_declared_encoding(self):
+        data = _read_feed("invalid_values.xml").decode("utf-8")
+        data = '<?xml version="1.0" encoding="ISO-8859-1"?>\n' + data.replace("&#231;", "ç")
+        items = list(iter_feed_items(data.encode("iso-8859-1"), "raw"))
+        assert items[0].title == "Puçol-Ciudad Jardín (Valencia)"
+
+    @pytest.mark.parametrize("engine", ["lxml", "bs4", "raw"])
+    @pytest.mark.parametrize("data", [b"", "", b"   ", b"<html><body>oops"])
+    def test_no_items(self, engine, data):
+        assert list(iter_feed_items(data, engine)) == []
+
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError) as error:
+            iter_feed_items(b"", "foo")
+        assert str(error.value) == "Unknown parser engine 'foo'"
+
+    def test_from_feed_item_accepts_feed_item(self):
+        item = FeedItem("Reus - Nord (Tarragona)", "http://www.meteoclimatic.net/perfil/ESCAT4300000043206B",
+                        "Thu, 04 Jun 2020 10:48:01 +0000",
+                        "[[<ESCAT4300000043206B;(17,6;17,9;16,0;hazesun);(77,0;96,0;74,0);"
+                        "(1002,0;1003,8;1000,9);(0,0;29,0;300);(3,2);Reus - Nord>]]")
+        observation = Observation.from_feed_item(item)
+        assert observation.station.code == "ESCAT4300000043206B"
+        assert observation.weather.rain == 3.2
+
+    def test_incremental_parser_yields_items_as_they_are_closed(self):
+        data = _read_feed("region.xml")
+        parser = IncrementalFeedParser()
+        first_item_end = data.index(b"</item>") + len(b"</item>")
+
+        assert parser.feed(data[:first_item_end - 1]) == []
+        items = parser.feed(data[first_item_end - 1:first_item_end])
+        assert [i.link for i in items] == ["http://www.meteoclimatic.net/perfil/ESCAT4300000043206B"]
+        items = parser.feed(data[first_item_end:]) + parser.close()
+        assert len(items) == 2
+
+    def test_lxml_reads_file_objects_in_chunks(self):
+        data = _read_feed("region.xml")
+        items = list(iter_items_lxml(io.BytesIO(data), chunk_size=16))
+        assert items == list(iter_feed_items(data, "lxml"))
+
+    @pytest.mark.parametrize("engine", ["lxml", "bs4", "raw"])
+    def test_channel_ttl(self, engine):
+        channel = FeedChannel()
+        list(iter_feed_items(_read_feed("region.xml"), engine, channel))
+        assert channel.ttl == 60
+
+    @pytest.mark.parametrize("engine", ["lxml", "bs4", "raw"])
+    def test_channel_without_ttl(self, engine):
+        channel = FeedChannel()
+        list(iter_feed_items(_read_feed("region.xml").replace(b"<ttl>60</ttl>", b"<ttl>soon</ttl>"), engine, channel))
+        assert channel.ttl is None
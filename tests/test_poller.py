@@ -0,0 +1,221 @@
+import asyncio
+import io
+import threading
+from datetime import datetime, timezone
+import pytest
+from meteoclimatic import MeteoclimaticClient
+from meteoclimatic.exceptions import ServiceUnavailable
+from meteoclimatic.poller import Poller
+from meteoclimatic.transport import TransportResponse
+from tests.feed_server import FeedTransport, read_feed
+
+_NOW = datetime(2020, 6, 4, 10, 58, 23, tzinfo=timezone.utc).timestamp()
+
+
+class FakeClock(object):
+
+    def __init__(self, now=_NOW):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _republished(published, temperature):
+    # New reading of ESCAT4300000043204A, published at 10:50:00 with 18,1 degrees in region.xml
+    return (read_feed("region.xml")
+            .replace(b"Thu, 04 Jun 2020 10:50:00", b"Thu, 04 Jun 2020 " + published)
+            .replace(b"(18,1;", b"(" + temperature + b";"))
+
+
+class TestPoller:
+
+    def setup_method(self):
+        self.transport = FeedTransport({"ESCAT43": "region.xml", "ESCYL2400000024840A": "no_humidity.xml"})
+        self.client = MeteoclimaticClient(transport=self.transport)
+        self.clock = FakeClock()
+
+    def test_poll_respects_ttl(self):
+        poller = Poller(self.client, jitter=0, clock=self.clock)
+        poller.add("ESCAT43")
+
+        assert poller.next_delay() == 0.0
+        observations = poller.poll_next()
+
+        assert len(observations) == 3
+        # The feed <ttl> is 60 minutes
+        assert poller.due_time("ESCAT43") == _NOW + 3600
+        assert poller.next_delay() == 3600
+        assert poller.poll_next() == []
+        assert len(self.transport.urls) == 1
+
+    def test_learns_update_interval(self):
+        start = datetime(2020, 6, 4, 10, 51, tzinfo=timezone.utc).timestamp()
+        self.clock.now = start
+        poller = Poller(self.client, jitter=0, respect_ttl=False, min_interval=30, clock=self.clock)
+        poller.add("ESCAT43")
+        poller.poll_next()
+        assert poller.due_time("ESCAT43") == start + 600
+
+        self.clock.now = start + 600
+        self.transport.feeds["ESCAT43"] = _republished(b"10:55:00", b"18,2")
+        changed = poller.poll_next()
+
+        assert [o.station.code for o in changed] == ["ESCAT4300000043204A"]
+        # The next reading was expected at 11:00, so the station is late and polled again soon
+        assert poller.due_time("ESCAT43") == start + 600 + 30
+
+        self.clock.now = start + 630
+        self.transport.feeds["ESCAT43"] = _republished(b"11:00:00", b"18,3")
+        assert len(poller.poll_next()) == 1
+        # Published at 11:00, next reading expected at 11:05
+        assert poller.due_time("ESCAT43") == datetime(2020, 6, 4, 11, 5, tzinfo=timezone.utc).timestamp()
+
+    def test_interval_bounds_and_jitter(self):
+        poller = Poller(self.client, respect_ttl=False, default_interval=10000, max_interval=1200, jitter=0.5,
+                        clock=self.clock)
+        poller.add("ESCAT43")
+        poller.poll_next()
+
+        assert _NOW + 1200 <= poller.due_time("ESCAT43") <= _NOW + 1800
+
+    def test_request_budget(self):
+        poller = Poller(self.client, requests_per_second=0.5, clock=self.clock)
+        poller.add("ESCAT43")
+        poller.add("ESCYL2400000024840A")
+
+        assert len(poller.poll_next()) == 3
+        assert poller.next_delay() == 2.0
+        assert poller.poll_next() == []
+
+        self.clock.now += 2.0
+        assert len(poller.poll_next()) == 1
+        assert len(self.transport.urls) == 2
+
+    def test_failures_back_off(self):
+        errors = []
+        self.transport.feeds["ESCAT43"] = 500
+        poller = Poller(self.client, jitter=0, min_interval=60, on_error=lambda code, exc: errors.append(code),
+                        clock=self.clock)
+        poller.add("ESCAT43")
+
+        poller.poll_next()
+        assert poller.due_time("ESCAT43") == _NOW + 60
+        self.clock.now += 60
+        poller.poll_next()
+        assert poller.due_time("ESCAT43") == _NOW + 60 + 120
+
+        self.transport.feeds["ESCAT43"] = "region.xml"
+        self.clock.now += 120
+        assert len(poller.poll_next()) == 3
+        assert errors == ["ESCAT43", "ESCAT43"]
+
+    def test_connection_errors_back_off(self):
+        errors = []
+        self.transport.feeds["ESCAT43"] = ConnectionRefusedError("Connection refused")
+        poller = Poller(self.client, jitter=0, min_interval=60, on_error=lambda code, exc: errors.append(exc),
+                        clock=self.clock)
+        poller.add("ESCAT43")
+
+        assert poller.poll_next() == []
+        assert poller.due_time("ESCAT43") == _NOW + 60
+        assert isinstance(errors[0], ServiceUnavailable)
+
+    def test_unexpected_errors_back_off(self):
+        errors = []
+        self.transport.feeds["ESCAT43"] = RuntimeError("database is locked")
+        poller = Poller(self.client, jitter=0, min_interval=60, on_error=lambda code, exc: errors.append(exc),
+                        clock=self.clock)
+        poller.add("ESCAT43")
+
+        assert poller.poll_next() == []
+        assert "ESCAT43" in poller
+        assert poller.next_delay() == 60
+        assert isinstance(errors[0], RuntimeError)
+
+    def test_failing_error_handler_keeps_the_feed_scheduled(self):
+        def on_error(code, exc):
+            raise RuntimeError("handler failed")
+
+        self.transport.feeds["ESCAT43"] = 500
+        poller = Poller(self.client, jitter=0, min_interval=60, on_error=on_error, clock=self.clock)
+        poller.add("ESCAT43")
+
+        with pytest.raises(RuntimeError, match="handler failed"):
+            poller.poll_next()
+        assert "ESCAT43" in poller
+        assert poller.next_delay() == 60
+
+    def test_delivers_observations_before_a_connection_reset(self):
+        body = read_feed("region.xml")
+        cut = body.index(b"</item>") + len(b"</item>")
+
+        class ResetStream(io.BytesIO):
+            def read(self, size=-1):
+                if self.tell() >= cut:
+                    raise ConnectionResetError("Connection reset by peer")
+                return super().read(cut - self.tell() if size is None or size < 0 else min(size, cut - self.tell()))
+
+        errors = []
+        self.transport.request = lambda url, headers=None: TransportResponse(200, {}, ResetStream(body))
+        poller = Poller(self.client, jitter=0, min_interval=60, on_error=lambda code, exc: errors.append(exc),
+                        clock=self.clock)
+        poller.add("ESCAT43")
+
+        # The first item was already tracked as seen, so it is delivered despite the error
+        assert [o.station.code for o in poller.poll_next()] == ["ESCAT4300000043206B"]
+        assert poller.due_time("ESCAT43") == _NOW + 60
+        assert isinstance(errors[0], ServiceUnavailable)
+
+    def test_remove(self):
+        poller = Poller(self.client, clock=self.clock)
+        poller.add("ESCAT43")
+        poller.add("ESCYL2400000024840A", delay=10)
+
+        poller.remove("ESCAT43")
+
+        assert "ESCAT43" not in poller and len(poller) == 1
+        assert poller.next_delay() == 10
+        poller.remove("ESCYL2400000024840A")
+        assert poller.next_delay() is None
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError) as error:
+            Poller(self.client, requests_per_second=0)
+        assert str(error.value) == "requests_per_second must be greater than 0"
+        with pytest.raises(ValueError) as error:
+            Poller(self.client).run()
+        assert str(error.value) == "A callback is required to run the poller"
+
+    def test_run(self):
+        received = []
+
+        def callback(observation):
+            received.append(observation.station.code)
+            if len(received) == 4:
+                poller.stop()
+
+        poller = Poller(self.client, callback=callback, requests_per_second=100)
+        poller.add("ESCAT43")
+        poller.add("ESCYL2400000024840A")
+        thread = threading.Thread(target=poller.run)
+        thread.start()
+        thread.join(5)
+
+        assert not thread.is_alive()
+        assert sorted(received) == ["ESCAT0800000008940B", "ESCAT4300000043204A",
+                                    "ESCAT4300000043206B", "ESCYL2400000024840A"]
+
+    def test_observations(self):
+        poller = Poller(self.client, requests_per_second=100)
+        poller.add("ESCAT43")
+
+        async def consume():
+            received = []
+            async for observation in poller.observations():
+                received.append(observation.station.code)
+                if len(received) == 3:
+                    poller.stop()
+            return received
+
+        assert asyncio.run(consume()) == ["ESCAT4300000043206B", "ESCAT4300000043204A", "ESCAT0800000008940B"]
@@ -0,0 +1,238 @@
+import io
+import socket
+import pytest
+from meteoclimatic import MeteoclimaticClient
+from meteoclimatic.exceptions import CircuitOpen, MeteoclimaticError, ServiceUnavailable
+from meteoclimatic.resilience import CircuitBreaker, ResilientTransport, TokenBucket
+from meteoclimatic.transport import DEFAULT_TIMEOUT, PooledTransport, TransportResponse
+from tests.feed_server import FeedTransport
+
+_URL = "https://www.meteoclimatic.net/feed/rss/ESCAT4300000043206B"
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class ScriptedTransport(object):
+    """Transport failing with the given exceptions or statuses before serving an empty feed."""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.requests = 0
+
+    def request(self, url, headers=None):
+        self.requests += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else 200
+        if isinstance(outcome, BaseException):
+            raise outcome
+        if isinstance(outcome, tuple):
+            outcome, headers = outcome
+        else:
+            headers = {}
+        return TransportResponse(outcome, headers, io.BytesIO(b""))
+
+
+class TestTokenBucket:
+
+    def test_invalid_rate(self):
+        with pytest.raises(ValueError):
+            TokenBucket(0)
+
+    def test_throttles_over_the_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(2, capacity=2, clock=clock, sleep=clock.sleep)
+
+        waits = [bucket.acquire() for _ in range(4)]
+
+        assert waits == [0.0, 0.0, 0.5, 0.5]
+        assert clock.sleeps == [0.5, 0.5]
+        assert bucket.throttled == 2
+        assert bucket.throttled_seconds == 1.0
+
+    def test_refills_over_time(self):
+        clock = FakeClock()
+        bucket = TokenBucket(1, clock=clock, sleep=clock.sleep)
+
+        bucket.acquire()
+        assert bucket.throttling
+        clock.now += 1
+        assert not bucket.throttling
+        assert bucket.acquire() == 0.0
+
+
+class TestCircuitBreaker:
+
+    def test_opens_after_consecutive_failures(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow()
+        assert breaker.opened == 1
+
+    def test_half_open_lets_a_single_trial_through(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+
+        clock.now += 10
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow()
+        assert not breaker.allow()
+
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.opened == 2
+
+        clock.now += 10
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow()
+
+
+class TestResilientTransport:
+
+    def setup_method(self):
+        self.clock = FakeClock()
+
+    def _transport(self, outcomes, **kwargs):
+        kwargs.setdefault("backoff_factor", 1)
+        return ResilientTransport(ScriptedTransport(outcomes), clock=self.clock, sleep=self.clock.sleep, **kwargs)
+
+    def test_retries_errors_with_backoff(self):
+        transport = self._transport([socket.timeout("timed out"), 503, ConnectionResetError()], retries=3)
+
+        response = transport.request(_URL)
+
+        assert response.status == 200
+        assert len(self.clock.sleeps) == 3
+        assert all(0.5 * 2 ** n <= delay <= 2 ** n for n, delay in enumerate(self.clock.sleeps))
+        assert transport.counters() == {"requests": 4, "retried": 3, "failed": 0, "rejected": 0,
+                                        "circuits_opened": 0, "circuits_open": 0}
+
+    def test_does_not_retry_client_errors(self):
+        transport = self._transport([404])
+
+        assert transport.request(_URL).status == 404
+        assert self.clock.sleeps == []
+
+    def test_honors_retry_after(self):
+        transport = self._transport([(429, {"Retry-After": "5"})], max_backoff=10)
+
+        assert transport.request(_URL).status == 200
+        assert self.clock.sleeps == [5.0]
+
+    def test_raises_service_unavailable(self):
+        transport = self._transport([OSError("unreachable")] * 3, retries=2)
+
+        with pytest.raises(ServiceUnavailable) as error:
+            transport.request(_URL)
+
+        assert "www.meteoclimatic.net" in str(error.value)
+        assert transport.counters()["failed"] == 1
+
+    def test_returns_error_responses_once_retries_are_exhausted(self):
+        transport = self._transport([500, 500], retries=1)
+
+        assert transport.request(_URL).status == 500
+        assert transport.counters()["failed"] == 1
+
+    def test_circuit_fails_fast_while_open(self):
+        transport = self._transport([OSError()] * 2, retries=0, failure_threshold=2, reset_timeout=30)
+        for _ in range(2):
+            with pytest.raises(ServiceUnavailable):
+                transport.request(_URL)
+
+        with pytest.raises(CircuitOpen) as error:
+            transport.request(_URL)
+
+        assert error.value.host == "www.meteoclimatic.net"
+        assert transport._transport.requests == 2
+        assert transport.counters()["rejected"] == 1
+        assert transport.counters()["circuits_open"] == 1
+
+        self.clock.now += 30
+        assert transport.request(_URL).status == 200
+        assert transport.circuit_breaker("www.meteoclimatic.net").state == CircuitBreaker.CLOSED
+
+    def test_unexpected_errors_release_the_trial_request(self):
+        transport = self._transport([OSError(), TypeError("bad header"), KeyboardInterrupt()],
+                                    retries=0, failure_threshold=1, reset_timeout=30)
+        breaker = transport.circuit_breaker("www.meteoclimatic.net")
+        with pytest.raises(ServiceUnavailable):
+            transport.request(_URL)
+
+        self.clock.now += 30
+        with pytest.raises(TypeError):
+            transport.request(_URL)
+        with pytest.raises(KeyboardInterrupt):
+            transport.request(_URL)
+        # Neither is counted as a failure of the host
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.failures == 1 and breaker.opened == 1
+
+        assert transport.request(_URL).status == 200
+        assert transport.circuit_breaker("www.meteoclimatic.net").state == CircuitBreaker.CLOSED
+
+    def test_retries_stop_when_the_circuit_opens(self):
+        transport = self._transport([OSError()] * 5, retries=5, failure_threshold=2)
+
+        with pytest.raises(CircuitOpen):
+            transport.request(_URL)
+
+        assert transport._transport.requests == 2
+
+    def test_rate_limiter(self):
+        bucket = TokenBucket(1, clock=self.clock, sleep=self.clock.sleep)
+        transport = self._transport([], rate_limiter=bucket)
+
+        for _ in range(3):
+            transport.request(_URL)
+
+        assert self.clock.sleeps == [1.0, 1.0]
+        assert transport.counters()["throttled"] == 2
+        assert transport.counters()["throttled_seconds"] == 2.0
+
+    def test_default_transport_timeout(self):
+        assert ResilientTransport()._transport._timeout == DEFAULT_TIMEOUT
+
+    def test_times_out_stalled_connections(self):
+        with socket.socket() as server:
+            server.bind(("127.0.0.1", 0))
+            server.listen(1)
+            url = "http://127.0.0.1:%d/feed/rss/ESCAT43" % (server.getsockname()[1], )
+            transport = ResilientTransport(PooledTransport(timeout=0.1), retries=1, sleep=self.clock.sleep)
+
+            with pytest.raises(ServiceUnavailable):
+                transport.request(url)
+
+        assert transport.counters()["retried"] == 1
+
+    def test_client_collects_unavailable_feeds(self):
+        feeds = FeedTransport({"ESCAT4300000043206B": "full_station.xml", "ESCAT08": 503})
+        transport = ResilientTransport(feeds, retries=1, clock=self.clock, sleep=self.clock.sleep)
+        client = MeteoclimaticClient(transport=transport)
+
+        res = client.weather_at_stations(["ESCAT4300000043206B", "ESCAT0800000008940B", "ESCAT0800000008001A"])
+
+        assert list(res.keys()) == ["ESCAT4300000043206B"]
+        assert isinstance(res.errors["ESCAT0800000008940B"], MeteoclimaticError)
+        assert feeds.urls.count("https://www.meteoclimatic.net/feed/rss/ESCAT08") == 2
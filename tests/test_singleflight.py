@@ -0,0 +1,101 @@
+import asyncio
+import threading
+import pytest
+from meteoclimatic.singleflight import AsyncSingleFlight, SingleFlight
+
+
+class TestSingleFlight:
+
+    def test_sequential_calls_are_not_coalesced(self):
+        flights = SingleFlight()
+        calls = []
+
+        assert flights.do("key", lambda: calls.append(1) or len(calls)) == 1
+        assert flights.do("key", lambda: calls.append(1) or len(calls)) == 2
+        assert flights.waiters("key") == 0
+
+    def test_concurrent_callers_share_the_result(self):
+        flights = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        calls, results = [], []
+
+        def function(value):
+            calls.append(value)
+            started.set()
+            release.wait(5)
+            return [value]
+
+        leader = threading.Thread(target=lambda: results.append(flights.do("key", function, 1)))
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=lambda: results.append(flights.do("key", function, 2))) for _ in range(5)]
+        for follower in followers:
+            follower.start()
+        while flights.waiters("key") < 5:
+            pass
+        release.set()
+        for thread in [leader] + followers:
+            thread.join()
+
+        assert calls == [1]
+        assert len(results) == 6
+        assert all(result is results[0] for result in results)
+
+    def test_exceptions_are_raised_to_every_caller(self):
+        flights = SingleFlight()
+
+        with pytest.raises(ValueError):
+            flights.do("key", int, "not a number")
+        assert flights.do("key", int, "1") == 1
+
+
+class TestAsyncSingleFlight:
+
+    def test_concurrent_callers_share_one_task(self):
+        flights = AsyncSingleFlight()
+        calls = []
+
+        async def function(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return [value]
+
+        async def main():
+            results = await asyncio.gather(*[flights.do("key", function, n) for n in range(5)])
+            assert not flights.in_flight("key")
+            return results
+
+        results = asyncio.run(main())
+
+        assert calls == [0]
+        assert all(result is results[0] for result in results)
+
+    def test_cancelled_caller_does_not_cancel_the_others(self):
+        flights = AsyncSingleFlight()
+
+        async def function():
+            await asyncio.sleep(0.01)
+            return "done"
+
+        async def main():
+            first = asyncio.ensure_future(flights.do("key", function))
+            second = asyncio.ensure_future(flights.do("key", function))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        assert asyncio.run(main()) == "done"
+
+    def test_exceptions_are_raised_to_every_caller(self):
+        flights = AsyncSingleFlight()
+
+        async def function():
+            await asyncio.sleep(0.01)
+            raise ValueError("failed")
+
+        async def main():
+            return await asyncio.gather(*[flights.do("key", function) for _ in range(3)], return_exceptions=True)
+
+        errors = asyncio.run(main())
+
+        assert all(isinstance(error, ValueError) for error in errors)
@@ -0,0 +1,80 @@
+import random
+import pytest
+from meteoclimatic import Station
+from meteoclimatic.spatial import StationIndex, haversine_km
+
+
+def _station(code, latitude, longitude):
+    return Station("Station %s" % (code, ), code, "http://www.meteoclimatic.net/perfil/%s" % (code, ),
+                   latitude, longitude)
+
+
+def _random_stations(size, seed=43):
+    rng = random.Random(seed)
+    return [_station("S%05d" % (i, ), rng.uniform(-90.0, 90.0), rng.uniform(-180.0, 180.0)) for i in range(size)]
+
+
+def _linear_scan(stations, latitude, longitude, radius_km):
+    distances = [(haversine_km(latitude, longitude, s.latitude, s.longitude), s.code) for s in stations]
+    return sorted(code for distance, code in distances if distance <= radius_km)
+
+
+class TestStationIndex:
+
+    def test_haversine(self):
+        assert haversine_km(41.17, 1.11, 41.17, 1.11) == 0.0
+        # Reus - Barcelona
+        assert haversine_km(41.15, 1.10, 41.39, 2.17) == pytest.approx(93.5, abs=0.5)
+        assert haversine_km(0.0, 179.9, 0.0, -179.9) == pytest.approx(22.2, abs=0.1)
+
+    @pytest.mark.parametrize("latitude,longitude,radius_km", [
+        (41.17, 1.11, 100.0),
+        (0.0, 179.95, 500.0),
+        (0.0, -179.95, 500.0),
+        (89.5, 10.0, 300.0),
+        (-88.0, -60.0, 1000.0),
+        (10.0, 10.0, 25000.0),
+        (60.0, 30.0, 2000.0),
+    ])
+    def test_near_matches_linear_scan(self, latitude, longitude, radius_km):
+        stations = _random_stations(20000)
+        index = StationIndex()
+        index.update(stations)
+
+        result = index.near(latitude, longitude, radius_km)
+
+        assert sorted(nearby.station.code for nearby in result) == _linear_scan(stations, latitude, longitude, radius_km)
+        assert [nearby.distance for nearby in result] == sorted(nearby.distance for nearby in result)
+
+    def test_nearest(self):
+        stations = _random_stations(5000)
+        index = StationIndex(cell_size=1.0)
+        index.update(stations)
+
+        result = index.nearest(41.17, 1.11, k=5)
+
+        expected = sorted(stations, key=lambda s: haversine_km(41.17, 1.11, s.latitude, s.longitude))[:5]
+        assert [nearby.station for nearby in result] == expected
+
+    def test_nearest_with_few_stations(self):
+        index = StationIndex()
+        index.add(_station("A", -45.0, 170.0))
+
+        assert [nearby.station.code for nearby in index.nearest(45.0, -10.0, k=3)] == ["A"]
+        assert StationIndex().nearest(0.0, 0.0) == []
+
+    def test_add_replaces_station(self):
+        index = StationIndex()
+        index.add(_station("A", 41.17, 1.11))
+        index.add(_station("A", 43.44, -3.92))
+        index.add(Station("No coordinates", "B", None))
+
+        assert len(index) == 1
+        assert "A" in index and "B" not in index
+        assert index.near(41.17, 1.11, 10.0) == []
+        assert index.near(43.44, -3.92, 10.0)[0].station.latitude == 43.44
+
+    def test_invalid_cell_size(self):
+        with pytest.raises(ValueError) as error:
+            StationIndex(cell_size=0)
+        assert str(error.value) == "cell_size must be greater than 0"
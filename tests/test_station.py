@@ -13,12 +13,22 @@ class TestStation:
         assert s.name == "Reus - Nord (Tarragona)"
         assert s.code == "ESCAT4300000043206B"
         assert s.url == "http://www.meteoclimatic.net/perfil/ESCAT4300000043206B"
+        assert s.latitude is None and s.longitude is None
+
+    def test_init_coordinates(self):
+        s = Station(latitude=41.17, longitude=1.11, **self._test_dict)
+        assert (s.latitude, s.longitude) == (41.17, 1.11)
+        assert s != Station(**self._test_dict)
 
     @pytest.mark.parametrize("field_name,field_value,expected_error", [
         ("name", "", "Station name cannot be empty"),
         ("name", None, "Station name cannot be empty"),
         ("code", "", "Station code cannot be empty"),
-        ("code", None, "Station code cannot be empty")
+        ("code", None, "Station code cannot be empty"),
+        ("latitude", 90.1, "latitude must be between -90 and 90"),
+        ("latitude", -90.1, "latitude must be between -90 and 90"),
+        ("longitude", 180.1, "longitude must be between -180 and 180"),
+        ("longitude", -180.1, "longitude must be between -180 and 180")
     ])
     def test_init_fails_when_wrong_data_provided(self, field_name, field_value, expected_error):
         d1 = self._test_dict.copy()
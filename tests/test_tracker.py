@@ -0,0 +1,101 @@
+import gzip
+import os
+import tempfile
+import pytest
+from unittest.mock import patch
+from meteoclimatic import Observation
+from meteoclimatic.feed import FeedItem
+from meteoclimatic.parser import iter_feed_items
+from meteoclimatic.tracker import FeedValidators, ObservationTracker
+from tests.feed_server import read_feed
+
+
+def _region_items(engine="lxml", document=None):
+    return list(iter_feed_items(document or read_feed("region.xml"), engine))
+
+
+def _changed_region():
+    # New reading of ESCAT4300000043204A, published 5 minutes later
+    return (read_feed("region.xml")
+            .replace(b"(18,1;", b"(18,4;")
+            .replace(b"Thu, 04 Jun 2020 10:50:00 +0000", b"Thu, 04 Jun 2020 10:55:00 +0000"))
+
+
+class TestObservationTracker:
+
+    def test_changes(self):
+        tracker = ObservationTracker()
+
+        first = list(tracker.changes(_region_items()))
+        second = list(tracker.changes(_region_items()))
+        third = list(tracker.changes(_region_items(document=_changed_region())))
+
+        assert [o.station.code for o in first] == [
+            "ESCAT4300000043206B", "ESCAT4300000043204A", "ESCAT0800000008940B"]
+        assert second == []
+        assert [(o.station.code, o.weather.temp_current) for o in third] == [("ESCAT4300000043204A", 18.4)]
+        assert len(tracker) == 3 and "ESCAT4300000043204A" in tracker
+
+    def test_unchanged_items_are_not_parsed(self):
+        tracker = ObservationTracker()
+        list(tracker.changes(_region_items()))
+
+        with patch("meteoclimatic.tracker.Observation.from_feed_item", wraps=Observation.from_feed_item) as mock_parse:
+            assert list(tracker.changes(_region_items())) == []
+            # A new publication date with the same readings is not a change
+            republished = _region_items(document=read_feed("region.xml").replace(b"10:50:00", b"10:55:00"))
+            assert list(tracker.changes(republished)) == []
+
+        mock_parse.assert_not_called()
+
+    @pytest.mark.parametrize("engine", ["bs4", "raw"])
+    def test_state_does_not_depend_on_engine(self, engine):
+        tracker = ObservationTracker()
+        list(tracker.changes(_region_items()))
+
+        assert list(tracker.changes(_region_items(engine))) == []
+
+    def test_skips_older_items(self):
+        tracker = ObservationTracker()
+        list(tracker.changes(_region_items(document=_changed_region())))
+
+        assert list(tracker.changes(_region_items())) == []
+
+    def test_skips_unparseable_items(self):
+        items = [FeedItem("Title", "http://link", "Thu, 04 Jun 2020 10:48:01 +0000", "no data"),
+                 FeedItem("Title", "http://link", "not a date", _region_items()[0].description)]
+
+        assert list(ObservationTracker().changes(items)) == []
+
+    def test_forget(self):
+        tracker = ObservationTracker()
+        list(tracker.changes(_region_items()))
+        tracker.set_validators("http://feed", '"etag"', None)
+
+        tracker.forget("ESCAT4300000043204A")
+
+        assert [o.station.code for o in tracker.changes(_region_items())] == ["ESCAT4300000043204A"]
+        assert tracker.get_validators("http://feed") is None
+
+    def test_save_and_load(self):
+        tracker = ObservationTracker()
+        list(tracker.changes(_region_items()))
+        tracker.set_validators("http://feed", '"etag"', "Thu, 04 Jun 2020 10:58:23 GMT")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tracker.json.gz")
+            tracker.save(path)
+            loaded = ObservationTracker.load(path)
+
+        assert loaded.state() == tracker.state()
+        assert loaded.get_validators("http://feed") == FeedValidators('"etag"', "Thu, 04 Jun 2020 10:58:23 GMT")
+        assert list(loaded.changes(_region_items())) == []
+
+    def test_invalid_state(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tracker.json.gz")
+            with gzip.open(path, "wt") as f:
+                f.write('{"stations": {}}')
+            with pytest.raises(ValueError) as error:
+                ObservationTracker.load(path)
+        assert str(error.value) == "Unsupported observation tracker state"
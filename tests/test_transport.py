@@ -0,0 +1,100 @@
+import gzip
+import io
+import zlib
+import pytest
+from meteoclimatic.transport import PooledTransport, TransportResponse
+from tests.feed_server import FeedServer, read_feed
+
+
+class TestTransportResponse:
+
+    _body = read_feed("region.xml")
+
+    @pytest.mark.parametrize("content_encoding,payload", [
+        (None, _body),
+        ("gzip", gzip.compress(_body)),
+        ("deflate", zlib.compress(_body)),
+        ("deflate", zlib.compress(_body)[2:-4]),
+    ])
+    def test_read_decodes_body(self, content_encoding, payload):
+        headers = {} if content_encoding is None else {"Content-Encoding": content_encoding}
+
+        whole = TransportResponse(200, headers, io.BytesIO(payload)).read()
+        response = TransportResponse(200, headers, io.BytesIO(payload))
+        chunks = list(iter(lambda: response.read(64), b""))
+
+        assert whole == self._body
+        assert b"".join(chunks) == self._body
+        assert all(len(chunk) > 0 for chunk in chunks)
+        assert response.received == len(payload)
+
+    def test_headers_are_case_insensitive(self):
+        response = TransportResponse(200, {"ETag": "abc"}, io.BytesIO(b""))
+        assert response.headers["etag"] == "abc"
+
+    def test_close_calls_on_close_once(self):
+        closed = []
+        response = TransportResponse(200, {}, io.BytesIO(b""), on_close=closed.append)
+        response.close()
+        response.close()
+        assert closed == [response]
+
+
+class TestPooledTransport:
+
+    def test_requests_compressed_feeds(self):
+        with FeedServer({"ESCAT43": "region.xml"}, compress=True) as server:
+            transport = PooledTransport()
+            response = transport.request(server.base_url.format(station_code="ESCAT43"))
+
+            assert response.status == 200
+            assert response.headers["content-encoding"] == "gzip"
+            assert response.read() == read_feed("region.xml")
+            response.close()
+
+    def test_reuses_connections(self):
+        with FeedServer({"ESCAT43": "region.xml"}) as server:
+            transport = PooledTransport()
+            for _ in range(3):
+                response = transport.request(server.base_url.format(station_code="ESCAT43"))
+                response.read()
+                response.close()
+
+            assert len(server.requests) == 3
+            assert server.connections == 1
+
+    def test_does_not_reuse_partially_read_connections(self):
+        with FeedServer({"ESCAT43": "region.xml"}) as server:
+            transport = PooledTransport()
+            for _ in range(2):
+                response = transport.request(server.base_url.format(station_code="ESCAT43"))
+                response.read(10)
+                response.close()
+
+            assert server.connections == 2
+
+    def test_retries_dropped_idle_connections(self):
+        with FeedServer({"ESCAT43": "region.xml"}) as server:
+            transport = PooledTransport()
+            url = server.base_url.format(station_code="ESCAT43")
+            response = transport.request(url)
+            response.read()
+            response.close()
+            for connections in transport._pools.values():
+                for connection in connections:
+                    connection.sock.close()
+
+            response = transport.request(url)
+
+            assert response.read() == read_feed("region.xml")
+            assert server.connections == 2
+
+    def test_close_closes_idle_connections(self):
+        with FeedServer({"ESCAT43": "region.xml"}) as server:
+            transport = PooledTransport()
+            response = transport.request(server.base_url.format(station_code="ESCAT43"))
+            response.read()
+            response.close()
+            transport.close()
+
+            assert transport._pools == {}
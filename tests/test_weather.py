@@ -1,6 +1,7 @@
 import datetime
 import pytest
 from meteoclimatic import Condition, Weather
+from meteoclimatic.weather import check_range
 
 
 class TestWeather:
@@ -46,6 +47,16 @@ class TestWeather:
         with pytest.raises(ValueError) as error:
             Weather(**d1)
         assert str(error.value) == expected_error
+        if field_name != 'reference_time':
+            with pytest.raises(ValueError) as error:
+                check_range(field_name, field_value)
+            assert str(error.value) == expected_error
+
+    def test_check_range(self):
+        for field_name, field_value in self._test_dict.items():
+            assert check_range(field_name, field_value) is field_value
+        assert check_range('wind_bearing', 360.0) == 360.0
+        assert check_range('rain', None) is None
 
     def test_init_when_data_fields_are_none(self):
         d1 = self._test_dict.copy()